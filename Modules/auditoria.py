@@ -0,0 +1,155 @@
+# Modules/auditoria.py
+
+import os
+import json
+import time
+import socket
+import getpass
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+
+# Carpeta de la auditoría, junto al log de texto (borrado_fojas.log).
+# Un archivo JSONL por día: auditoria/AAAA-MM-DD.jsonl
+DIR_AUDITORIA = "auditoria"
+
+_lock = threading.Lock()
+
+
+class Fases:
+    """
+    Duración (reloj monotónico) y bytes de cada fase de una operación, para
+    guardar en su registro de auditoría como {"fase": {"segundos", "bytes"}}.
+
+        fases = Fases()
+        with fases.medir("escritura") as medicion:
+            resultado = escribir(...)
+            medicion["bytes"] = resultado["bytes_escritos"]
+
+    Una fase que falla también queda medida, hasta el momento del error.
+    """
+
+    def __init__(self):
+        self.datos = {}
+
+    @contextmanager
+    def medir(self, nombre):
+        medicion = {"bytes": 0}
+        inicio = time.monotonic()
+        try:
+            yield medicion
+        finally:
+            self.agregar(nombre, time.monotonic() - inicio, medicion["bytes"])
+
+    def agregar(self, nombre, segundos, cantidad_bytes=0):
+        self.datos[nombre] = {"segundos": round(segundos, 4), "bytes": cantidad_bytes}
+
+
+def ruta_segmento(dia, directorio=DIR_AUDITORIA):
+    return os.path.join(directorio, f"{dia.isoformat()}.jsonl")
+
+
+def registrar(operacion, directorio=DIR_AUDITORIA, log=None, **datos):
+    """
+    Agrega un registro a la auditoría del día: una línea JSON con
+    'operacion', el momento, usuario y equipo, más 'datos'. La auditoría
+    nunca interrumpe la operación: si no se puede escribir, sólo se avisa
+    por 'log'.
+    """
+    ahora = datetime.now()
+    registro = {
+        "momento": ahora.isoformat(timespec="milliseconds"),
+        "operacion": operacion,
+        "usuario": getpass.getuser(),
+        "equipo": socket.gethostname(),
+    }
+    registro.update(datos)
+    linea = json.dumps(registro, ensure_ascii=False, default=str) + "\n"
+    try:
+        with _lock:
+            os.makedirs(directorio, exist_ok=True)
+            with open(ruta_segmento(ahora.date(), directorio), "a", encoding="utf-8") as f:
+                f.write(linea)
+    except OSError as e:
+        if log:
+            log(f"No se pudo escribir la auditoría: {e}", level="warning")
+
+
+def segmentos(desde=None, hasta=None, directorio=DIR_AUDITORIA):
+    """
+    Rutas de los segmentos diarios entre 'desde' y 'hasta' (fechas,
+    inclusive), en orden. Se eligen por nombre, sin abrir los demás.
+    """
+    if not os.path.isdir(directorio):
+        return []
+    rutas = []
+    for nombre in sorted(os.listdir(directorio)):
+        if not nombre.endswith(".jsonl"):
+            continue
+        try:
+            dia = date.fromisoformat(nombre[:-len(".jsonl")])
+        except ValueError:
+            continue
+        if (desde is None or dia >= desde) and (hasta is None or dia <= hasta):
+            rutas.append(os.path.join(directorio, nombre))
+    return rutas
+
+
+def leer_registros(desde=None, hasta=None, directorio=DIR_AUDITORIA, operacion=None):
+    """
+    Genera los registros de los segmentos entre 'desde' y 'hasta'. Una
+    línea dañada (p.ej. cortada por un apagón) se saltea.
+    """
+    for ruta in segmentos(desde, hasta, directorio):
+        with open(ruta, "r", encoding="utf-8") as f:
+            for linea in f:
+                try:
+                    registro = json.loads(linea)
+                except ValueError:
+                    continue
+                if operacion is None or registro.get("operacion") == operacion:
+                    yield registro
+
+
+def agregar_argumentos_periodo(parser):
+    """
+    Opciones comunes de los comandos de consulta para elegir el período.
+    """
+    parser.add_argument("--desde", help="Primer día (AAAA-MM-DD).")
+    parser.add_argument("--hasta", help="Último día (AAAA-MM-DD).")
+    parser.add_argument("--mes", help="Un mes completo: AAAA-MM o 'anterior'.")
+    parser.add_argument("--dias", type=int, help="Los últimos N días, incluyendo hoy.")
+
+
+def periodo(args):
+    """
+    (desde, hasta) según --mes, --dias o --desde/--hasta (ver
+    agregar_argumentos_periodo). Lanza ValueError si una fecha es inválida.
+    """
+    if args.mes == "anterior":
+        return mes_anterior()
+    if args.mes:
+        return rango_de_mes(args.mes)
+    if args.dias:
+        return date.today() - timedelta(days=args.dias - 1), date.today()
+    desde = date.fromisoformat(args.desde) if args.desde else None
+    hasta = date.fromisoformat(args.hasta) if args.hasta else None
+    return desde, hasta
+
+
+def mes_anterior(hoy=None):
+    """
+    (primer día, último día) del mes anterior a 'hoy'.
+    """
+    hoy = hoy or date.today()
+    ultimo = hoy.replace(day=1) - timedelta(days=1)
+    return ultimo.replace(day=1), ultimo
+
+
+def rango_de_mes(texto):
+    """
+    (primer día, último día) del mes "AAAA-MM".
+    """
+    primero = datetime.strptime(texto, "%Y-%m").date()
+    siguiente = (primero.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return primero, siguiente - timedelta(days=1)
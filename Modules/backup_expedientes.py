@@ -0,0 +1,353 @@
+# Modules/backup_expedientes.py
+
+import os
+import json
+import hashlib
+import tempfile
+import threading
+from datetime import datetime
+
+import PyPDF2
+
+from Modules.borrado_fojas import reemplazar_atomico
+from Modules.lectura_local import contenido_del_documento, leer_pdf
+from Modules.rangos_fojas import RangosFojas
+
+# Carpeta local donde se guardan las copias de seguridad de los expedientes
+DIR_BACKUP = r"C:\Bk_de_Expedientes"
+
+TAMANIO_BLOQUE = 1024 * 1024
+
+
+class AlmacenBackups:
+    """
+    Almacén de backups direccionado por contenido.
+
+    Cada versión distinta de un PDF se guarda una sola vez como
+    objetos/<xx>/<sha256>.pdf, y un índice (indice.jsonl) registra qué
+    expediente se respaldó, cuándo y con qué contenido. Si el archivo de
+    origen no cambió (mismo tamaño y mtime) desde el último backup, no se
+    vuelve a leer: se agrega una entrada al índice apuntando al mismo objeto.
+    """
+
+    def __init__(self, backup_dir=DIR_BACKUP):
+        self.backup_dir = backup_dir
+        self.dir_objetos = os.path.join(backup_dir, "objetos")
+        self.ruta_indice = os.path.join(backup_dir, "indice.jsonl")
+        self._lock = threading.Lock()
+        # Última entrada del índice por archivo de origen, y hasta qué byte
+        # del índice ya se leyó: cada backup lee sólo lo agregado desde el
+        # anterior, no el índice entero
+        self._ultimas = {}
+        self._leido_hasta = 0
+
+    def ruta_objeto(self, digest):
+        return os.path.join(self.dir_objetos, digest[:2], f"{digest}.pdf")
+
+    def guardar(self, pdf_path, subcarpeta, log=None):
+        """
+        Respalda 'pdf_path' y retorna la entrada del índice creada
+        (expediente, fecha, digest, tamaño, ruta del objeto, etc.).
+        """
+        st = os.stat(pdf_path)
+
+        anterior = self._ultima_entrada_igual(pdf_path, st)
+        if anterior is not None:
+            digest = anterior["digest"]
+            reutilizado = True
+        else:
+            digest, reutilizado = self._copiar_con_hash(pdf_path)
+
+        entrada = {
+            "expediente": subcarpeta,
+            "fecha": datetime.now().isoformat(timespec="seconds"),
+            "origen": pdf_path,
+            "digest": digest,
+            "tamanio": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+            "objeto": self.ruta_objeto(digest),
+        }
+        self.agregar_al_indice(entrada)
+
+        if log and reutilizado:
+            log(f"El contenido ya estaba respaldado ({digest[:12]}). No se copió de nuevo.")
+
+        return entrada
+
+    def listar(self, subcarpeta=None):
+        """
+        Retorna las entradas del índice (de un expediente, si se indica),
+        de la más vieja a la más nueva.
+        """
+        if not os.path.isfile(self.ruta_indice):
+            return []
+        entradas = []
+        with open(self.ruta_indice, "r", encoding="utf-8") as f:
+            for linea in f:
+                if not linea.strip():
+                    continue
+                try:
+                    entrada = json.loads(linea)
+                except ValueError:
+                    continue
+                if subcarpeta is None or entrada.get("expediente") == subcarpeta:
+                    entradas.append(entrada)
+        return entradas
+
+    def _ultima_entrada_igual(self, pdf_path, st):
+        with self._lock:
+            self._leer_novedades()
+            entrada = self._ultimas.get(_clave_origen(pdf_path))
+        if entrada is None:
+            return None
+        if (entrada.get("tamanio") == st.st_size
+                and entrada.get("mtime_ns") == st.st_mtime_ns
+                and os.path.isfile(self.ruta_objeto(entrada["digest"]))):
+            return entrada
+        return None
+
+    def _leer_novedades(self):
+        """
+        Incorpora a _ultimas las entradas agregadas al índice desde la
+        última lectura (también las de otros procesos). Si el índice se
+        achicó (se reemplazó a mano) se vuelve a leer desde el principio.
+        """
+        if not os.path.isfile(self.ruta_indice):
+            self._ultimas, self._leido_hasta = {}, 0
+            return
+        with open(self.ruta_indice, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() < self._leido_hasta:
+                self._ultimas, self._leido_hasta = {}, 0
+            f.seek(self._leido_hasta)
+            nuevos = f.read()
+        # Un renglón sin salto final todavía se está escribiendo
+        completos = nuevos[:nuevos.rfind(b"\n") + 1]
+        self._leido_hasta += len(completos)
+        for linea in completos.splitlines():
+            try:
+                entrada = json.loads(linea)
+            except ValueError:
+                continue
+            if entrada.get("origen"):
+                self._ultimas[_clave_origen(entrada["origen"])] = entrada
+
+    def _copiar_con_hash(self, pdf_path):
+        """
+        Copia el archivo a un temporal calculando el SHA-256 en el mismo
+        recorrido. Si el objeto ya existía se descarta el temporal.
+        Retorna (digest, reutilizado).
+        """
+        os.makedirs(self.dir_objetos, exist_ok=True)
+        hasher = hashlib.sha256()
+
+        fd, ruta_temp = tempfile.mkstemp(dir=self.dir_objetos, suffix=".tmp")
+        try:
+            with open(pdf_path, "rb") as origen, os.fdopen(fd, "wb") as temp:
+                while True:
+                    bloque = origen.read(TAMANIO_BLOQUE)
+                    if not bloque:
+                        break
+                    hasher.update(bloque)
+                    temp.write(bloque)
+
+            digest = hasher.hexdigest()
+            ruta_final = self.ruta_objeto(digest)
+            if os.path.isfile(ruta_final):
+                os.remove(ruta_temp)
+                return digest, True
+
+            os.makedirs(os.path.dirname(ruta_final), exist_ok=True)
+            os.replace(ruta_temp, ruta_final)
+            return digest, False
+        except Exception:
+            if os.path.exists(ruta_temp):
+                os.remove(ruta_temp)
+            raise
+
+    def agregar_al_indice(self, entrada):
+        with self._lock:
+            os.makedirs(self.backup_dir, exist_ok=True)
+            with open(self.ruta_indice, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entrada, ensure_ascii=False) + "\n")
+
+
+def _clave_origen(pdf_path):
+    return os.path.normcase(os.path.abspath(pdf_path))
+
+
+_almacenes = {}
+_lock_almacenes = threading.Lock()
+
+
+def obtener_almacen(backup_dir=DIR_BACKUP):
+    """
+    Retorna el AlmacenBackups de 'backup_dir' (uno por carpeta y proceso).
+    """
+    with _lock_almacenes:
+        if backup_dir not in _almacenes:
+            _almacenes[backup_dir] = AlmacenBackups(backup_dir)
+        return _almacenes[backup_dir]
+
+
+def crear_backup(pdf_path, subcarpeta, backup_dir=DIR_BACKUP, log=None):
+    """
+    Respalda 'pdf_path' en el almacén de backups y retorna la ruta del
+    objeto donde quedó guardado su contenido.
+    """
+    return obtener_almacen(backup_dir).guardar(pdf_path, subcarpeta, log=log)["objeto"]
+
+
+def crear_backup_delta(pdf_path, subcarpeta, reader, paginas, backup_dir=DIR_BACKUP):
+    """
+    Backup sólo de las fojas que se van a eliminar: guarda un PDF chico con
+    esas páginas y un manifiesto JSON con el hash del documento original, su
+    tamaño, la cantidad de páginas y las posiciones eliminadas.
+    El contenido original se toma del documento ya leído ('reader'), sin
+    volver a leer el archivo del share. Retorna la ruta del manifiesto.
+    """
+    datos = contenido_del_documento(reader)
+    total_paginas = len(reader.pages)
+    paginas = paginas.recortar(total_paginas)
+
+    dir_deltas = os.path.join(backup_dir, "deltas")
+    os.makedirs(dir_deltas, exist_ok=True)
+
+    base_name = f"{subcarpeta}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    counter = 1
+    while os.path.exists(os.path.join(dir_deltas, f"{base_name}.json")):
+        base_name = f"{subcarpeta}_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{counter}"
+        counter += 1
+
+    ruta_pdf = os.path.join(dir_deltas, f"{base_name}.pdf")
+    ruta_manifiesto = os.path.join(dir_deltas, f"{base_name}.json")
+
+    writer = PyPDF2.PdfWriter()
+    for foja in paginas:
+        writer.add_page(reader.pages[foja - 1])
+    with open(ruta_pdf, "wb") as f:
+        writer.write(f)
+
+    manifiesto = {
+        "expediente": subcarpeta,
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "origen": pdf_path,
+        "digest_original": hashlib.sha256(datos).hexdigest(),
+        "tamanio_original": len(datos),
+        "paginas_original": total_paginas,
+        "fojas_eliminadas": paginas.intervalos,
+        "pdf_fojas": ruta_pdf,
+        "estado": "pendiente",
+    }
+    _guardar_manifiesto(ruta_manifiesto, manifiesto)
+
+    obtener_almacen(backup_dir).agregar_al_indice({
+        "expediente": subcarpeta,
+        "fecha": manifiesto["fecha"],
+        "origen": pdf_path,
+        "tipo": "delta",
+        "digest": manifiesto["digest_original"],
+        "tamanio": len(datos),
+        "manifiesto": ruta_manifiesto,
+    })
+    return ruta_manifiesto
+
+
+def completar_backup_delta(ruta_manifiesto, resultado):
+    """
+    Registra en el manifiesto cómo terminó el borrado (modo y bytes
+    escritos), que es lo que permite luego una restauración exacta.
+    """
+    manifiesto = leer_manifiesto(ruta_manifiesto)
+    manifiesto.update(
+        estado="realizado",
+        modo=resultado["modo"],
+        bytes_escritos=resultado["bytes_escritos"],
+    )
+    _guardar_manifiesto(ruta_manifiesto, manifiesto)
+
+
+def leer_manifiesto(ruta_manifiesto):
+    with open(ruta_manifiesto, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _guardar_manifiesto(ruta_manifiesto, manifiesto):
+    ruta_temp = f"{ruta_manifiesto}.tmp"
+    with open(ruta_temp, "w", encoding="utf-8") as f:
+        json.dump(manifiesto, f, ensure_ascii=False, indent=2)
+    os.replace(ruta_temp, ruta_manifiesto)
+
+
+def _sha256_prefijo(pdf_path, tamanio):
+    hasher = hashlib.sha256()
+    restante = tamanio
+    with open(pdf_path, "rb") as f:
+        while restante > 0:
+            bloque = f.read(min(TAMANIO_BLOQUE, restante))
+            if not bloque:
+                break
+            hasher.update(bloque)
+            restante -= len(bloque)
+    return hasher.hexdigest()
+
+
+def restaurar_backup_delta(ruta_manifiesto, destino=None, log=None):
+    """
+    Reconstruye el documento original a partir de un backup delta.
+
+    - Si el borrado fue incremental y el archivo no tuvo cambios posteriores,
+      basta con truncarlo al tamaño original: el resultado es idéntico byte
+      a byte (se verifica con el hash guardado).
+    - Si no, se vuelven a intercalar las fojas guardadas en sus posiciones
+      originales. El documento tiene las mismas páginas, pero no es
+      idéntico byte a byte al original.
+
+    'destino' permite escribir el resultado en otra ruta en lugar de
+    sobrescribir el PDF. Retorna "exacta" o "reconstruida".
+    """
+    log = log or (lambda mensaje, level="info": None)
+    manifiesto = leer_manifiesto(ruta_manifiesto)
+    pdf_path = manifiesto["origen"]
+    destino = destino or pdf_path
+
+    tamanio_original = manifiesto["tamanio_original"]
+    tamanio_actual = os.path.getsize(pdf_path)
+
+    if (manifiesto.get("modo") == "incremental"
+            and tamanio_actual == tamanio_original + manifiesto.get("bytes_escritos", -1)
+            and _sha256_prefijo(pdf_path, tamanio_original) == manifiesto["digest_original"]):
+        if destino == pdf_path:
+            with open(pdf_path, "r+b") as f:
+                f.truncate(tamanio_original)
+        else:
+            with open(pdf_path, "rb") as origen, open(destino, "wb") as salida:
+                salida.write(origen.read(tamanio_original))
+        log(f"Restauración exacta de {manifiesto['expediente']} en: {destino}")
+        return "exacta"
+
+    fojas = RangosFojas(tuple(intervalo) for intervalo in manifiesto["fojas_eliminadas"])
+    actual, _ = leer_pdf(pdf_path)
+    eliminadas, _ = leer_pdf(manifiesto["pdf_fojas"])
+
+    esperadas = manifiesto["paginas_original"] - len(fojas)
+    if len(actual.pages) != esperadas or len(eliminadas.pages) != len(fojas):
+        raise ValueError(
+            f"El PDF actual tiene {len(actual.pages)} páginas y se esperaban {esperadas}: "
+            f"tuvo cambios posteriores al borrado y no se puede restaurar con este backup."
+        )
+
+    writer = PyPDF2.PdfWriter()
+    siguiente_actual = iter(actual.pages)
+    siguiente_eliminada = iter(eliminadas.pages)
+    for posicion in range(1, manifiesto["paginas_original"] + 1):
+        if posicion in fojas:
+            writer.add_page(next(siguiente_eliminada))
+        else:
+            writer.add_page(next(siguiente_actual))
+
+    reemplazar_atomico(destino, writer.write, paginas_esperadas=manifiesto["paginas_original"])
+
+    log(f"Restauración por reconstrucción de {manifiesto['expediente']} en: {destino} "
+        f"(mismas páginas, no idéntico byte a byte)", level="warning")
+    return "reconstruida"
@@ -0,0 +1,468 @@
+# Modules/bandeja_salida.py
+
+import os
+import json
+import time
+import socket
+import smtplib
+import sqlite3
+import threading
+from datetime import datetime
+from email.message import EmailMessage
+
+try:
+    import win32com.client as win32
+    import pythoncom
+except ImportError:
+    win32 = None
+    pythoncom = None
+
+from Modules.auditoria import registrar
+from Modules.backup_expedientes import DIR_BACKUP
+
+# Base local con los correos pendientes de envío
+DB_BANDEJA = os.path.join(DIR_BACKUP, "bandeja_salida.sqlite3")
+
+# Transporte por defecto ("outlook", "smtp" o "archivo") y sus opciones.
+# Se pueden cambiar por variables de entorno sin tocar el código.
+TRANSPORTE_POR_DEFECTO = os.environ.get("BORRADO_FOJAS_TRANSPORTE", "outlook")
+SERVIDOR_SMTP = os.environ.get("BORRADO_FOJAS_SMTP", "")
+REMITENTE_SMTP = os.environ.get("BORRADO_FOJAS_REMITENTE", "")
+CARPETA_CORREOS = os.environ.get("BORRADO_FOJAS_CARPETA_CORREOS", os.path.join(DIR_BACKUP, "correos"))
+
+# Cuántos correos se envían por tanda (una sola sesión con el transporte)
+TAMANIO_TANDA = 50
+
+# Reintentos de un correo que falló: espera creciente hasta darlo por fallido
+ESPERA_REINTENTO = 60
+ESPERA_REINTENTO_MAXIMA = 60 * 60
+MAX_INTENTOS = 10
+
+# Un correo reclamado por un despachador que no informó el resultado en
+# este tiempo (el proceso se cerró a mitad de la tanda) vuelve a pendiente
+RECLAMO_VENCIDO = 15 * 60
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS mensajes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    creado TEXT NOT NULL,
+    destinatarios TEXT NOT NULL,
+    asunto TEXT NOT NULL,
+    cuerpo TEXT NOT NULL,
+    estado TEXT NOT NULL DEFAULT 'pendiente',
+    intentos INTEGER NOT NULL DEFAULT 0,
+    proximo_intento REAL NOT NULL DEFAULT 0,
+    ultimo_error TEXT,
+    enviado TEXT,
+    duenio TEXT,
+    reclamado REAL
+);
+CREATE INDEX IF NOT EXISTS idx_mensajes_estado ON mensajes (estado, proximo_intento);
+CREATE TABLE IF NOT EXISTS novedades (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    destinatario TEXT NOT NULL,
+    datos TEXT NOT NULL,
+    creado REAL NOT NULL,
+    grupo TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_novedades_destinatario ON novedades (destinatario, creado);
+"""
+
+
+class TransporteNoDisponible(Exception):
+    """
+    El transporte no se puede usar en este equipo (falta pywin32, no hay
+    servidor SMTP configurado, etc.). Los correos quedan en la bandeja.
+    """
+
+
+class BandejaSalida:
+    """
+    Bandeja de salida persistente (SQLite). Encolar un correo es una
+    inserción local: no depende de Outlook ni de la red, y lo encolado
+    sobrevive a un cierre inesperado hasta que se despacha.
+
+    La ventana y el modo por lotes pueden despachar la misma bandeja a la
+    vez: cada uno reclama sus correos (estado "enviando" con su dueño)
+    antes de enviarlos, así ninguno se envía dos veces.
+    """
+
+    def __init__(self, ruta_db=DB_BANDEJA):
+        self.ruta_db = ruta_db
+        self.duenio = f"{socket.gethostname()}:{os.getpid()}"
+        self._lock = threading.Lock()
+        self._conexion = None
+
+    def _conectar(self):
+        if self._conexion is None:
+            carpeta = os.path.dirname(self.ruta_db)
+            if carpeta:
+                os.makedirs(carpeta, exist_ok=True)
+            conexion = sqlite3.connect(self.ruta_db, check_same_thread=False)
+            conexion.row_factory = sqlite3.Row
+            conexion.execute("PRAGMA journal_mode=WAL")
+            conexion.executescript(_ESQUEMA)
+            _migrar(conexion)
+            conexion.commit()
+            self._conexion = conexion
+        return self._conexion
+
+    def encolar(self, destinatarios, asunto, cuerpo):
+        """
+        Agrega un correo a la bandeja y retorna su id.
+        """
+        with self._lock:
+            conexion = self._conectar()
+            with conexion:
+                cursor = conexion.execute(
+                    "INSERT INTO mensajes (creado, destinatarios, asunto, cuerpo) VALUES (?, ?, ?, ?)",
+                    (datetime.now().isoformat(timespec="seconds"),
+                     json.dumps(list(destinatarios), ensure_ascii=False), asunto, cuerpo)
+                )
+                return cursor.lastrowid
+
+    def agregar_novedad(self, destinatarios, datos, grupo=None):
+        """
+        Acumula una novedad (un dict serializable) para cada destinatario,
+        en lugar de encolar un correo. consolidar() las junta después en un
+        único correo por destinatario. 'grupo' identifica a quien la agregó
+        (p.ej. una corrida del lote) para consolidar sólo lo suyo.
+        """
+        ahora = time.time()
+        texto = json.dumps(datos, ensure_ascii=False)
+        with self._lock:
+            conexion = self._conectar()
+            with conexion:
+                conexion.executemany(
+                    "INSERT INTO novedades (destinatario, datos, creado, grupo) VALUES (?, ?, ?, ?)",
+                    [(destinatario, texto, ahora, grupo) for destinatario in destinatarios]
+                )
+
+    def consolidar(self, ventana, armar, grupo=None):
+        """
+        Para cada destinatario cuya novedad más vieja tiene al menos
+        'ventana' segundos, encola un solo correo con todas sus novedades.
+        Con 'grupo' sólo se consideran las novedades de ese grupo; las
+        demás siguen esperando su ventana.
+        armar(lista_de_datos) retorna (asunto, cuerpo). Las novedades se
+        quitan en la misma transacción en que se encola el correo, así un
+        corte no las pierde ni las duplica. Retorna los correos encolados.
+        """
+        limite = time.time() - ventana
+        filtro, parametros = ("AND grupo = ? ", (grupo,)) if grupo is not None else ("", ())
+        encolados = 0
+        with self._lock:
+            conexion = self._conectar()
+            with conexion:
+                vencidos = [fila[0] for fila in conexion.execute(
+                    f"SELECT destinatario FROM novedades WHERE 1 = 1 {filtro}"
+                    "GROUP BY destinatario HAVING MIN(creado) <= ?", parametros + (limite,)
+                )]
+                for destinatario in vencidos:
+                    filas = conexion.execute(
+                        f"SELECT id, datos FROM novedades WHERE destinatario = ? {filtro}ORDER BY id",
+                        (destinatario,) + parametros
+                    ).fetchall()
+                    asunto, cuerpo = armar([json.loads(fila["datos"]) for fila in filas])
+                    conexion.execute(
+                        "INSERT INTO mensajes (creado, destinatarios, asunto, cuerpo) VALUES (?, ?, ?, ?)",
+                        (datetime.now().isoformat(timespec="seconds"),
+                         json.dumps([destinatario], ensure_ascii=False), asunto, cuerpo)
+                    )
+                    conexion.executemany(
+                        "DELETE FROM novedades WHERE id = ?", [(fila["id"],) for fila in filas]
+                    )
+                    encolados += 1
+        return encolados
+
+    def cantidad_novedades(self):
+        with self._lock:
+            return self._conectar().execute("SELECT COUNT(*) FROM novedades").fetchone()[0]
+
+    def listos(self, limite=TAMANIO_TANDA):
+        """
+        Correos pendientes cuyo próximo intento ya llegó, del más viejo al
+        más nuevo. Antes devuelve a pendiente los reclamos abandonados.
+        """
+        with self._lock:
+            conexion = self._conectar()
+            with conexion:
+                _devolver_vencidos(conexion)
+            filas = conexion.execute(
+                "SELECT * FROM mensajes WHERE estado = 'pendiente' AND proximo_intento <= ? "
+                "ORDER BY id LIMIT ?", (time.time(), limite)
+            ).fetchall()
+        return [_mensaje(fila) for fila in filas]
+
+    def reclamar(self, limite=TAMANIO_TANDA):
+        """
+        Como listos(), pero en una sola transacción (BEGIN IMMEDIATE) marca
+        los correos como "enviando" a nombre de este proceso. Retorna sólo
+        los que quedaron reclamados por nosotros: son los únicos que hay
+        que enviar.
+        """
+        ahora = time.time()
+        with self._lock:
+            conexion = self._conectar()
+            conexion.execute("BEGIN IMMEDIATE")
+            with conexion:
+                _devolver_vencidos(conexion)
+                ids = [fila[0] for fila in conexion.execute(
+                    "SELECT id FROM mensajes WHERE estado = 'pendiente' AND proximo_intento <= ? "
+                    "ORDER BY id LIMIT ?", (ahora, limite)
+                )]
+                conexion.executemany(
+                    "UPDATE mensajes SET estado = 'enviando', duenio = ?, reclamado = ? "
+                    "WHERE id = ? AND estado = 'pendiente'",
+                    [(self.duenio, ahora, id_mensaje) for id_mensaje in ids]
+                )
+                filas = conexion.execute(
+                    "SELECT * FROM mensajes WHERE estado = 'enviando' AND duenio = ? AND reclamado = ? "
+                    "ORDER BY id", (self.duenio, ahora)
+                ).fetchall()
+        return [_mensaje(fila) for fila in filas]
+
+    def liberar(self, ids):
+        """
+        Devuelve a pendiente, sin contar un intento, correos reclamados
+        que no se llegaron a enviar (p.ej. el transporte no está disponible).
+        """
+        with self._lock:
+            conexion = self._conectar()
+            with conexion:
+                conexion.executemany(
+                    "UPDATE mensajes SET estado = 'pendiente', duenio = NULL, reclamado = NULL "
+                    "WHERE id = ? AND estado = 'enviando' AND duenio = ?",
+                    [(id_mensaje, self.duenio) for id_mensaje in ids]
+                )
+
+    def cantidad_pendientes(self):
+        with self._lock:
+            return self._conectar().execute(
+                "SELECT COUNT(*) FROM mensajes WHERE estado = 'pendiente'"
+            ).fetchone()[0]
+
+    def marcar_enviado(self, id_mensaje):
+        with self._lock:
+            conexion = self._conectar()
+            with conexion:
+                conexion.execute(
+                    "UPDATE mensajes SET estado = 'enviado', enviado = ?, ultimo_error = NULL, "
+                    "duenio = NULL WHERE id = ?", (datetime.now().isoformat(timespec="seconds"), id_mensaje)
+                )
+
+    def marcar_fallido(self, id_mensaje, error):
+        """
+        Registra un intento fallido: se reprograma con espera creciente o,
+        pasados MAX_INTENTOS, queda en estado "fallido".
+        """
+        with self._lock:
+            conexion = self._conectar()
+            with conexion:
+                intentos = conexion.execute(
+                    "SELECT intentos FROM mensajes WHERE id = ?", (id_mensaje,)
+                ).fetchone()[0] + 1
+                espera = min(ESPERA_REINTENTO_MAXIMA, ESPERA_REINTENTO * (2 ** (intentos - 1)))
+                conexion.execute(
+                    "UPDATE mensajes SET intentos = ?, ultimo_error = ?, proximo_intento = ?, "
+                    "estado = ?, duenio = NULL WHERE id = ?",
+                    (intentos, str(error), time.time() + espera,
+                     "fallido" if intentos >= MAX_INTENTOS else "pendiente", id_mensaje)
+                )
+
+
+def _migrar(conexion):
+    """
+    Agrega a una bandeja creada por una versión anterior las columnas del
+    reclamo de correos y el grupo de las novedades.
+    """
+    for tabla, columna, tipo in (("mensajes", "duenio", "TEXT"), ("mensajes", "reclamado", "REAL"),
+                                 ("novedades", "grupo", "TEXT")):
+        columnas = {fila[1] for fila in conexion.execute(f"PRAGMA table_info({tabla})")}
+        if columna not in columnas:
+            conexion.execute(f"ALTER TABLE {tabla} ADD COLUMN {columna} {tipo}")
+
+
+def _devolver_vencidos(conexion):
+    conexion.execute(
+        "UPDATE mensajes SET estado = 'pendiente', duenio = NULL, reclamado = NULL "
+        "WHERE estado = 'enviando' AND reclamado < ?", (time.time() - RECLAMO_VENCIDO,)
+    )
+
+
+def _mensaje(fila):
+    mensaje = dict(fila)
+    mensaje["destinatarios"] = json.loads(mensaje["destinatarios"])
+    return mensaje
+
+
+class TransporteOutlook:
+    """
+    Envía por Outlook (COM). Una tanda usa una sola sesión de Outlook.
+    """
+    nombre = "outlook"
+
+    def enviar_tanda(self, mensajes, resultado):
+        if not win32:
+            raise TransporteNoDisponible("pywin32 no está disponible.")
+        pythoncom.CoInitialize()
+        try:
+            outlook = win32.Dispatch("Outlook.Application")
+            for mensaje in mensajes:
+                try:
+                    mail = outlook.CreateItem(0)  # 0 = olMailItem
+                    mail.To = ";".join(mensaje["destinatarios"])
+                    mail.Subject = mensaje["asunto"]
+                    mail.Body = mensaje["cuerpo"]
+                    mail.Send()
+                    resultado(mensaje, None)
+                except Exception as e:
+                    resultado(mensaje, e)
+        finally:
+            pythoncom.CoUninitialize()
+
+
+class TransporteSMTP:
+    """
+    Envía por SMTP. Una tanda usa una sola conexión al servidor.
+    """
+    nombre = "smtp"
+
+    def __init__(self, servidor=SERVIDOR_SMTP, remitente=REMITENTE_SMTP, puerto=25,
+                 usuario=None, clave=None, starttls=False):
+        self.servidor = servidor
+        self.remitente = remitente
+        self.puerto = puerto
+        self.usuario = usuario
+        self.clave = clave
+        self.starttls = starttls
+
+    def enviar_tanda(self, mensajes, resultado):
+        if not self.servidor or not self.remitente:
+            raise TransporteNoDisponible("No hay servidor SMTP o remitente configurado.")
+        with smtplib.SMTP(self.servidor, self.puerto, timeout=30) as smtp:
+            if self.starttls:
+                smtp.starttls()
+            if self.usuario:
+                smtp.login(self.usuario, self.clave)
+            for mensaje in mensajes:
+                try:
+                    smtp.send_message(_armar_email(mensaje, self.remitente))
+                    resultado(mensaje, None)
+                except smtplib.SMTPException as e:
+                    resultado(mensaje, e)
+
+
+class TransporteArchivo:
+    """
+    Guarda cada correo como .eml en una carpeta local (pruebas, o equipos
+    sin cliente de correo).
+    """
+    nombre = "archivo"
+
+    def __init__(self, carpeta=CARPETA_CORREOS):
+        self.carpeta = carpeta
+
+    def enviar_tanda(self, mensajes, resultado):
+        os.makedirs(self.carpeta, exist_ok=True)
+        for mensaje in mensajes:
+            try:
+                ruta = os.path.join(self.carpeta, f"correo_{mensaje['id']:06d}.eml")
+                with open(ruta, "wb") as f:
+                    f.write(bytes(_armar_email(mensaje, "borrado-fojas@localhost")))
+                resultado(mensaje, None)
+            except OSError as e:
+                resultado(mensaje, e)
+
+
+_TRANSPORTES = {
+    "outlook": TransporteOutlook,
+    "smtp": TransporteSMTP,
+    "archivo": TransporteArchivo,
+}
+
+
+def crear_transporte(nombre=None, **opciones):
+    """
+    Crea el transporte 'nombre' ("outlook", "smtp" o "archivo"); por
+    defecto, el configurado en TRANSPORTE_POR_DEFECTO.
+    """
+    nombre = (nombre or TRANSPORTE_POR_DEFECTO).lower()
+    if nombre not in _TRANSPORTES:
+        raise ValueError(f"Transporte de correo desconocido: {nombre}")
+    return _TRANSPORTES[nombre](**opciones)
+
+
+def _armar_email(mensaje, remitente):
+    email = EmailMessage()
+    email["From"] = remitente
+    email["To"] = ", ".join(mensaje["destinatarios"])
+    email["Subject"] = mensaje["asunto"]
+    email.set_content(mensaje["cuerpo"])
+    return email
+
+
+def despachar_pendientes(bandeja, transporte, log, limite=TAMANIO_TANDA):
+    """
+    Reclama una tanda de correos pendientes, la envía con 'transporte' y
+    registra el resultado de cada uno en la bandeja. Retorna (enviados,
+    fallidos). Si el transporte no está disponible, los correos vuelven a
+    pendiente. La duración de la tanda queda en la auditoría (operación
+    "correo").
+    """
+    mensajes = bandeja.reclamar(limite)
+    if not mensajes:
+        return 0, 0
+
+    contadores = {"enviados": 0, "fallidos": 0}
+
+    def resultado(mensaje, error):
+        if error is None:
+            bandeja.marcar_enviado(mensaje["id"])
+            contadores["enviados"] += 1
+            log(f"Correo '{mensaje['asunto']}' enviado a: {', '.join(mensaje['destinatarios'])}")
+        else:
+            bandeja.marcar_fallido(mensaje["id"], error)
+            contadores["fallidos"] += 1
+            log(f"No se pudo enviar el correo a {', '.join(mensaje['destinatarios'])}: {error}",
+                level="error")
+
+    inicio = time.monotonic()
+    try:
+        transporte.enviar_tanda(mensajes, resultado)
+    except TransporteNoDisponible as e:
+        bandeja.liberar([mensaje["id"] for mensaje in mensajes])
+        log(f"{e} Hay {bandeja.cantidad_pendientes()} correo(s) esperando en la bandeja de salida.",
+            level="warning")
+        return 0, 0
+    except Exception as e:
+        # Falló la sesión completa (Outlook no abre, servidor caído): se
+        # reprograman los que no llegaron a procesarse
+        procesados = contadores["enviados"] + contadores["fallidos"]
+        for mensaje in mensajes[procesados:]:
+            bandeja.marcar_fallido(mensaje["id"], e)
+        contadores["fallidos"] += len(mensajes) - procesados
+        log(f"Error del transporte de correo ({transporte.nombre}): {e}", level="error")
+
+    segundos = time.monotonic() - inicio
+    registrar("correo", log=log, transporte=transporte.nombre, mensajes=len(mensajes),
+              enviados=contadores["enviados"], fallidos=contadores["fallidos"],
+              resultado="ok" if not contadores["fallidos"] else "error",
+              segundos=round(segundos, 3),
+              fases={"envio": {"segundos": round(segundos, 4),
+                               "bytes": sum(len(m["cuerpo"].encode("utf-8")) for m in mensajes)}})
+    return contadores["enviados"], contadores["fallidos"]
+
+
+_bandejas = {}
+_lock_bandejas = threading.Lock()
+
+
+def obtener_bandeja(ruta_db=DB_BANDEJA):
+    """
+    Retorna la BandejaSalida de 'ruta_db' (una por archivo y proceso).
+    """
+    with _lock_bandejas:
+        if ruta_db not in _bandejas:
+            _bandejas[ruta_db] = BandejaSalida(ruta_db)
+        return _bandejas[ruta_db]
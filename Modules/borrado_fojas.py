@@ -0,0 +1,376 @@
+# Modules/borrado_fojas.py
+
+import io
+import os
+import shutil
+import tempfile
+
+from PyPDF2.generic import (
+    ArrayObject, DictionaryObject, IndirectObject, NameObject, NumberObject
+)
+
+from Modules.copia_paginas import tamanio_tabla_xref
+from Modules.lectura_local import contenido_del_documento
+from Modules.motor_pdf import obtener_motor
+from Modules.sondeo_pdf import leer_startxref, sondear_pdf
+
+
+class IncrementalNoSoportado(Exception):
+    """
+    El PDF no admite una actualización incremental (encriptado, xref
+    ilegible, árbol de páginas irregular, etc.). Se debe reescribir completo.
+    """
+
+
+def eliminar_paginas(pdf_path, reader, paginas, compactar=False, log=None):
+    """
+    Elimina del PDF las fojas indicadas en 'paginas' (RangosFojas, base 1)
+    usando el documento ya parseado en 'reader'. Todos los rangos se
+    aplican en una sola lectura y una sola escritura.
+
+    Por defecto agrega una actualización incremental al final del archivo
+    (nuevo árbol de páginas + nueva sección xref), de modo que lo que se
+    escribe en el share depende del tamaño del cambio y no del documento.
+    Con compactar=True se reescribe el archivo completo, lo que además
+    descarta físicamente el contenido de las fojas eliminadas, y se
+    compacta: los objetos repetidos se guardan una sola vez y los chicos se
+    agrupan en object streams comprimidos. Los tamaños antes/después van
+    al log.
+
+    Retorna un dict con páginas antes/después, bytes escritos y modo usado.
+    """
+    total_pages = len(reader.pages)
+    existentes = paginas.recortar(total_pages)
+    if log and existentes != paginas:
+        log(f"Se ignoran las fojas que no existen (el PDF tiene {total_pages} páginas).",
+            level="warning")
+    paginas = existentes
+    if not paginas:
+        raise ValueError("Ninguna de las fojas indicadas existe en el documento.")
+    if len(paginas) >= total_pages:
+        raise ValueError("No se pueden eliminar todas las fojas del documento.")
+
+    modo = "completo"
+    if not compactar:
+        try:
+            bytes_escritos = _agregar_actualizacion_incremental(pdf_path, reader, paginas)
+            modo = "incremental"
+        except IncrementalNoSoportado as e:
+            if log:
+                log(f"Actualización incremental no disponible ({e}). Se reescribe el PDF completo.",
+                    level="warning")
+
+    compactacion = {}
+    if modo == "completo":
+        tamanio_antes = len(contenido_del_documento(reader))
+        bytes_escritos = _reescribir_completo(pdf_path, reader, paginas, total_pages - len(paginas),
+                                              compactar, compactacion)
+        if compactar and log:
+            log(describir_compactacion(tamanio_antes, bytes_escritos, compactacion))
+
+    return {
+        "paginas_antes": total_pages,
+        "paginas_despues": total_pages - len(paginas),
+        "bytes_escritos": bytes_escritos,
+        "modo": modo,
+        "compactacion": compactacion,
+    }
+
+
+def describir_compactacion(tamanio_antes, tamanio_despues, metricas):
+    """
+    Renglón del log con el tamaño antes/después de compactar y, si el motor
+    los informa, los objetos unificados, agrupados y descartados.
+    """
+    variacion = (tamanio_despues - tamanio_antes) / tamanio_antes * 100 if tamanio_antes else 0
+    texto = (f"PDF compactado: {tamanio_antes / (1024 * 1024):.2f} MB -> "
+             f"{tamanio_despues / (1024 * 1024):.2f} MB ({variacion:+.1f}%).")
+    if "objetos_unificados" in metricas:
+        texto += (f" Objetos: {metricas['objetos_unificados']} duplicados unificados, "
+                  f"{metricas['objetos_descartados']} sin uso descartados, "
+                  f"{metricas['objetos_agrupados']} agrupados en {metricas['object_streams']} object streams.")
+    elif "objetos_escritos" in metricas:
+        texto += f" Objetos: {metricas['objetos_originales']} -> {metricas['objetos_escritos']}."
+    return texto
+
+
+def _reescribir_completo(pdf_path, reader, paginas, paginas_esperadas, compactar=False, metricas=None):
+    """
+    Copia las páginas conservadas con el motor PDF por defecto (ver
+    motor_pdf), compactando si se pide, y reemplaza el archivo con
+    reemplazar_atomico. El documento se cierra apenas se escribe el
+    temporal, porque el motor puede tener abierto el original.
+    """
+    def escribir(f):
+        documento.guardar(f, compactar=compactar, metricas=metricas)
+        documento.cerrar()
+
+    with obtener_motor().abrir(reader, ruta=pdf_path) as documento:
+        documento.eliminar_paginas(paginas)
+        return reemplazar_atomico(
+            pdf_path,
+            escribir,
+            paginas_esperadas=paginas_esperadas,
+            tamanio_esperado=len(contenido_del_documento(reader))
+        )
+
+
+def reemplazar_atomico(pdf_path, escribir, paginas_esperadas=None, tamanio_esperado=None):
+    """
+    Reemplaza 'pdf_path' sin escribir nunca sobre el original:
+      1. escribir(f) genera la versión nueva en un temporal de la misma
+         carpeta (mismo volumen, así el rename es atómico),
+      2. se baja a disco (flush + fsync),
+      3. si se indica 'paginas_esperadas', se verifica la cantidad de
+         páginas del temporal,
+      4. se reemplaza el original con os.replace.
+    Quien lea el PDF ve la versión anterior o la nueva, nunca una a medias.
+    Si algo falla se borra el temporal y el original queda intacto.
+
+    Con 'tamanio_esperado' se aborta si el original cambió de tamaño desde
+    que se leyó (otro usuario lo modificó en el medio).
+    Retorna la cantidad de bytes escritos.
+    """
+    carpeta = os.path.dirname(os.path.abspath(pdf_path))
+    fd, ruta_temp = tempfile.mkstemp(
+        dir=carpeta, prefix=f"~{os.path.basename(pdf_path)}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            escribir(f)
+            f.flush()
+            os.fsync(f.fileno())
+            bytes_escritos = f.tell()
+
+        if paginas_esperadas is not None:
+            paginas = sondear_pdf(ruta_temp)["paginas"]
+            if paginas != paginas_esperadas:
+                raise RuntimeError(
+                    f"El PDF generado tiene {paginas} páginas y se esperaban {paginas_esperadas}."
+                )
+
+        if os.path.exists(pdf_path):
+            if tamanio_esperado is not None and os.path.getsize(pdf_path) != tamanio_esperado:
+                raise RuntimeError("El PDF cambió en disco desde que se leyó. Vuelva a buscarlo.")
+            # El temporal se crea con permisos restringidos: se copian los del original
+            shutil.copymode(pdf_path, ruta_temp)
+
+        os.replace(ruta_temp, pdf_path)
+    except BaseException:
+        try:
+            os.remove(ruta_temp)
+        except OSError:
+            pass
+        raise
+
+    return bytes_escritos
+
+
+def _nuevo_arbol_paginas(reader, paginas):
+    """
+    Recorre el árbol de páginas y arma las versiones nuevas de los nodos
+    /Pages afectados, conservando la estructura original (así los /Parent
+    y los atributos heredables de cada página siguen siendo válidos).
+
+    Retorna un dict {(idnum, generacion): DictionaryObject} sólo con los
+    nodos que cambiaron.
+    """
+    raiz = reader.trailer["/Root"].get_object()
+    ref_pages = raiz.raw_get("/Pages")
+    if not isinstance(ref_pages, IndirectObject):
+        raise IncrementalNoSoportado("el catálogo no referencia /Pages de forma indirecta")
+
+    modificados = {}
+    visitados = set()
+    contador = [0]
+
+    def recorrer(ref):
+        clave = (ref.idnum, ref.generation)
+        if clave in visitados:
+            raise IncrementalNoSoportado("el árbol de páginas tiene ciclos")
+        visitados.add(clave)
+
+        nodo = ref.get_object()
+        kids = nodo["/Kids"]
+        nuevos_kids = ArrayObject()
+        cantidad = 0
+        cambio = False
+
+        for kid_ref in kids:
+            if not isinstance(kid_ref, IndirectObject):
+                raise IncrementalNoSoportado("el árbol de páginas tiene nodos directos")
+            kid = kid_ref.get_object()
+            if kid.get("/Type") == "/Pages" or "/Kids" in kid:
+                cantidad_kid, cambio_kid = recorrer(kid_ref)
+                cambio = cambio or cambio_kid
+                if cantidad_kid == 0:
+                    cambio = True
+                    continue
+                cantidad += cantidad_kid
+                nuevos_kids.append(kid_ref)
+            else:
+                contador[0] += 1
+                if contador[0] in paginas:
+                    cambio = True
+                    continue
+                cantidad += 1
+                nuevos_kids.append(kid_ref)
+
+        # Un nodo que queda vacío se quita de su padre, no hace falta reescribirlo
+        if cambio and cantidad > 0:
+            nuevo = DictionaryObject()
+            for k, v in nodo.items():
+                nuevo[NameObject(k)] = v
+            nuevo[NameObject("/Kids")] = nuevos_kids
+            nuevo[NameObject("/Count")] = NumberObject(cantidad)
+            modificados[clave] = nuevo
+
+        return cantidad, cambio
+
+    recorrer(ref_pages)
+
+    if contador[0] != len(reader.pages):
+        raise IncrementalNoSoportado("el recorrido del árbol no coincide con la cantidad de páginas")
+
+    return modificados
+
+
+def _agregar_actualizacion_incremental(pdf_path, reader, paginas):
+    """
+    Agrega al final del archivo los nodos /Pages modificados y una sección
+    xref nueva que apunta a la anterior mediante /Prev.
+
+    A diferencia de la reescritura completa, acá no hace falta el temporal
+    más rename de reemplazar_atomico: los bytes originales no se tocan,
+    sólo se agregan unos KB al final, así que cualquier falla (escritura
+    a medias o un resultado con otra cantidad de páginas) se deshace
+    exactamente truncando al tamaño original (ver _anexar).
+    Retorna la cantidad de bytes agregados.
+    """
+    if reader.is_encrypted:
+        raise IncrementalNoSoportado("el documento está encriptado")
+
+    # Sin copiar: en los expedientes grandes es el mmap de la copia local
+    datos = contenido_del_documento(reader)
+    tamanio_original = len(datos)
+
+    xref_anterior = leer_startxref(bytes(datos[-2048:]))
+    if xref_anterior is None or xref_anterior >= tamanio_original:
+        raise IncrementalNoSoportado("no se encontró un startxref válido")
+    usa_xref_stream = bytes(datos[xref_anterior:xref_anterior + 4]) != b"xref"
+
+    modificados = _nuevo_arbol_paginas(reader, paginas)
+
+    buffer = io.BytesIO()
+    buffer.write(b"\n" if bytes(datos[-1:]) not in (b"\n", b"\r") else b"")
+
+    offsets = {}
+    for (idnum, generacion), objeto in sorted(modificados.items()):
+        offsets[idnum] = (tamanio_original + buffer.tell(), generacion)
+        buffer.write(f"{idnum} {generacion} obj\n".encode("ascii"))
+        objeto.write_to_stream(buffer, None)
+        buffer.write(b"\nendobj\n")
+
+    trailer_anterior = reader.trailer
+    tamanio_xref = tamanio_tabla_xref(reader)
+
+    trailer = DictionaryObject()
+    for clave in ("/Root", "/Info", "/ID"):
+        if clave in trailer_anterior:
+            trailer[NameObject(clave)] = trailer_anterior.raw_get(clave)
+    trailer[NameObject("/Prev")] = NumberObject(xref_anterior)
+
+    inicio_xref = tamanio_original + buffer.tell()
+    if usa_xref_stream:
+        _escribir_xref_stream(buffer, offsets, trailer, tamanio_xref, inicio_xref)
+    else:
+        _escribir_xref_tabla(buffer, offsets, trailer, tamanio_xref)
+    buffer.write(f"startxref\n{inicio_xref}\n%%EOF\n".encode("ascii"))
+
+    _anexar(pdf_path, buffer.getvalue(), tamanio_original,
+            paginas_esperadas=len(reader.pages) - len(paginas))
+    return buffer.tell()
+
+
+def _subsecciones(numeros):
+    """
+    Agrupa números de objeto ordenados en tramos consecutivos.
+    """
+    tramos = []
+    for n in sorted(numeros):
+        if tramos and tramos[-1][-1] + 1 == n:
+            tramos[-1].append(n)
+        else:
+            tramos.append([n])
+    return tramos
+
+
+def _escribir_xref_tabla(buffer, offsets, trailer, tamanio_xref):
+    buffer.write(b"xref\n")
+    for tramo in _subsecciones(offsets):
+        buffer.write(f"{tramo[0]} {len(tramo)}\n".encode("ascii"))
+        for idnum in tramo:
+            offset, generacion = offsets[idnum]
+            buffer.write(f"{offset:010d} {generacion:05d} n\r\n".encode("ascii"))
+    trailer[NameObject("/Size")] = NumberObject(tamanio_xref)
+    buffer.write(b"trailer\n")
+    trailer.write_to_stream(buffer, None)
+    buffer.write(b"\n")
+
+
+def _escribir_xref_stream(buffer, offsets, trailer, tamanio_xref, inicio_xref):
+    # El propio stream de xref ocupa un número de objeto nuevo
+    idnum_xref = tamanio_xref
+    entradas = dict(offsets)
+    entradas[idnum_xref] = (inicio_xref, 0)
+
+    filas = bytearray()
+    indice = ArrayObject()
+    for tramo in _subsecciones(entradas):
+        indice.append(NumberObject(tramo[0]))
+        indice.append(NumberObject(len(tramo)))
+        for idnum in tramo:
+            offset, generacion = entradas[idnum]
+            filas += bytes([1]) + offset.to_bytes(4, "big") + generacion.to_bytes(2, "big")
+
+    trailer[NameObject("/Type")] = NameObject("/XRef")
+    trailer[NameObject("/Size")] = NumberObject(idnum_xref + 1)
+    trailer[NameObject("/Index")] = indice
+    trailer[NameObject("/W")] = ArrayObject([NumberObject(1), NumberObject(4), NumberObject(2)])
+    trailer[NameObject("/Length")] = NumberObject(len(filas))
+
+    buffer.write(f"{idnum_xref} 0 obj\n".encode("ascii"))
+    trailer.write_to_stream(buffer, None)
+    buffer.write(b"\nstream\n")
+    buffer.write(bytes(filas))
+    buffer.write(b"\nendstream\nendobj\n")
+
+
+def _anexar(pdf_path, datos_nuevos, tamanio_esperado, paginas_esperadas=None):
+    """
+    Agrega 'datos_nuevos' al final de 'pdf_path'. Si el archivo cambió desde
+    que se leyó se aborta. Después de bajarlo a disco, si se indica
+    'paginas_esperadas', se sondea el resultado (como reemplazar_atomico
+    con el temporal). Si la escritura falla a mitad de camino o el PDF no
+    queda con esas páginas, se trunca al tamaño original: el archivo vuelve
+    a ser byte a byte el que se leyó.
+    """
+    with open(pdf_path, "r+b") as f:
+        f.seek(0, os.SEEK_END)
+        if f.tell() != tamanio_esperado:
+            raise RuntimeError("El PDF cambió en disco desde que se leyó. Vuelva a buscarlo.")
+        try:
+            f.write(datos_nuevos)
+            f.flush()
+            os.fsync(f.fileno())
+            if paginas_esperadas is not None:
+                paginas = sondear_pdf(pdf_path)["paginas"]
+                if paginas != paginas_esperadas:
+                    raise RuntimeError(
+                        f"El PDF actualizado tiene {paginas} páginas y se esperaban {paginas_esperadas}."
+                    )
+        except BaseException:
+            f.truncate(tamanio_esperado)
+            f.flush()
+            os.fsync(f.fileno())
+            raise
@@ -0,0 +1,129 @@
+# Modules/cache_pdf.py
+
+import os
+import threading
+from collections import OrderedDict
+
+from Modules.lectura_local import describir_lectura, leer_pdf
+
+
+class _EntradaCache:
+    """
+    Documento parseado junto con la firma (mtime, tamaño) del archivo
+    en el momento en que se leyó.
+    """
+    def __init__(self, reader, firma, tamanio):
+        self.reader = reader
+        self.firma = firma
+        self.tamanio = tamanio
+
+
+class CachePDF:
+    """
+    Caché LRU de documentos PDF ya parseados.
+
+    Cada expediente se lee del share una sola vez (ver leer_pdf) y se parsea
+    desde la copia local; buscar, leer portada y borrar fojas comparten el
+    mismo PdfReader.
+    La entrada se invalida sola cuando cambia el mtime o el tamaño del
+    archivo en disco, y se descartan las menos usadas cuando se supera
+    el tope de memoria o de documentos.
+    """
+
+    def __init__(self, max_bytes=256 * 1024 * 1024, max_documentos=8):
+        self.max_bytes = max_bytes
+        self.max_documentos = max_documentos
+        self._entradas = OrderedDict()
+        self._bytes_en_uso = 0
+        self._lock = threading.Lock()
+        self._bloqueos = {}
+
+    @staticmethod
+    def _clave(pdf_path):
+        return os.path.normcase(os.path.abspath(pdf_path))
+
+    @staticmethod
+    def _firma(stat_result):
+        return (stat_result.st_mtime_ns, stat_result.st_size)
+
+    def obtener(self, pdf_path, log=None, metricas=None, verificar_cancelacion=None):
+        """
+        Devuelve un PdfReader para 'pdf_path', reutilizando el de la caché
+        si el archivo no cambió desde la última lectura. Si hay que leerlo,
+        el tiempo de red y el de parseo se informan por 'log'. Si se pasa
+        el dict 'metricas', se completa con las de leer_pdf (o con
+        modo "cache" si no hubo lectura). 'verificar_cancelacion' se pasa a
+        leer_pdf.
+        """
+        clave = self._clave(pdf_path)
+        firma_actual = self._firma(os.stat(pdf_path))
+
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is not None:
+                if entrada.firma == firma_actual:
+                    self._entradas.move_to_end(clave)
+                    if metricas is not None:
+                        metricas.update(modo="cache", bytes=entrada.tamanio)
+                    return entrada.reader
+                # El archivo cambió en disco: se descarta la versión vieja
+                self._quitar(clave)
+
+        # La lectura se hace fuera del lock para no bloquear otros documentos
+        reader, lectura = leer_pdf(pdf_path, verificar_cancelacion=verificar_cancelacion)
+        firma = (lectura["mtime_ns"], lectura["bytes"])
+        tamanio = lectura["bytes"]
+        if log:
+            log(describir_lectura(pdf_path, lectura))
+        if metricas is not None:
+            metricas.update(lectura)
+
+        # Un documento más grande que el tope no se guarda, sólo se devuelve
+        if tamanio > self.max_bytes:
+            return reader
+
+        with self._lock:
+            if clave in self._entradas:
+                self._quitar(clave)
+            self._entradas[clave] = _EntradaCache(reader, firma, tamanio)
+            self._bytes_en_uso += tamanio
+            self._desalojar()
+
+        return reader
+
+    def bloqueo(self, pdf_path):
+        """
+        Lock propio de 'pdf_path'. PdfReader no es seguro entre hilos, así que
+        quien use el documento desde un hilo de trabajo debe tomarlo.
+        """
+        clave = self._clave(pdf_path)
+        with self._lock:
+            return self._bloqueos.setdefault(clave, threading.RLock())
+
+    def invalidar(self, pdf_path):
+        """
+        Quita 'pdf_path' de la caché (por ejemplo, después de reescribirlo).
+        """
+        with self._lock:
+            self._quitar(self._clave(pdf_path))
+
+    def limpiar(self):
+        """
+        Vacía la caché completa.
+        """
+        with self._lock:
+            self._entradas.clear()
+            self._bytes_en_uso = 0
+
+    def _quitar(self, clave):
+        entrada = self._entradas.pop(clave, None)
+        if entrada is not None:
+            self._bytes_en_uso -= entrada.tamanio
+
+    def _desalojar(self):
+        while self._entradas and (
+            self._bytes_en_uso > self.max_bytes
+            or len(self._entradas) > self.max_documentos
+        ):
+            _, entrada = self._entradas.popitem(last=False)
+            self._bytes_en_uso -= entrada.tamanio
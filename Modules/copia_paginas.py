@@ -0,0 +1,488 @@
+# Modules/copia_paginas.py
+
+import io
+import zlib
+import hashlib
+
+from PyPDF2.generic import (
+    ArrayObject, DictionaryObject, IndirectObject, NameObject, NullObject, NumberObject,
+    StreamObject
+)
+
+# Marca binaria de la segunda línea: indica a las herramientas que el
+# archivo tiene datos binarios (PDF 1.7, 7.5.2)
+MARCA_BINARIA = b"%\xe2\xe3\xcf\xd3\n"
+
+# Al compactar, los objetos que no son streams y ocupan hasta este tamaño
+# (diccionarios de página, fuentes, descriptores...) se agrupan en object
+# streams comprimidos de a OBJETOS_POR_STREAM
+TAMANIO_MAX_AGRUPADO = 4096
+OBJETOS_POR_STREAM = 100
+
+
+def tamanio_tabla_xref(reader):
+    """
+    Mayor número de objeto usado + 1. Con xref streams PyPDF2 no copia /Size
+    al trailer, por lo que también se miran las tablas xref ya leídas.
+    """
+    numeros = [int(reader.trailer.get("/Size", 0)) - 1]
+    for por_generacion in reader.xref.values():
+        numeros.extend(por_generacion)
+    numeros.extend(reader.xref_objStm)
+    return max(numeros) + 1
+
+
+def copiar_paginas(reader, indices, destino, compactar=False, metricas=None):
+    """
+    Escribe en 'destino' (archivo binario abierto) un PDF nuevo con las
+    páginas 'indices' (base 0) de 'reader', en ese orden, sin armar el
+    documento en memoria como hace PdfWriter:
+
+      - por cada página se escriben primero los objetos que usa (contenido,
+        imágenes, fuentes) que todavía no se escribieron, y después la página,
+      - luego se sacan esos objetos de la caché del reader, así la memoria
+        queda acotada por la página más grande y no por el archivo,
+      - al final van el árbol de páginas, el catálogo y la xref.
+
+    Los objetos conservan su número original, así las referencias entre
+    ellos se copian tal cual; los números que quedan sin usar (fojas
+    eliminadas, objetos sin uso) van a la xref como libres. Una referencia
+    a una página eliminada (p.ej. un vínculo) queda apuntando a un objeto
+    libre, que los lectores toman como null.
+
+    Con compactar=True además:
+      - los objetos idénticos (mismo contenido y mismas referencias, p.ej.
+        el mismo sello o fuente repetido en cada página) se escriben una
+        sola vez y las referencias se cambian al que quedó,
+      - los objetos chicos se agrupan en object streams comprimidos, con
+        una xref stream (PDF 1.5).
+
+    Si se pasa 'metricas' (dict), se completa con la cantidad de objetos
+    originales, escritos, unificados, agrupados y descartados.
+    Retorna la cantidad de bytes escritos.
+    """
+    salida = _SalidaCompacta(destino, reader) if compactar else _Salida(destino, reader)
+    num_catalogo, num_arbol = salida.reservar(), salida.reservar()
+    ref_arbol = IndirectObject(num_arbol, 0, None)
+
+    # Catálogo y nodos del árbol de páginas viejo: no se siguen, porque
+    # desde ahí se llegaría a las fojas eliminadas
+    excluidos = _objetos_del_arbol(reader)
+    copiador = _Copiador(reader, salida, excluidos, unificar=compactar)
+
+    kids = ArrayObject()
+    for idx in indices:
+        pagina = reader.pages[idx]
+        ref = pagina.indirect_reference
+        if ref is None or salida.escrito(ref.idnum):
+            # Página directa o repetida en el árbol: va con un número nuevo
+            idnum, generacion = salida.reservar(), 0
+        else:
+            idnum, generacion = ref.idnum, ref.generation
+
+        copia = DictionaryObject()
+        for clave, valor in pagina.items():
+            if clave != "/Parent":
+                copia[NameObject(clave)] = valor
+        copia = copiador.copiar(copia)
+        copia[NameObject("/Parent")] = ref_arbol
+        salida.escribir(idnum, generacion, copia)
+        kids.append(IndirectObject(idnum, generacion, None))
+        copiador.liberar()
+
+    trailer = DictionaryObject()
+    info = reader.trailer.raw_get("/Info") if "/Info" in reader.trailer else None
+    if isinstance(info, IndirectObject):
+        info = copiador.copiar(info)
+        if salida.escrito(info.idnum):
+            trailer[NameObject("/Info")] = info
+    if "/ID" in reader.trailer:
+        trailer[NameObject("/ID")] = reader.trailer["/ID"]
+
+    arbol = DictionaryObject()
+    arbol[NameObject("/Type")] = NameObject("/Pages")
+    arbol[NameObject("/Kids")] = kids
+    arbol[NameObject("/Count")] = NumberObject(len(kids))
+    salida.escribir(num_arbol, 0, arbol)
+
+    catalogo = DictionaryObject()
+    catalogo[NameObject("/Type")] = NameObject("/Catalog")
+    catalogo[NameObject("/Pages")] = ref_arbol
+    salida.escribir(num_catalogo, 0, catalogo)
+
+    trailer[NameObject("/Root")] = IndirectObject(num_catalogo, 0, None)
+    bytes_escritos = salida.cerrar(trailer)
+
+    if metricas is not None:
+        originales = sum(len(numeros) for numeros in reader.xref.values()) + len(reader.xref_objStm)
+        metricas.update({
+            "objetos_originales": originales,
+            "objetos_escritos": salida.objetos_escritos(),
+            "objetos_unificados": copiador.unificados,
+            "bytes_unificados": copiador.bytes_unificados,
+            "objetos_agrupados": getattr(salida, "agrupados", 0),
+            "object_streams": getattr(salida, "object_streams", 0),
+            "objetos_descartados": max(0, originales - copiador.visitados - len(excluidos)),
+        })
+    return bytes_escritos
+
+
+class _Copiador:
+    """
+    Copia a 'salida' los objetos alcanzables desde una página, en
+    post-orden (cada objeto después de los que referencia), así al
+    escribirlo ya se sabe si alguno de ellos se unificó con otro.
+    """
+
+    def __init__(self, reader, salida, excluidos, unificar=False):
+        self.reader = reader
+        self.salida = salida
+        self.excluidos = excluidos
+        self.unificar = unificar
+        # Número original -> referencia con la que quedó escrito
+        self.finales = {}
+        # Huella del contenido -> referencia del primero escrito con ella
+        self.huellas = {}
+        # Objetos que forman parte de un ciclo: otros ya los referencian por
+        # su número, así que no se pueden reemplazar por un duplicado
+        self.ciclicos = set()
+        self.visitados = 0
+        self.unificados = 0
+        self.bytes_unificados = 0
+        self._en_cache = []
+
+    def copiar(self, objeto):
+        """
+        Escribe lo que falte de lo alcanzable desde 'objeto' y retorna
+        'objeto' con las referencias cambiadas a sus números finales.
+        """
+        en_curso = set()
+        referencias = _referencias(objeto)
+        pila = [(ref, None, None) for ref in referencias]
+        while pila:
+            ref, resuelto, hijos = pila.pop()
+            numero = ref.idnum
+            if resuelto is None:
+                if numero in self.finales or numero in self.excluidos:
+                    continue
+                if numero in en_curso:
+                    self.ciclicos.add(numero)
+                    continue
+                resuelto = ref.get_object()
+                if resuelto is None or _categoria(resuelto) == "null":
+                    continue
+                en_curso.add(numero)
+                self._en_cache.append((ref.generation, numero))
+                hijos = _referencias(resuelto)
+                pila.append((ref, resuelto, hijos))
+                pila.extend((hijo, None, None) for hijo in hijos)
+                continue
+
+            # Segunda pasada: ya se escribió todo lo que referencia
+            en_curso.discard(numero)
+            if numero in self.finales:
+                continue
+            self.visitados += 1
+            datos = _serializar(self._con_finales(resuelto, hijos))
+            if self.unificar and numero not in self.ciclicos:
+                huella = hashlib.sha256(datos).digest()
+                if huella in self.huellas:
+                    self.finales[numero] = self.huellas[huella]
+                    self.unificados += 1
+                    self.bytes_unificados += len(datos)
+                    continue
+                self.huellas[huella] = IndirectObject(numero, ref.generation, None)
+            self.salida.escribir_datos(numero, ref.generation, datos, _categoria(resuelto) == "stream")
+            self.finales[numero] = IndirectObject(numero, ref.generation, None)
+
+        return self._con_finales(objeto, referencias)
+
+    def _con_finales(self, objeto, referencias):
+        """
+        'objeto' con las referencias a duplicados cambiadas por el que
+        quedó escrito. Sólo se recorre si alguna de 'referencias' cambia.
+        """
+        for ref in referencias:
+            final = self.finales.get(ref.idnum)
+            if final is not None and final.idnum != ref.idnum:
+                return _reemplazar(objeto, self.finales)
+        return objeto
+
+    def liberar(self):
+        """
+        Saca de la caché del reader los objetos ya copiados.
+        """
+        for clave in self._en_cache:
+            self.reader.resolved_objects.pop(clave, None)
+        self._en_cache = []
+
+
+# Las clases de PyPDF2 son Protocols y cada isinstance() sobre ellas es
+# lento; con miles de objetos por página conviene resolverlo una vez por tipo
+_CATEGORIAS = {}
+
+
+def _categoria(objeto):
+    tipo = type(objeto)
+    categoria = _CATEGORIAS.get(tipo)
+    if categoria is None:
+        if isinstance(objeto, IndirectObject):
+            categoria = "referencia"
+        elif isinstance(objeto, StreamObject):
+            categoria = "stream"
+        elif isinstance(objeto, DictionaryObject):
+            categoria = "diccionario"
+        elif isinstance(objeto, ArrayObject):
+            categoria = "array"
+        elif isinstance(objeto, NullObject):
+            categoria = "null"
+        else:
+            categoria = "otro"
+        _CATEGORIAS[tipo] = categoria
+    return categoria
+
+
+def _referencias(objeto):
+    """
+    Referencias (IndirectObject) contenidas en 'objeto', sin seguirlas.
+    """
+    referencias = []
+    pendientes = [objeto]
+    while pendientes:
+        actual = pendientes.pop()
+        categoria = _categoria(actual)
+        if categoria == "referencia":
+            referencias.append(actual)
+        elif categoria in ("diccionario", "stream"):
+            pendientes.extend(actual.values())
+        elif categoria == "array":
+            pendientes.extend(actual)
+    return referencias
+
+
+def _reemplazar(objeto, finales):
+    """
+    'objeto' con cada referencia cambiada por la de 'finales'. Si ninguna
+    cambia se retorna el mismo objeto, sin copiarlo.
+    """
+    categoria = _categoria(objeto)
+    if categoria == "referencia":
+        final = finales.get(objeto.idnum)
+        if final is None or (final.idnum, final.generation) == (objeto.idnum, objeto.generation):
+            return objeto
+        return final
+    if categoria in ("diccionario", "stream"):
+        valores = [(clave, valor, _reemplazar(valor, finales)) for clave, valor in objeto.items()]
+        if all(nuevo is valor for _, valor, nuevo in valores):
+            return objeto
+        copia = objeto.__class__()
+        if categoria == "stream":
+            copia._data = objeto._data
+        for clave, _, nuevo in valores:
+            copia[clave] = nuevo
+        return copia
+    if categoria == "array":
+        valores = [_reemplazar(valor, finales) for valor in objeto]
+        if all(nuevo is valor for nuevo, valor in zip(valores, objeto)):
+            return objeto
+        return ArrayObject(valores)
+    return objeto
+
+
+def _serializar(objeto):
+    buffer = io.BytesIO()
+    objeto.write_to_stream(buffer, None)
+    return buffer.getvalue()
+
+
+def _objetos_del_arbol(reader):
+    """
+    Números de objeto del catálogo y de todos los nodos y páginas del árbol.
+    """
+    numeros = set()
+    ref_raiz = reader.trailer.raw_get("/Root")
+    if isinstance(ref_raiz, IndirectObject):
+        numeros.add(ref_raiz.idnum)
+    pendientes = [reader.trailer["/Root"].get_object().raw_get("/Pages")]
+    while pendientes:
+        ref = pendientes.pop()
+        if not isinstance(ref, IndirectObject) or ref.idnum in numeros:
+            continue
+        numeros.add(ref.idnum)
+        nodo = ref.get_object()
+        if "/Kids" in nodo:
+            pendientes.extend(nodo["/Kids"])
+    return numeros
+
+
+class _Salida:
+    """
+    Escribe objetos numerados en 'destino' y al final una tabla xref
+    clásica. Los números nuevos se toman a partir del mayor del original.
+    """
+
+    version_minima = None
+
+    def __init__(self, destino, reader):
+        self.destino = destino
+        self.inicio = destino.tell()
+        self.siguiente = tamanio_tabla_xref(reader)
+        # Número -> (offset, generación)
+        self.offsets = {}
+
+        cabecera = reader.pdf_header
+        if not cabecera.startswith("%PDF-"):
+            cabecera = "%PDF-1.4"
+        if self.version_minima and _version(cabecera) < _version(self.version_minima):
+            cabecera = self.version_minima
+        destino.write(cabecera.encode("ascii") + b"\n" + MARCA_BINARIA)
+
+    def reservar(self):
+        numero = self.siguiente
+        self.siguiente += 1
+        return numero
+
+    def escrito(self, numero):
+        return numero in self.offsets
+
+    def objetos_escritos(self):
+        return len(self.offsets)
+
+    def escribir(self, idnum, generacion, objeto):
+        self.escribir_datos(idnum, generacion, _serializar(objeto), _categoria(objeto) == "stream")
+
+    def escribir_datos(self, idnum, generacion, datos, es_stream):
+        self._escribir_directo(idnum, generacion, datos)
+
+    def _escribir_directo(self, idnum, generacion, datos):
+        self.offsets[idnum] = (self.destino.tell() - self.inicio, generacion)
+        self.destino.write(b"%d %d obj\n" % (idnum, generacion))
+        self.destino.write(datos)
+        self.destino.write(b"\nendobj\n")
+
+    def cerrar(self, trailer):
+        """
+        Escribe la xref y el trailer. Retorna el total de bytes escritos.
+        """
+        _escribir_xref(self.destino, self.offsets, trailer, self.inicio)
+        return self.destino.tell() - self.inicio
+
+
+class _SalidaCompacta(_Salida):
+    """
+    Como _Salida, pero los objetos chicos que no son streams se acumulan
+    y se escriben agrupados en object streams comprimidos. La xref es
+    entonces una xref stream: las entradas de los objetos agrupados
+    indican el object stream y la posición dentro de él.
+    """
+
+    version_minima = "%PDF-1.5"
+
+    def __init__(self, destino, reader):
+        super().__init__(destino, reader)
+        # Número -> (número del object stream, índice)
+        self.agrupados_en = {}
+        self.pendientes = []
+        self.agrupados = 0
+        self.object_streams = 0
+
+    def escrito(self, numero):
+        return numero in self.offsets or numero in self.agrupados_en
+
+    def objetos_escritos(self):
+        return len(self.offsets) + len(self.agrupados_en)
+
+    def escribir_datos(self, idnum, generacion, datos, es_stream):
+        if es_stream or generacion != 0 or len(datos) > TAMANIO_MAX_AGRUPADO:
+            self._escribir_directo(idnum, generacion, datos)
+            return
+        # Se anota ya, así escrito() lo ve aunque el grupo no se haya escrito
+        self.agrupados_en[idnum] = None
+        self.pendientes.append((idnum, datos))
+        if len(self.pendientes) >= OBJETOS_POR_STREAM:
+            self._escribir_grupo()
+
+    def _escribir_grupo(self):
+        numero_stream = self.reservar()
+        cabecera = []
+        cuerpo = io.BytesIO()
+        for indice, (idnum, datos) in enumerate(self.pendientes):
+            cabecera.append(b"%d %d" % (idnum, cuerpo.tell()))
+            cuerpo.write(datos + b"\n")
+            self.agrupados_en[idnum] = (numero_stream, indice)
+        cabecera = b" ".join(cabecera) + b"\n"
+        datos = zlib.compress(cabecera + cuerpo.getvalue(), 6)
+
+        self._escribir_directo(numero_stream, 0, b"<< /Type /ObjStm /N %d /First %d /Filter /FlateDecode "
+                                                 b"/Length %d >>\nstream\n%s\nendstream"
+                               % (len(self.pendientes), len(cabecera), len(datos), datos))
+        self.agrupados += len(self.pendientes)
+        self.object_streams += 1
+        self.pendientes = []
+
+    def cerrar(self, trailer):
+        if self.pendientes:
+            self._escribir_grupo()
+        numero_xref = self.reservar()
+        inicio_xref = self.destino.tell() - self.inicio
+        self.offsets[numero_xref] = (inicio_xref, 0)
+
+        # Tipo 1: (offset, generación); tipo 2: (object stream, índice);
+        # tipo 0: libre (siguiente libre, generación)
+        tamanio = numero_xref + 1
+        libres = [n for n in range(1, tamanio) if not self.escrito(n)]
+        siguiente_libre = dict(zip([0] + libres, libres + [0]))
+        ancho = max(1, (max(offset for offset, _ in self.offsets.values()).bit_length() + 7) // 8)
+        filas = bytearray()
+        for numero in range(tamanio):
+            if numero in self.offsets:
+                tipo, campo2, campo3 = 1, *self.offsets[numero]
+            elif numero in self.agrupados_en:
+                tipo, campo2, campo3 = 2, *self.agrupados_en[numero]
+            else:
+                tipo, campo2, campo3 = 0, siguiente_libre[numero], 65535 if numero == 0 else 1
+            filas += bytes([tipo]) + campo2.to_bytes(ancho, "big") + campo3.to_bytes(2, "big")
+        datos = zlib.compress(bytes(filas), 6)
+
+        trailer[NameObject("/Type")] = NameObject("/XRef")
+        trailer[NameObject("/Size")] = NumberObject(tamanio)
+        trailer[NameObject("/W")] = ArrayObject([NumberObject(1), NumberObject(ancho), NumberObject(2)])
+        trailer[NameObject("/Filter")] = NameObject("/FlateDecode")
+        trailer[NameObject("/Length")] = NumberObject(len(datos))
+        self.destino.write(b"%d 0 obj\n" % numero_xref)
+        trailer.write_to_stream(self.destino, None)
+        self.destino.write(b"\nstream\n%s\nendstream\nendobj\n" % datos)
+        self.destino.write(b"startxref\n%d\n%%%%EOF\n" % inicio_xref)
+        return self.destino.tell() - self.inicio
+
+
+def _version(cabecera):
+    try:
+        return tuple(int(parte) for parte in cabecera[5:].split("."))
+    except ValueError:
+        return (0,)
+
+
+def _escribir_xref(destino, offsets, trailer, inicio):
+    """
+    Tabla xref clásica con todos los números de 0 al mayor usado. Los que
+    no se escribieron forman la lista de objetos libres.
+    """
+    inicio_xref = destino.tell() - inicio
+    tamanio = max(offsets) + 1
+    libres = [numero for numero in range(1, tamanio) if numero not in offsets]
+    siguiente_libre = dict(zip([0] + libres, libres + [0]))
+
+    filas = [b"xref\n0 %d\n" % tamanio]
+    for numero in range(tamanio):
+        if numero in offsets:
+            offset, generacion = offsets[numero]
+            filas.append(b"%010d %05d n\r\n" % (offset, generacion))
+        else:
+            filas.append(b"%010d %05d f\r\n" % (siguiente_libre[numero], 65535 if numero == 0 else 1))
+    destino.write(b"".join(filas))
+
+    trailer[NameObject("/Size")] = NumberObject(tamanio)
+    destino.write(b"trailer\n")
+    trailer.write_to_stream(destino, None)
+    destino.write(b"\nstartxref\n%d\n%%%%EOF\n" % inicio_xref)
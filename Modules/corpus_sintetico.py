@@ -0,0 +1,264 @@
+# Modules/corpus_sintetico.py
+
+import os
+import json
+import zlib
+import random
+
+from Modules.expedientes import construir_ruta_pdf
+
+# Cambiar este número cuando cambie el contenido generado, para que los
+# corpus viejos se regeneren en lugar de compararse con los nuevos
+VERSION_CORPUS = 1
+
+# Cantidades de páginas por defecto de los expedientes de prueba
+TAMANIOS = (1, 10, 100, 1000)
+
+# Tipos de expediente: escaneado (una imagen por página), texto, o mixto
+# (páginas escaneadas intercaladas con páginas de texto)
+TIPOS = ("escaneo", "texto", "mixto")
+
+# Cantidades de páginas de las resoluciones de prueba
+TAMANIOS_RESOLUCION = (1, 3, 10)
+
+# Resolución de las páginas escaneadas (bitonal, A4 aproximado)
+DPI_ESCANEO = 150
+
+# Proporción de renglones escaneados con "tinta": controla cuánto pesa cada página
+PROPORCION_TINTA = 0.3
+
+ANIO_CORPUS = "2025"
+
+_PALABRAS = (
+    "expediente jubilacion beneficio haber aporte afiliado resolucion presidencia "
+    "directorio visto considerando articulo dictamen legajo servicios certificacion "
+    "antiguedad remuneracion liquidacion reajuste movilidad notificacion recurso "
+    "instituto provincia ley decreto anexo fojas tramite solicitud conforme"
+).split()
+
+
+class _EscritorPDF:
+    """
+    Escribe un PDF objeto por objeto directamente en el archivo, así se
+    pueden generar documentos de cientos de MB sin tenerlos en memoria.
+    Los objetos se numeran de antemano con reservar() y se escriben en
+    cualquier orden; la tabla xref va al final.
+    """
+
+    def __init__(self, f):
+        self.f = f
+        self.offsets = {}
+        self.siguiente = 1
+        f.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    def reservar(self):
+        numero = self.siguiente
+        self.siguiente += 1
+        return numero
+
+    def objeto(self, numero, contenido):
+        self.offsets[numero] = self.f.tell()
+        self.f.write(b"%d 0 obj\n" % numero + contenido + b"\nendobj\n")
+
+    def stream(self, numero, diccionario, datos, comprimir=True):
+        if comprimir:
+            datos = zlib.compress(datos, 6)
+            diccionario += b" /Filter /FlateDecode"
+        self.objeto(numero, b"<< %s /Length %d >>\nstream\n" % (diccionario, len(datos)) + datos + b"\nendstream")
+
+    def cerrar(self, raiz):
+        inicio_xref = self.f.tell()
+        self.f.write(b"xref\n0 %d\n0000000000 65535 f \n" % self.siguiente)
+        for numero in range(1, self.siguiente):
+            self.f.write(b"%010d 00000 n \n" % self.offsets[numero])
+        self.f.write(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+                     % (self.siguiente, raiz, inicio_xref))
+
+
+def _texto_pdf(texto):
+    """
+    Cadena literal PDF en WinAnsi (latin-1), con los caracteres especiales escapados.
+    """
+    texto = texto.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+    return b"(" + texto.encode("latin-1", "replace") + b")"
+
+
+def _contenido_texto(lineas, x=50, y=790, interlineado=14, cuerpo=10):
+    partes = [b"BT /F1 %d Tf %d %d Td %d TL" % (cuerpo, x, y, interlineado)]
+    for linea in lineas:
+        partes.append(_texto_pdf(linea) + b" Tj T*")
+    partes.append(b"ET")
+    return b"\n".join(partes)
+
+
+def _lineas_aleatorias(rng, cantidad, ancho=95):
+    lineas = []
+    for _ in range(cantidad):
+        linea = ""
+        while len(linea) < ancho:
+            linea += rng.choice(_PALABRAS) + " "
+        lineas.append(linea.strip())
+    return lineas
+
+
+def _imagen_escaneo(rng, dpi=DPI_ESCANEO):
+    """
+    Imagen bitonal de una hoja A4 escaneada: renglones en blanco y bandas
+    de "tinta" (bytes al azar, que casi no se comprimen, como el ruido de
+    un escaneo real). Retorna (ancho, alto, datos sin comprimir).
+    """
+    ancho = int(8.27 * dpi)
+    alto = int(11.69 * dpi)
+    bytes_fila = (ancho + 7) // 8
+    blanca = b"\xff" * bytes_fila
+    filas = []
+    for fila in range(alto):
+        # Bandas de 20 renglones, como líneas de texto escaneadas
+        en_banda = (fila // 20) % 3 == 0
+        if en_banda and rng.random() < PROPORCION_TINTA * 3:
+            filas.append(rng.randbytes(bytes_fila))
+        else:
+            filas.append(blanca)
+    return ancho, alto, b"".join(filas)
+
+
+def _sello(rng):
+    """
+    Pequeño sello/membrete (64x64, escala de grises). Se repite idéntico en
+    cada página de texto como objeto propio, como pasa con los PDFs armados
+    uniendo documentos sueltos.
+    """
+    return rng.randbytes(64 * 64)
+
+
+def generar_pdf(ruta, paginas, tipo, portada=None, semilla=0, dpi=DPI_ESCANEO):
+    """
+    Genera en 'ruta' un PDF determinístico de 'paginas' páginas del 'tipo'
+    indicado ("escaneo", "texto" o "mixto"). Si se indica 'portada' (lista
+    de renglones), la primera página es una portada de texto con esos datos.
+    La misma semilla produce siempre el mismo archivo, byte a byte.
+    """
+    rng = random.Random(semilla)
+    sello = _sello(random.Random(-1))
+    os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+    with open(ruta, "wb") as f:
+        pdf = _EscritorPDF(f)
+        catalogo = pdf.reservar()
+        arbol = pdf.reservar()
+        fuente = pdf.reservar()
+        pdf.objeto(fuente, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+
+        hojas = []
+        for indice in range(paginas):
+            if indice == 0 and portada is not None:
+                clase = "portada"
+            elif tipo == "mixto":
+                clase = "texto" if indice % 2 else "escaneo"
+            else:
+                clase = tipo
+
+            hoja = pdf.reservar()
+            contenido = pdf.reservar()
+            recursos = b"/Font << /F1 %d 0 R >>" % fuente
+
+            if clase == "escaneo":
+                imagen = pdf.reservar()
+                ancho, alto, datos = _imagen_escaneo(rng, dpi)
+                pdf.stream(imagen, b"/Type /XObject /Subtype /Image /Width %d /Height %d "
+                                   b"/ColorSpace /DeviceGray /BitsPerComponent 1" % (ancho, alto), datos)
+                recursos += b" /XObject << /Im1 %d 0 R >>" % imagen
+                operaciones = b"q 595 0 0 842 0 0 cm /Im1 Do Q"
+            else:
+                imagen = pdf.reservar()
+                pdf.stream(imagen, b"/Type /XObject /Subtype /Image /Width 64 /Height 64 "
+                                   b"/ColorSpace /DeviceGray /BitsPerComponent 8", sello)
+                recursos += b" /XObject << /Sello %d 0 R >>" % imagen
+                lineas = portada if clase == "portada" else _lineas_aleatorias(rng, 50)
+                operaciones = b"q 40 0 0 40 520 790 cm /Sello Do Q\n" + _contenido_texto(lineas)
+
+            pdf.stream(contenido, b"", operaciones)
+            pdf.objeto(hoja, b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 595 842] "
+                             b"/Resources << %s >> /Contents %d 0 R >>" % (arbol, recursos, contenido))
+            hojas.append(hoja)
+
+        hijos = b" ".join(b"%d 0 R" % hoja for hoja in hojas)
+        pdf.objeto(arbol, b"<< /Type /Pages /Kids [%s] /Count %d >>" % (hijos, len(hojas)))
+        pdf.objeto(catalogo, b"<< /Type /Catalog /Pages %d 0 R >>" % arbol)
+        pdf.cerrar(catalogo)
+
+
+def casos_corpus(raiz, tamanios=TAMANIOS, tipos=TIPOS, tamanios_resolucion=TAMANIOS_RESOLUCION):
+    """
+    Lista de casos del corpus (sin generarlos): un expediente por tipo y
+    cantidad de páginas, con la misma estructura de carpetas que el share
+    (ver construir_ruta_pdf), y resoluciones de texto con nombre
+    letra-actuacion-ejercicio.pdf como las de proceso_de_resoluciones.py.
+    El número de cada PDF depende sólo de su tipo y páginas, así un caso
+    tiene siempre la misma ruta y contenido aunque se pida un subconjunto.
+    """
+    casos = []
+    for tipo in tipos:
+        for paginas in tamanios:
+            numero = (TIPOS.index(tipo) + 1) * 10000 + paginas
+            ruta, subcarpeta = construir_ruta_pdf(numero, ANIO_CORPUS, os.path.join(raiz, "expedientes"))
+            casos.append({
+                "caso": f"expediente-{tipo}-{paginas:04d}",
+                "clase": "expediente",
+                "tipo": tipo,
+                "paginas": paginas,
+                "ruta": ruta,
+                "subcarpeta": subcarpeta,
+                "semilla": numero,
+            })
+    for paginas in tamanios_resolucion:
+        nombre = f"1-{paginas:06d}-{ANIO_CORPUS}"
+        casos.append({
+            "caso": f"resolucion-texto-{paginas:04d}",
+            "clase": "resolucion",
+            "tipo": "texto",
+            "paginas": paginas,
+            "ruta": os.path.join(raiz, "resoluciones", f"{nombre}.pdf"),
+            "subcarpeta": nombre,
+            "semilla": 100000 + paginas,
+        })
+    return casos
+
+
+def _portada(caso):
+    if caso["clase"] != "expediente":
+        return [f"RESOLUCIÓN DE PRESIDENCIA N° {caso['subcarpeta']}", "VISTO el expediente de referencia;"]
+    return [
+        f"Nro: {caso['subcarpeta']}",
+        "Iniciado: 02/01/2025",
+        f"Extracto: AFILIADO {caso['semilla']:06d} S/ JUBILACIÓN ORDINARIA",
+    ]
+
+
+def generar_corpus(raiz, tamanios=TAMANIOS, tipos=TIPOS, tamanios_resolucion=TAMANIOS_RESOLUCION,
+                   dpi=DPI_ESCANEO, regenerar=False, log=print):
+    """
+    Genera (o reutiliza) el corpus en 'raiz' y retorna sus casos con el
+    tamaño de cada archivo. Un manifiesto (corpus.json) guarda la versión
+    del generador, los DPI y el tamaño de cada PDF generado: un PDF se
+    reutiliza sólo si coincide con lo anotado.
+    """
+    ruta_manifiesto = os.path.join(raiz, "corpus.json")
+    manifiesto = {}
+    if not regenerar and os.path.exists(ruta_manifiesto):
+        with open(ruta_manifiesto, "r", encoding="utf-8") as f:
+            manifiesto = json.load(f)
+    if manifiesto.get("version") != VERSION_CORPUS or manifiesto.get("dpi") != dpi:
+        manifiesto = {"version": VERSION_CORPUS, "dpi": dpi, "archivos": {}}
+
+    casos = casos_corpus(raiz, tamanios, tipos, tamanios_resolucion)
+    for caso in casos:
+        anotado = manifiesto["archivos"].get(caso["caso"])
+        if not (anotado and os.path.exists(caso["ruta"]) and os.path.getsize(caso["ruta"]) == anotado):
+            log(f"Generando {caso['caso']}...")
+            generar_pdf(caso["ruta"], caso["paginas"], caso["tipo"], _portada(caso), caso["semilla"], dpi)
+        caso["tamanio"] = manifiesto["archivos"][caso["caso"]] = os.path.getsize(caso["ruta"])
+
+    os.makedirs(raiz, exist_ok=True)
+    with open(ruta_manifiesto, "w", encoding="utf-8") as f:
+        json.dump(manifiesto, f, ensure_ascii=False, indent=2)
+    return casos
@@ -0,0 +1,135 @@
+# Modules/correo_confirmacion.py
+
+import os
+import time
+import getpass
+from datetime import datetime
+
+from Modules.bandeja_salida import obtener_bandeja
+
+DOMINIO = "insssep.gov.ar"
+
+# Por defecto se notifica a estos usuarios (excepto al que esté usando la PC)
+DESTINATARIOS_POR_DEFECTO = [f"wbenitez@{DOMINIO}", f"abouvier@{DOMINIO}"]
+
+
+def correo_de(usuario):
+    """
+    Arma la dirección institucional de 'usuario' (vacía si no hay usuario).
+    """
+    usuario = (usuario or "").strip()
+    return f"{usuario}@{DOMINIO}" if usuario else ""
+
+
+def resolver_destinatarios(destinatario):
+    """
+    - Se detecta el username local.
+    - Por defecto se va a enviar a wbenitez y abouvier,
+      excepto al usuario que coincida con el username local.
+    - Además, se incluye el 'destinatario' (campo 'Solicitante') si no está vacío.
+    """
+    username_local = getpass.getuser().lower()  # p.ej. "wbenitez" o "abouvier"
+    correo_local = correo_de(username_local)
+
+    destinatarios = [d for d in DESTINATARIOS_POR_DEFECTO if d != correo_local]
+
+    if destinatario and destinatario not in destinatarios:
+        destinatarios.append(destinatario)
+
+    return destinatarios
+
+
+ASUNTO_CONFIRMACION = "Confirmación de Borrado de Fojas"
+
+# Modo resumen: con una ventana mayor a 0, los borrados se acumulan por
+# destinatario y cada uno recibe un solo correo por ventana (en minutos)
+VENTANA_RESUMEN_MINUTOS = int(os.environ.get("BORRADO_FOJAS_RESUMEN_MINUTOS", "0"))
+
+
+def armar_confirmacion(pdf_path, fojas):
+    """
+    Cuerpo del correo que confirma el borrado de 'fojas' en 'pdf_path'.
+    """
+    expediente = os.path.basename(os.path.dirname(pdf_path))  # Extrae la carpeta (E-000000-YYYY)
+    return (
+        f"Estimado/a,\n\n"
+        f"Se han borrado las fojas {fojas} del expediente:\n"
+        f"{expediente}\n\n"
+        f"Estado: REALIZADO.\n\n"
+        f"Saludos,\n"
+        f"Equipo de Automatización"
+    )
+
+
+def armar_resumen(novedades):
+    """
+    Asunto y cuerpo del correo que resume varios borrados. Con un único
+    borrado se usa el correo de confirmación de siempre.
+    """
+    if len(novedades) == 1:
+        return ASUNTO_CONFIRMACION, armar_confirmacion(novedades[0]["pdf_path"], novedades[0]["fojas"])
+
+    lineas = []
+    for novedad in novedades:
+        hora = datetime.fromtimestamp(novedad["momento"]).strftime("%d/%m %H:%M")
+        lineas.append(f"  - {novedad['expediente']}: fojas {novedad['fojas']} ({hora})")
+    cuerpo = (
+        f"Estimado/a,\n\n"
+        f"Se realizaron los siguientes borrados de fojas:\n"
+        + "\n".join(lineas) +
+        f"\n\nEstado: REALIZADO.\n\n"
+        f"Saludos,\n"
+        f"Equipo de Automatización"
+    )
+    return f"Resumen de Borrado de Fojas ({len(novedades)} borrados)", cuerpo
+
+
+def encolar_correo_confirmacion(destinatario, pdf_path, fojas, log, bandeja=None, resumir=None,
+                                grupo=None):
+    """
+    Deja en la bandeja de salida el aviso del borrado. Es sólo una escritura
+    local: el envío real lo hace despachar_pendientes, así un Outlook lento
+    o ausente no demora el borrado.
+
+    Con resumir=True (por defecto, si VENTANA_RESUMEN_MINUTOS > 0) el
+    borrado se acumula como novedad de cada destinatario y sale en el
+    resumen que arma consolidar_resumenes ('grupo' se guarda con la
+    novedad, ver BandejaSalida.agregar_novedad). Retorna False si no hay
+    destinatarios.
+    """
+    destinatarios = resolver_destinatarios(destinatario)
+
+    # Si al final no hay nadie en la lista, no encolamos nada
+    if not destinatarios:
+        log("No hay destinatarios a quien enviar el correo.", level="warning")
+        return False
+
+    bandeja = bandeja or obtener_bandeja()
+    if resumir is None:
+        resumir = VENTANA_RESUMEN_MINUTOS > 0
+
+    if resumir:
+        bandeja.agregar_novedad(destinatarios, {
+            "pdf_path": pdf_path,
+            "expediente": os.path.basename(os.path.dirname(pdf_path)),
+            "fojas": str(fojas),
+            "momento": time.time(),
+        }, grupo=grupo)
+        log(f"Borrado agregado al próximo resumen para: {', '.join(destinatarios)}")
+    else:
+        bandeja.encolar(destinatarios, ASUNTO_CONFIRMACION, armar_confirmacion(pdf_path, fojas))
+        log(f"Correo de confirmación en la bandeja de salida para: {', '.join(destinatarios)}")
+    return True
+
+
+def consolidar_resumenes(bandeja=None, resumen_minutos=None, grupo=None):
+    """
+    Encola un correo por destinatario con los borrados acumulados cuya
+    ventana de resumen ya se cumplió. Con resumen_minutos=0 consolida todo
+    lo acumulado (sólo lo de 'grupo', si se indica). Retorna la cantidad
+    de correos encolados.
+    """
+    bandeja = bandeja or obtener_bandeja()
+    if resumen_minutos is None:
+        resumen_minutos = VENTANA_RESUMEN_MINUTOS
+    return bandeja.consolidar(resumen_minutos * 60, armar_resumen, grupo=grupo)
@@ -0,0 +1,39 @@
+# Modules/expedientes.py
+
+import os
+
+# Ruta en la red donde se digitalizan los expedientes
+RUTA_RAIZ = r"\\fs01\Digitalizacion_Jubilaciones"
+
+# Por ahora todos los expedientes son de letra 'E'
+LETRA = "E"
+
+
+def construir_ruta_pdf(numero_str, anio_str, root_path=RUTA_RAIZ):
+    """
+    Construye la ruta del PDF en base a los valores de numero, año y letra (por ahora 'E').
+    Retorna la ruta completa y el subcarpeta (base) para usarlo en backup, etc.
+    """
+    numero_str = str(numero_str).strip()
+    anio_str = str(anio_str).strip()
+
+    if not numero_str or not anio_str:
+        raise ValueError("Falta número o año para construir la ruta.")
+
+    # Asegurar que el número tenga 6 dígitos
+    try:
+        num_int = int(numero_str)  # Verifica que sea numérico
+        numero_str = f"{num_int:06d}"
+    except ValueError:
+        raise ValueError("El número de expediente debe ser un entero válido.")
+
+    if len(anio_str) != 4 or not anio_str.isdigit():
+        raise ValueError("El año debe ser un número de 4 dígitos.")
+
+    subcarpeta = f"{LETRA}-{numero_str}-{anio_str}"
+
+    pdf_name = f"{subcarpeta}.pdf"
+    pdf_path = os.path.join(root_path, anio_str, LETRA, subcarpeta, pdf_name)
+
+    return pdf_path, subcarpeta
+
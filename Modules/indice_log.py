@@ -0,0 +1,203 @@
+# Modules/indice_log.py
+
+import os
+import re
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import groupby
+from operator import itemgetter
+
+ARCHIVO_LOG = "borrado_fojas.log"
+
+# Encabezado de cada entrada, con el formato de logging.basicConfig de las apps:
+# "2025-03-14 10:22:33,123 - INFO - mensaje"
+PATRON_ENTRADA = re.compile(rb"^(\d{4}-\d{2}-\d{2}) \d{2}:\d{2}:\d{2},\d{3} - ([A-Z]+) - ", re.MULTILINE)
+
+PATRON_EXPEDIENTE = re.compile(rb"E-\d{6}-\d{4}")
+
+# Codificaciones que se prueban, en orden. Las apps escriben el log con la
+# codificación local de Windows (cp1252), pero puede haber líneas en UTF-8
+CODIFICACIONES = ("utf-8", "cp1252")
+
+
+def decodificar(datos):
+    """
+    Decodifica un bloque del log probando CODIFICACIONES. cp1252 deja cinco
+    valores de byte sin definir: si aparece alguno, se reemplaza.
+    """
+    for codificacion in CODIFICACIONES:
+        try:
+            return datos.decode(codificacion)
+        except UnicodeDecodeError:
+            continue
+    return datos.decode(CODIFICACIONES[-1], errors="replace")
+
+
+class IndiceLog:
+    """
+    Índice en memoria de las entradas de un archivo de log: offset en bytes
+    de cada entrada, su fecha, su nivel y los expedientes que menciona.
+
+    actualizar() lee sólo los bytes agregados desde la lectura anterior
+    (seguimiento del final del archivo); filtrar() resuelve los filtros con
+    el índice, y leer() trae del archivo sólo las entradas pedidas.
+    Una línea sin encabezado (mensajes de varias líneas) pertenece a la
+    entrada anterior.
+    """
+
+    def __init__(self, ruta=ARCHIVO_LOG):
+        self.ruta = ruta
+        self._lock = threading.Lock()
+        self._reiniciar()
+
+    def _reiniciar(self):
+        self._leidos = 0
+        self._inicios = array("q")
+        self._por_expediente = {}
+        self._por_nivel = {}
+        self._por_fecha = {}
+
+    def __len__(self):
+        return len(self._inicios)
+
+    def actualizar(self):
+        """
+        Indexa lo que se agregó al archivo desde la última vez. Si el archivo
+        se achicó (se rotó o se vació), se vuelve a indexar desde el principio.
+        Retorna la cantidad de entradas nuevas.
+        """
+        with self._lock:
+            try:
+                tamanio = os.path.getsize(self.ruta)
+            except OSError:
+                return 0
+            if tamanio < self._leidos:
+                self._reiniciar()
+            if tamanio == self._leidos:
+                return 0
+
+            antes = len(self._inicios)
+            with open(self.ruta, "rb") as f:
+                f.seek(self._leidos)
+                datos = f.read(tamanio - self._leidos)
+
+            # Una línea a medio escribir se deja para la próxima lectura
+            ultimo_salto = datos.rfind(b"\n")
+            if ultimo_salto < 0:
+                return 0
+            datos = datos[:ultimo_salto + 1]
+
+            self._indexar(datos, self._leidos)
+            self._leidos += len(datos)
+            return len(self._inicios) - antes
+
+    def _indexar(self, datos, base):
+        """
+        Agrega al índice las entradas de 'datos' (líneas completas leídas a
+        partir del offset 'base'). Se trabaja con expresiones regulares sobre
+        el bloque entero, sin partirlo en líneas.
+        """
+        primera = len(self._inicios)
+        inicios = []
+        if not self._inicios and not PATRON_ENTRADA.match(datos):
+            # El archivo no empieza con un encabezado: entrada sin fecha ni nivel
+            inicios.append(0)
+
+        encabezados = [(m.start(), m.group(1, 2)) for m in PATRON_ENTRADA.finditer(datos)]
+        # Las entradas vienen en orden: las de igual fecha y nivel forman tramos
+        # consecutivos, que se agregan de una vez a los índices
+        indice = primera + len(inicios)
+        for (fecha, nivel), tramo in groupby(encabezados, key=itemgetter(1)):
+            cantidad = sum(1 for _ in tramo)
+            indices = range(indice, indice + cantidad)
+            self._por_fecha.setdefault(fecha.decode("ascii"), []).extend(indices)
+            self._por_nivel.setdefault(nivel.decode("ascii"), []).extend(indices)
+            indice += cantidad
+        inicios.extend(inicio for inicio, _ in encabezados)
+
+        # Cada entrada termina donde empieza la siguiente: las líneas de
+        # continuación (incluso las que llegan en otra lectura) quedan en la
+        # entrada anterior sin tener que registrarlas
+        self._inicios.extend(base + inicio for inicio in inicios)
+
+        for coincidencia in PATRON_EXPEDIENTE.finditer(datos):
+            indice = primera + bisect_right(inicios, coincidencia.start()) - 1
+            expediente = coincidencia.group().decode("ascii")
+            entradas = self._por_expediente.get(expediente)
+            if entradas is None:
+                self._por_expediente[expediente] = [indice]
+            elif entradas[-1] != indice:
+                entradas.append(indice)
+
+    def filtrar(self, expediente=None, nivel=None, fecha=None, desde=0):
+        """
+        Índices (en orden) de las entradas que cumplen todos los filtros
+        dados: expediente "E-000000-AAAA", nivel ("INFO", "WARNING",
+        "ERROR") y fecha "AAAA-MM-DD". Con 'desde' se consideran sólo las
+        entradas a partir de ese índice (para seguir el final del log).
+        """
+        with self._lock:
+            listas = []
+            if expediente:
+                listas.append(self._por_expediente.get(expediente.strip().upper(), []))
+            if nivel:
+                listas.append(self._por_nivel.get(nivel.strip().upper(), []))
+            if fecha:
+                listas.append(self._por_fecha.get(fecha.strip(), []))
+            if not listas:
+                return list(range(desde, len(self._inicios)))
+
+            candidatos = listas[0]
+            for otra in listas[1:]:
+                candidatos = _interseccion(candidatos, otra)
+            return candidatos[bisect_left(candidatos, desde):]
+
+    def leer(self, indices):
+        """
+        Texto de las entradas 'indices', leídas del archivo por offset.
+        """
+        with self._lock:
+            rangos = [(self._inicios[i], self._fin(i)) for i in indices]
+        textos = []
+        with open(self.ruta, "rb") as f:
+            for inicio, fin in rangos:
+                f.seek(inicio)
+                textos.append(decodificar(f.read(fin - inicio)).rstrip("\r\n"))
+        return textos
+
+    def _fin(self, indice):
+        if indice + 1 < len(self._inicios):
+            return self._inicios[indice + 1]
+        return self._leidos
+
+    def ultimas(self, cantidad, **filtros):
+        """
+        Texto de las últimas 'cantidad' entradas que cumplen 'filtros'.
+        """
+        return self.leer(self.filtrar(**filtros)[-cantidad:])
+
+
+def _interseccion(a, b):
+    """
+    Intersección de dos listas ordenadas de índices.
+    """
+    if len(a) > len(b):
+        a, b = b, a
+    conjunto = set(b)
+    return [i for i in a if i in conjunto]
+
+
+_indices = {}
+_lock_indices = threading.Lock()
+
+
+def obtener_indice_log(ruta=ARCHIVO_LOG):
+    """
+    Retorna el IndiceLog de 'ruta' (uno por archivo y proceso).
+    """
+    with _lock_indices:
+        ruta = os.path.abspath(ruta)
+        if ruta not in _indices:
+            _indices[ruta] = IndiceLog(ruta)
+        return _indices[ruta]
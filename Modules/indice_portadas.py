@@ -0,0 +1,391 @@
+# Modules/indice_portadas.py
+
+import os
+import re
+import hashlib
+import sqlite3
+import threading
+import unicodedata
+from datetime import datetime
+
+from Modules.expedientes import LETRA, RUTA_RAIZ
+from Modules.lectura_local import contenido_del_documento, leer_pdf
+from Modules.portada_expediente import extraer_datos_portada
+
+# Base local con los datos de portada de todos los expedientes
+DB_INDICE = r"C:\Indice_Expedientes\portadas.sqlite3"
+
+# Un CUIL: 2 dígitos, 8 dígitos y 1 verificador, con o sin guiones
+PATRON_CUIL = re.compile(r"\b(\d{2})[-\s]?(\d{8})[-\s]?(\d)\b")
+
+# Nro de expediente escrito como "E-006666-2025", "6666/2025", etc.
+PATRON_EXPEDIENTE = re.compile(r"^(?:[A-Za-z]\s*-?\s*)?(\d{1,6})\s*[-/ ]\s*(\d{4})$")
+
+LIMITE_RESULTADOS = 50
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS portadas (
+    subcarpeta TEXT PRIMARY KEY,
+    pdf_path TEXT NOT NULL,
+    numero INTEGER,
+    anio INTEGER,
+    nro TEXT,
+    iniciado TEXT,
+    extracto TEXT,
+    cuil TEXT,
+    texto TEXT,
+    paginas INTEGER,
+    tamanio INTEGER,
+    mtime_ns INTEGER,
+    digest TEXT,
+    recorrido INTEGER,
+    indexado TEXT
+);
+CREATE TABLE IF NOT EXISTS recorridos (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    raiz TEXT NOT NULL,
+    inicio TEXT,
+    fin TEXT,
+    estado TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_portadas_cuil ON portadas (cuil);
+CREATE INDEX IF NOT EXISTS idx_portadas_nro ON portadas (nro);
+CREATE INDEX IF NOT EXISTS idx_portadas_numero ON portadas (numero, anio);
+"""
+
+# Columnas agregadas después de la primera versión del índice
+_COLUMNAS_NUEVAS = {"digest": "TEXT", "recorrido": "INTEGER"}
+
+# Índice de texto completo para buscar por nombre (si el SQLite lo soporta)
+_ESQUEMA_FTS = """
+CREATE VIRTUAL TABLE IF NOT EXISTS portadas_texto USING fts5 (
+    subcarpeta UNINDEXED,
+    texto,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+
+def normalizar_texto(texto):
+    """
+    Mayúsculas y sin acentos, para comparar nombres escritos de distintas formas.
+    """
+    texto = unicodedata.normalize("NFKD", str(texto or ""))
+    return "".join(c for c in texto if not unicodedata.combining(c)).upper()
+
+
+def extraer_cuil(texto):
+    """
+    Primer CUIL que aparece en 'texto', como 11 dígitos sin guiones, o None.
+    """
+    coincidencia = PATRON_CUIL.search(str(texto or ""))
+    if not coincidencia:
+        return None
+    return "".join(coincidencia.groups())
+
+
+class IndicePortadas:
+    """
+    Índice local (SQLite) con los datos de portada de cada expediente:
+    Nro, Iniciado, Extracto, el CUIL tomado del extracto y la cantidad de
+    páginas. Cada fila guarda el tamaño y el mtime del PDF indexado, así se
+    sabe si sigue vigente sin volver a leer el archivo.
+    """
+
+    def __init__(self, ruta_db=DB_INDICE):
+        self.ruta_db = ruta_db
+        self._lock = threading.Lock()
+        self._conexion = None
+        self._con_fts = False
+
+    def _conectar(self):
+        if self._conexion is None:
+            carpeta = os.path.dirname(self.ruta_db)
+            if carpeta:
+                os.makedirs(carpeta, exist_ok=True)
+            conexion = sqlite3.connect(self.ruta_db, check_same_thread=False)
+            conexion.row_factory = sqlite3.Row
+            conexion.execute("PRAGMA journal_mode=WAL")
+            conexion.execute("PRAGMA synchronous=NORMAL")
+            conexion.executescript(_ESQUEMA)
+            self._migrar(conexion)
+            try:
+                conexion.executescript(_ESQUEMA_FTS)
+                self._con_fts = True
+            except sqlite3.OperationalError:
+                # SQLite sin FTS5: la búsqueda por nombre usa LIKE
+                self._con_fts = False
+            conexion.commit()
+            self._conexion = conexion
+        return self._conexion
+
+    @staticmethod
+    def _migrar(conexion):
+        existentes = {fila[1] for fila in conexion.execute("PRAGMA table_info(portadas)")}
+        for columna, tipo in _COLUMNAS_NUEVAS.items():
+            if columna not in existentes:
+                conexion.execute(f"ALTER TABLE portadas ADD COLUMN {columna} {tipo}")
+        conexion.execute("CREATE INDEX IF NOT EXISTS idx_portadas_recorrido ON portadas (recorrido)")
+
+    def cerrar(self):
+        with self._lock:
+            if self._conexion is not None:
+                self._conexion.close()
+                self._conexion = None
+
+    def guardar(self, subcarpeta, pdf_path, datos, paginas, st, digest=None, recorrido=None):
+        """
+        Inserta o reemplaza la fila de 'subcarpeta'. 'datos' es el dict de
+        extraer_datos_portada (o None si el PDF no tiene páginas) y 'st' el
+        os.stat del archivo leído. 'digest' es el SHA-256 del contenido y
+        'recorrido' el id del recorrido que lo indexó, si corresponde.
+        """
+        datos = datos or {"nro": "-", "iniciado": "-", "extracto": "-"}
+        partes = subcarpeta.split("-")
+        numero = int(partes[1]) if len(partes) == 3 and partes[1].isdigit() else None
+        anio = int(partes[2]) if len(partes) == 3 and partes[2].isdigit() else None
+
+        texto = normalizar_texto(f"{datos['nro']} {datos['extracto']}")
+        fila = (
+            subcarpeta, pdf_path, numero, anio,
+            datos["nro"], datos["iniciado"], datos["extracto"],
+            extraer_cuil(datos["extracto"]), texto, paginas,
+            st.st_size, st.st_mtime_ns, digest, recorrido,
+            datetime.now().isoformat(timespec="seconds"),
+        )
+        with self._lock:
+            conexion = self._conectar()
+            with conexion:
+                # Sin 'recorrido' (p.ej. desde la ventana) se conserva el que ya tenía,
+                # para no perder el punto de control de un recorrido en curso
+                conexion.execute(
+                    "INSERT INTO portadas (subcarpeta, pdf_path, numero, anio, nro, iniciado, "
+                    "extracto, cuil, texto, paginas, tamanio, mtime_ns, digest, recorrido, indexado) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (subcarpeta) DO UPDATE SET pdf_path = excluded.pdf_path, "
+                    "numero = excluded.numero, anio = excluded.anio, nro = excluded.nro, "
+                    "iniciado = excluded.iniciado, extracto = excluded.extracto, "
+                    "cuil = excluded.cuil, texto = excluded.texto, paginas = excluded.paginas, "
+                    "tamanio = excluded.tamanio, mtime_ns = excluded.mtime_ns, "
+                    "digest = excluded.digest, "
+                    "recorrido = COALESCE(excluded.recorrido, portadas.recorrido), "
+                    "indexado = excluded.indexado",
+                    fila
+                )
+                if self._con_fts:
+                    conexion.execute("DELETE FROM portadas_texto WHERE subcarpeta = ?", (subcarpeta,))
+                    conexion.execute(
+                        "INSERT INTO portadas_texto (subcarpeta, texto) VALUES (?, ?)",
+                        (subcarpeta, texto)
+                    )
+
+    def obtener(self, subcarpeta):
+        """
+        Fila del expediente como dict, o None si no está indexado.
+        """
+        with self._lock:
+            fila = self._conectar().execute(
+                "SELECT * FROM portadas WHERE subcarpeta = ?", (subcarpeta,)
+            ).fetchone()
+        return dict(fila) if fila else None
+
+    def obtener_vigente(self, subcarpeta, st):
+        """
+        Igual que obtener(), pero sólo si el PDF no cambió (mismo tamaño y
+        mtime) desde que se indexó.
+        """
+        fila = self.obtener(subcarpeta)
+        if fila and fila["tamanio"] == st.st_size and fila["mtime_ns"] == st.st_mtime_ns:
+            return fila
+        return None
+
+    def iniciar_recorrido(self, raiz, reanudar=True):
+        """
+        Retorna el id del recorrido de 'raiz'. Con reanudar=True se continúa
+        el último recorrido que quedó sin terminar (interrumpido), si lo hay.
+        """
+        with self._lock:
+            conexion = self._conectar()
+            with conexion:
+                if reanudar:
+                    fila = conexion.execute(
+                        "SELECT id FROM recorridos WHERE raiz = ? AND estado = 'en_curso' "
+                        "ORDER BY id DESC LIMIT 1", (raiz,)
+                    ).fetchone()
+                    if fila:
+                        return fila["id"]
+                conexion.execute("UPDATE recorridos SET estado = 'abandonado' "
+                                 "WHERE raiz = ? AND estado = 'en_curso'", (raiz,))
+                cursor = conexion.execute(
+                    "INSERT INTO recorridos (raiz, inicio, estado) VALUES (?, ?, 'en_curso')",
+                    (raiz, datetime.now().isoformat(timespec="seconds"))
+                )
+                return cursor.lastrowid
+
+    def terminar_recorrido(self, recorrido, estado="terminado"):
+        with self._lock:
+            conexion = self._conectar()
+            with conexion:
+                conexion.execute(
+                    "UPDATE recorridos SET fin = ?, estado = ? WHERE id = ?",
+                    (datetime.now().isoformat(timespec="seconds"), estado, recorrido)
+                )
+
+    def verificados(self, recorrido):
+        """
+        Subcarpetas ya procesadas en el recorrido (el punto de control para reanudar).
+        """
+        with self._lock:
+            filas = self._conectar().execute(
+                "SELECT subcarpeta FROM portadas WHERE recorrido = ?", (recorrido,)
+            ).fetchall()
+        return {fila[0] for fila in filas}
+
+    def marcar_verificado(self, subcarpeta, recorrido):
+        with self._lock:
+            conexion = self._conectar()
+            with conexion:
+                conexion.execute("UPDATE portadas SET recorrido = ? WHERE subcarpeta = ?",
+                                 (recorrido, subcarpeta))
+
+    def eliminar_no_vistos(self, recorrido, anios=None):
+        """
+        Borra las filas que el recorrido no encontró (expedientes que ya no
+        existen). Con 'anios' sólo se consideran esos años.
+        """
+        sql = "DELETE FROM portadas WHERE recorrido IS NOT ?"
+        parametros = [recorrido]
+        if anios:
+            sql += f" AND anio IN ({', '.join('?' for _ in anios)})"
+            parametros.extend(int(anio) for anio in anios)
+        with self._lock:
+            conexion = self._conectar()
+            with conexion:
+                eliminados = conexion.execute(sql, parametros).rowcount
+                if self._con_fts:
+                    conexion.execute("DELETE FROM portadas_texto WHERE subcarpeta NOT IN "
+                                     "(SELECT subcarpeta FROM portadas)")
+        return eliminados
+
+    def buscar(self, texto, limite=LIMITE_RESULTADOS):
+        """
+        Busca expedientes por CUIL, por Nro (p.ej. "E-006666-2025" o
+        "6666/2025") o por nombre (palabras del extracto, en cualquier
+        orden y sin importar acentos). Retorna una lista de dicts.
+        """
+        texto = str(texto or "").strip()
+        if not texto:
+            return []
+
+        solo_digitos = re.sub(r"[-\s]", "", texto)
+        if solo_digitos.isdigit() and len(solo_digitos) == 11:
+            return self._consultar("SELECT * FROM portadas WHERE cuil = ? LIMIT ?",
+                                   (solo_digitos, limite))
+
+        coincidencia = PATRON_EXPEDIENTE.match(texto)
+        if coincidencia:
+            numero, anio = int(coincidencia.group(1)), int(coincidencia.group(2))
+            return self._consultar(
+                "SELECT * FROM portadas WHERE (numero = ? AND anio = ?) OR nro = ? LIMIT ?",
+                (numero, anio, texto, limite)
+            )
+
+        if texto.isdigit():
+            return self._consultar(
+                "SELECT * FROM portadas WHERE numero = ? OR nro = ? "
+                "ORDER BY anio DESC LIMIT ?",
+                (int(texto), texto, limite)
+            )
+
+        return self._buscar_nombre(texto, limite)
+
+    def _buscar_nombre(self, texto, limite):
+        palabras = re.findall(r"\w+", normalizar_texto(texto))
+        if not palabras:
+            return []
+
+        with self._lock:
+            self._conectar()
+            con_fts = self._con_fts
+
+        if con_fts:
+            consulta = " ".join(f'"{palabra}"*' for palabra in palabras)
+            return self._consultar(
+                "SELECT p.* FROM portadas_texto t JOIN portadas p ON p.subcarpeta = t.subcarpeta "
+                "WHERE portadas_texto MATCH ? ORDER BY rank LIMIT ?",
+                (consulta, limite)
+            )
+
+        condiciones = " AND ".join("texto LIKE ?" for _ in palabras)
+        return self._consultar(
+            f"SELECT * FROM portadas WHERE {condiciones} LIMIT ?",
+            tuple(f"%{palabra}%" for palabra in palabras) + (limite,)
+        )
+
+    def _consultar(self, sql, parametros):
+        with self._lock:
+            filas = self._conectar().execute(sql, parametros).fetchall()
+        return [dict(fila) for fila in filas]
+
+
+_indices = {}
+_lock_indices = threading.Lock()
+
+
+def obtener_indice(ruta_db=DB_INDICE):
+    """
+    Retorna el IndicePortadas de 'ruta_db' (uno por archivo y proceso).
+    """
+    with _lock_indices:
+        if ruta_db not in _indices:
+            _indices[ruta_db] = IndicePortadas(ruta_db)
+        return _indices[ruta_db]
+
+
+def recorrer_expedientes(root_path=RUTA_RAIZ, anios=None):
+    """
+    Recorre <raíz>/<año>/E/<subcarpeta>/<subcarpeta>.pdf (la misma estructura
+    que arma construir_ruta_pdf) y genera tuplas (pdf_path, subcarpeta).
+    Sólo se listan las carpetas: la existencia del PDF la comprueba quien lo
+    procese, con el mismo os.stat que necesita de todos modos (en el share
+    cada consulta es un viaje de red).
+    """
+    with os.scandir(root_path) as entradas_anio:
+        carpetas_anio = sorted(
+            e.name for e in entradas_anio
+            if e.is_dir() and len(e.name) == 4 and e.name.isdigit()
+        )
+
+    for anio in carpetas_anio:
+        if anios and anio not in anios:
+            continue
+        carpeta_letra = os.path.join(root_path, anio, LETRA)
+        if not os.path.isdir(carpeta_letra):
+            continue
+        with os.scandir(carpeta_letra) as entradas:
+            subcarpetas = sorted(e.name for e in entradas if e.is_dir())
+        for subcarpeta in subcarpetas:
+            yield os.path.join(carpeta_letra, subcarpeta, f"{subcarpeta}.pdf"), subcarpeta
+
+
+def indexar_pdf(indice, pdf_path, subcarpeta, forzar=False, recorrido=None):
+    """
+    Lee la portada de 'pdf_path' y actualiza el índice. Si la fila ya está
+    vigente (mismo tamaño y mtime) no se lee el archivo, salvo con forzar=True.
+    El archivo se lee una sola vez: de ese buffer salen el SHA-256, la
+    cantidad de páginas y la portada.
+    Retorna True si se indexó y False si se salteó.
+    """
+    st = os.stat(pdf_path)
+    if not forzar and indice.obtener_vigente(subcarpeta, st) is not None:
+        if recorrido is not None:
+            indice.marcar_verificado(subcarpeta, recorrido)
+        return False
+
+    reader, _ = leer_pdf(pdf_path)
+    digest = hashlib.sha256(contenido_del_documento(reader)).hexdigest()
+    indice.guardar(
+        subcarpeta, pdf_path, extraer_datos_portada(reader), len(reader.pages), st,
+        digest=digest, recorrido=recorrido
+    )
+    return True
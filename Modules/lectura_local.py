@@ -0,0 +1,129 @@
+# Modules/lectura_local.py
+
+import io
+import os
+import mmap
+import time
+import shutil
+import tempfile
+
+import PyPDF2
+
+# A partir de este tamaño el PDF se copia a un temporal local y se mapea en
+# memoria (mmap) en lugar de mantenerlo entero en el heap del proceso
+UMBRAL_MMAP = 64 * 1024 * 1024
+
+# Tamaño de cada lectura al copiar al temporal: pocas lecturas grandes y
+# secuenciales en lugar de muchas chicas (cada una es un viaje por SMB)
+TAMANIO_BLOQUE_RED = 8 * 1024 * 1024
+
+
+def leer_pdf(pdf_path, umbral_mmap=UMBRAL_MMAP, verificar_cancelacion=None):
+    """
+    Trae el PDF del share con una sola lectura secuencial y lo parsea
+    desde la copia local, así PyPDF2 no hace ningún acceso a la red.
+
+    Hasta 'umbral_mmap' bytes el contenido queda en memoria (BytesIO); los
+    archivos más grandes se copian a un temporal local que se mapea con mmap.
+    Con 'verificar_cancelacion' el archivo se trae de a TAMANIO_BLOQUE_RED y
+    se la llama entre bloque y bloque (una lectura especulativa se puede
+    abandonar sin terminar de traer un PDF grande).
+
+    Retorna (reader, metricas), donde metricas es un dict con:
+      bytes, mtime_ns, modo ("memoria" o "mmap"),
+      segundos_red (apertura + lectura/copia) y segundos_parseo.
+    """
+    inicio = time.perf_counter()
+    with open(pdf_path, "rb", buffering=0) as f:
+        st = os.fstat(f.fileno())
+        if st.st_size < umbral_mmap:
+            if verificar_cancelacion is None:
+                # FileIO.readall dimensiona el buffer con el tamaño del archivo
+                # y lo llena con lecturas grandes, sin copias intermedias
+                stream = io.BytesIO(f.readall())
+            else:
+                stream = io.BytesIO(_leer_por_bloques(f, verificar_cancelacion))
+            modo = "memoria"
+        else:
+            stream = _copiar_a_mmap(f, verificar_cancelacion)
+            modo = "mmap"
+    fin_red = time.perf_counter()
+
+    reader = PyPDF2.PdfReader(stream)
+    # El árbol de páginas se arma al primer uso: se incluye en el parseo
+    len(reader.pages)
+    fin_parseo = time.perf_counter()
+
+    metricas = {
+        "bytes": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "modo": modo,
+        "segundos_red": fin_red - inicio,
+        "segundos_parseo": fin_parseo - fin_red,
+    }
+    return reader, metricas
+
+
+def _leer_por_bloques(f, verificar_cancelacion):
+    """
+    Como f.readall(), pero de a TAMANIO_BLOQUE_RED, llamando a
+    verificar_cancelacion() antes de cada bloque.
+    """
+    bloques = []
+    while True:
+        verificar_cancelacion()
+        bloque = f.read(TAMANIO_BLOQUE_RED)
+        if not bloque:
+            return b"".join(bloques)
+        bloques.append(bloque)
+
+
+def _copiar_a_mmap(f, verificar_cancelacion=None):
+    """
+    Copia el archivo abierto 'f' a un temporal local y retorna un mmap de
+    sólo lectura. El temporal se borra solo al liberarse el mapeo.
+    """
+    temporal = tempfile.TemporaryFile(prefix="pdf_", suffix=".tmp")
+    try:
+        if verificar_cancelacion is None:
+            shutil.copyfileobj(f, temporal, TAMANIO_BLOQUE_RED)
+        else:
+            while True:
+                verificar_cancelacion()
+                bloque = f.read(TAMANIO_BLOQUE_RED)
+                if not bloque:
+                    break
+                temporal.write(bloque)
+        temporal.flush()
+        return mmap.mmap(temporal.fileno(), 0, access=mmap.ACCESS_READ)
+    finally:
+        # El mapeo mantiene su propio handle del archivo
+        temporal.close()
+
+
+def contenido_del_documento(reader):
+    """
+    Buffer (sin copiar) con los bytes del archivo desde el que se parseó
+    'reader', cuando se leyó con leer_pdf. Sirve para hashear o comparar.
+    """
+    stream = reader.stream
+    if isinstance(stream, io.BytesIO):
+        return stream.getbuffer()
+    if isinstance(stream, mmap.mmap):
+        return stream
+    stream.seek(0)
+    return stream.read()
+
+
+def describir_lectura(pdf_path, metricas):
+    """
+    Línea de log con el tiempo de red y el de parseo, para distinguir si
+    una operación lenta está limitada por el share o por la CPU.
+    """
+    megabytes = metricas["bytes"] / (1024 * 1024)
+    red = metricas["segundos_red"]
+    velocidad = f"{megabytes / red:.1f} MB/s" if red > 0 else "-"
+    return (
+        f"Lectura de {os.path.basename(pdf_path)}: {megabytes:.1f} MB en {red:.2f} s "
+        f"de red ({velocidad}), parseo {metricas['segundos_parseo']:.2f} s [{metricas['modo']}]"
+    )
@@ -0,0 +1,380 @@
+# Modules/motor_pdf.py
+
+import io
+import os
+import re
+import json
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime
+
+import PyPDF2
+
+try:
+    import fitz  # PyMuPDF
+except ImportError:
+    fitz = None
+
+from Modules.copia_paginas import copiar_paginas
+from Modules.lectura_local import contenido_del_documento
+
+# Motor a usar aunque haya mediciones ("pypdf2" o "pymupdf"). Vacío para
+# elegir según MEDICIONES_MOTORES.
+MOTOR_POR_DEFECTO = os.environ.get("BORRADO_FOJAS_MOTOR_PDF", "")
+
+# Resultado de medir_motores_pdf.py (junto al log, como la auditoría): de
+# acá sale el motor más rápido
+MEDICIONES_MOTORES = "motores_pdf.json"
+
+# PyMuPDF más viejo que esto no se usa: DocumentoPyMuPDF.guardar le pasa a
+# save() un archivo abierto y use_objstms, que las versiones anteriores no
+# aceptan. Sin esta versión el motor no figura como disponible y se usa
+# MOTOR_RESPALDO aunque las mediciones digan otra cosa.
+VERSION_MINIMA_PYMUPDF = (1, 24, 0)
+
+# Motor de respaldo: el que usa el resto del código (sondeo, actualización
+# incremental, backups delta) y que siempre está instalado
+MOTOR_RESPALDO = "pypdf2"
+
+
+class DocumentoPDF(ABC):
+    """
+    Documento abierto por un motor. Todas las implementaciones ofrecen:
+      cantidad_paginas(), extraer_texto(indices=None),
+      eliminar_paginas(fojas), guardar(destino, compactar=False, metricas=None)
+      y cerrar().
+    Las fojas son base 1 (como en RangosFojas); los índices, base 0.
+    cerrar() se puede llamar más de una vez.
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+    @abstractmethod
+    def cantidad_paginas(self):
+        pass
+
+    @abstractmethod
+    def extraer_texto(self, indices=None):
+        """
+        Texto de las páginas 'indices' (todas si es None), una tras otra.
+        """
+
+    @abstractmethod
+    def eliminar_paginas(self, fojas):
+        """
+        Quita del documento las fojas contenidas en 'fojas'. El archivo no
+        cambia hasta llamar a guardar().
+        """
+
+    @abstractmethod
+    def guardar(self, destino, compactar=False, metricas=None):
+        """
+        Escribe el documento en 'destino' (archivo abierto en modo binario).
+        Con compactar=True además unifica los objetos duplicados y comprime
+        la estructura; 'metricas' (dict) recibe lo que el motor informe.
+        Retorna la cantidad de bytes escritos.
+        """
+
+    def cerrar(self):
+        pass
+
+    def _conservadas(self, fojas):
+        return [idx for idx in range(self.cantidad_paginas()) if idx + 1 not in fojas]
+
+
+class DocumentoPyPDF2(DocumentoPDF):
+    """
+    Las páginas eliminadas sólo se anotan: guardar() copia las conservadas
+    en streaming (ver copia_paginas), con memoria acotada por la página más
+    grande. Los documentos encriptados se copian con PdfWriter.
+    """
+
+    def __init__(self, reader):
+        self.reader = reader
+        self.indices = list(range(len(reader.pages)))
+
+    def cantidad_paginas(self):
+        return len(self.indices)
+
+    def extraer_texto(self, indices=None):
+        if indices is None:
+            indices = range(len(self.indices))
+        return "".join(self.reader.pages[self.indices[idx]].extract_text() or "" for idx in indices)
+
+    def eliminar_paginas(self, fojas):
+        self.indices = [self.indices[idx] for idx in self._conservadas(fojas)]
+
+    def guardar(self, destino, compactar=False, metricas=None):
+        if not self.reader.is_encrypted:
+            return copiar_paginas(self.reader, self.indices, destino, compactar=compactar, metricas=metricas)
+        inicio = destino.tell()
+        writer = PyPDF2.PdfWriter()
+        for idx in self.indices:
+            writer.add_page(self.reader.pages[idx])
+        writer.write(destino)
+        return destino.tell() - inicio
+
+
+class MotorPyPDF2:
+    """
+    PyPDF2 puro: lento con escaneos grandes, pero es la referencia.
+    """
+
+    nombre = "pypdf2"
+
+    @staticmethod
+    def disponible():
+        return True
+
+    def abrir(self, origen, ruta=None):
+        """
+        'origen' puede ser una ruta, los bytes del PDF o un PdfReader ya
+        parseado (p.ej. el de CachePDF), que se usa tal cual. 'ruta' es el
+        archivo del que salió el PdfReader, para los motores que prefieren
+        abrirlo ellos mismos.
+        """
+        if isinstance(origen, PyPDF2.PdfReader):
+            return DocumentoPyPDF2(origen)
+        if isinstance(origen, str):
+            with open(origen, "rb") as f:
+                origen = f.read()
+        return DocumentoPyPDF2(PyPDF2.PdfReader(io.BytesIO(origen)))
+
+
+class DocumentoPyMuPDF(DocumentoPDF):
+
+    def __init__(self, documento):
+        self.documento = documento
+        self.objetos_originales = documento.xref_length() - 1
+
+    def cantidad_paginas(self):
+        return self.documento.page_count
+
+    def extraer_texto(self, indices=None):
+        if indices is None:
+            indices = range(self.documento.page_count)
+        return "".join(self.documento[idx].get_text() for idx in indices)
+
+    def eliminar_paginas(self, fojas):
+        self.documento.select(self._conservadas(fojas))
+
+    def guardar(self, destino, compactar=False, metricas=None):
+        # save() escribe directo en 'destino' (p.ej. el temporal de
+        # reemplazar_atomico), sin armar antes todo el PDF en memoria.
+        # garbage=1 descarta los objetos que sólo usaban las fojas
+        # eliminadas; garbage=3 además unifica los duplicados
+        inicio = destino.tell()
+        if not compactar:
+            self.documento.save(destino, garbage=1, deflate=True)
+        else:
+            self.documento.save(destino, garbage=3, deflate=True, use_objstms=1)
+        if metricas is not None:
+            # La recolección de basura renumera el documento: lo que queda
+            # es lo que se escribió
+            metricas.update({
+                "objetos_originales": self.objetos_originales,
+                "objetos_escritos": self.documento.xref_length() - 1,
+            })
+        return destino.tell() - inicio
+
+    def cerrar(self):
+        if not self.documento.is_closed:
+            self.documento.close()
+
+
+class MotorPyMuPDF:
+    """
+    PyMuPDF (fitz), en C: copia páginas y extrae texto bastante más rápido
+    que PyPDF2. Es opcional; sin el paquete, o con una versión anterior a
+    VERSION_MINIMA_PYMUPDF, no aparece como disponible.
+    """
+
+    nombre = "pymupdf"
+
+    @staticmethod
+    def disponible():
+        return fitz is not None and version_pymupdf() >= VERSION_MINIMA_PYMUPDF
+
+    def abrir(self, origen, ruta=None):
+        """
+        Con un PdfReader y su 'ruta', PyMuPDF abre el archivo directamente
+        en lugar de copiar el documento en memoria. Mientras el documento
+        esté abierto retiene el archivo: hay que cerrarlo antes de
+        reemplazarlo.
+        """
+        if not self.disponible():
+            raise RuntimeError(
+                f"PyMuPDF {'.'.join(map(str, VERSION_MINIMA_PYMUPDF))} o posterior no está instalado "
+                f"(pip install -U PyMuPDF)."
+            )
+        if isinstance(origen, PyPDF2.PdfReader):
+            if ruta is not None:
+                return DocumentoPyMuPDF(fitz.open(ruta, filetype="pdf"))
+            origen = contenido_del_documento(origen)
+        if isinstance(origen, str):
+            return DocumentoPyMuPDF(fitz.open(origen, filetype="pdf"))
+        return DocumentoPyMuPDF(fitz.open(stream=bytes(origen), filetype="pdf"))
+
+
+def version_pymupdf():
+    """
+    Versión de PyMuPDF instalada como tupla (p.ej. (1, 24, 10)), o None si
+    no está instalado.
+    """
+    if fitz is None:
+        return None
+    numeros = re.findall(r"\d+", getattr(fitz, "VersionBind", ""))[:3]
+    return tuple(int(n) for n in numeros) or (0,)
+
+
+_MOTORES = {
+    "pypdf2": MotorPyPDF2,
+    "pymupdf": MotorPyMuPDF,
+}
+
+_motor = None
+
+
+def motores_disponibles():
+    """
+    Nombres de los motores que se pueden usar en este equipo.
+    """
+    return [nombre for nombre, clase in _MOTORES.items() if clase.disponible()]
+
+
+def crear_motor(nombre=None):
+    """
+    Crea el motor 'nombre'; por defecto, el que indique motor_por_defecto().
+    """
+    nombre = (nombre or motor_por_defecto()).lower()
+    if nombre not in _MOTORES:
+        raise ValueError(f"Motor PDF desconocido: {nombre}")
+    if not _MOTORES[nombre].disponible():
+        raise ValueError(f"El motor PDF '{nombre}' no está instalado en este equipo "
+                         f"(o su versión no es compatible).")
+    return _MOTORES[nombre]()
+
+
+def motor_por_defecto(ruta_mediciones=MEDICIONES_MOTORES):
+    """
+    MOTOR_POR_DEFECTO si está configurado y disponible; si no, el de mayor
+    throughput según las últimas mediciones; si no hay, MOTOR_RESPALDO.
+    """
+    disponibles = motores_disponibles()
+    if MOTOR_POR_DEFECTO.lower() in disponibles:
+        return MOTOR_POR_DEFECTO.lower()
+    mediciones = leer_mediciones(ruta_mediciones)
+    medidos = [
+        (datos["mb_s"], nombre) for nombre, datos in mediciones.get("motores", {}).items()
+        if nombre in disponibles and datos.get("mb_s")
+    ]
+    if medidos:
+        return max(medidos)[1]
+    return MOTOR_RESPALDO
+
+
+def obtener_motor():
+    """
+    Motor compartido por la ventana, el lote y el proceso de resoluciones.
+    """
+    global _motor
+    if _motor is None:
+        _motor = crear_motor()
+    return _motor
+
+
+def leer_mediciones(ruta=MEDICIONES_MOTORES):
+    try:
+        with open(ruta, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def guardar_mediciones(mediciones, ruta=MEDICIONES_MOTORES):
+    os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+    with open(ruta, "w", encoding="utf-8") as f:
+        json.dump(mediciones, f, ensure_ascii=False, indent=2)
+
+
+def medir_motor(motor, pdf_path, paginas_texto=None):
+    """
+    Mide con 'motor' las operaciones de una búsqueda y un borrado sobre
+    'pdf_path': abrir y contar páginas, extraer texto ('paginas_texto'
+    primeras páginas, todas si es None), quitar la foja del medio y guardar
+    en memoria. El archivo se lee una vez antes de medir, así sólo cuenta la
+    CPU del motor y no el share.
+
+    Retorna {"bytes", "paginas", "apertura", "texto", "borrado", "total"}
+    (tiempos en segundos).
+    """
+    with open(pdf_path, "rb") as f:
+        datos = f.read()
+
+    inicio = time.perf_counter()
+    with motor.abrir(datos) as documento:
+        paginas = documento.cantidad_paginas()
+        fin_apertura = time.perf_counter()
+
+        indices = range(paginas if paginas_texto is None else min(paginas, paginas_texto))
+        documento.extraer_texto(indices)
+        fin_texto = time.perf_counter()
+
+        documento.eliminar_paginas({paginas // 2 + 1} if paginas > 1 else set())
+        salida = io.BytesIO()
+        documento.guardar(salida)
+        fin_borrado = time.perf_counter()
+
+    resultado_paginas = len(PyPDF2.PdfReader(salida).pages)
+    if paginas > 1 and resultado_paginas != paginas - 1:
+        raise RuntimeError(
+            f"{motor.nombre}: el PDF generado tiene {resultado_paginas} páginas y se esperaban {paginas - 1}."
+        )
+
+    return {
+        "bytes": len(datos),
+        "paginas": paginas,
+        "apertura": fin_apertura - inicio,
+        "texto": fin_texto - fin_apertura,
+        "borrado": fin_borrado - fin_texto,
+        "total": fin_borrado - inicio,
+    }
+
+
+def medir_motores(pdf_paths, nombres=None, paginas_texto=None, log=print):
+    """
+    Mide cada motor disponible (o los de 'nombres') sobre los PDFs de
+    muestra y retorna las mediciones en el formato de MEDICIONES_MOTORES:
+    {"medido", "muestras", "motores": {nombre: {"mb_s", "segundos", ...}}}.
+    Un motor que falla con alguna muestra queda sin "mb_s" y no se elige.
+    """
+    mediciones = {
+        "medido": datetime.now().isoformat(timespec="seconds"),
+        "muestras": [os.path.basename(p) for p in pdf_paths],
+        "motores": {},
+    }
+    for nombre in nombres or motores_disponibles():
+        motor = crear_motor(nombre)
+        total_bytes = 0
+        totales = {"apertura": 0.0, "texto": 0.0, "borrado": 0.0, "total": 0.0}
+        try:
+            for pdf_path in pdf_paths:
+                resultado = medir_motor(motor, pdf_path, paginas_texto)
+                total_bytes += resultado["bytes"]
+                for clave in totales:
+                    totales[clave] += resultado[clave]
+        except Exception as e:
+            log(f"{nombre}: falló con {os.path.basename(pdf_path)}: {e}")
+            mediciones["motores"][nombre] = {"error": str(e)}
+            continue
+        segundos = {clave: round(valor, 4) for clave, valor in totales.items()}
+        mb_s = total_bytes / (1024 * 1024) / totales["total"] if totales["total"] > 0 else None
+        mediciones["motores"][nombre] = {
+            "mb_s": round(mb_s, 2) if mb_s else None,
+            "segundos": segundos,
+        }
+    return mediciones
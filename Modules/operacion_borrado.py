@@ -0,0 +1,211 @@
+# Modules/operacion_borrado.py
+
+import os
+import time
+
+from Modules.auditoria import Fases, registrar
+from Modules.backup_expedientes import (
+    completar_backup_delta, crear_backup, crear_backup_delta
+)
+from Modules.borrado_fojas import eliminar_paginas
+from Modules.planificador_escritura import archivo_escribible
+from Modules.reservas_expediente import ExpedienteReservado, ReservaExpediente
+
+
+class ErrorBorrado(Exception):
+    """
+    Fallo en una fase del borrado: 'verificacion', 'bloqueado', 'reservado',
+    'backup', 'lectura' o 'escritura'. La excepción original queda en 'causa' para que
+    cada interfaz (ventana o lote) arme su propio mensaje.
+    """
+    def __init__(self, fase, causa):
+        super().__init__(str(causa))
+        self.fase = fase
+        self.causa = causa
+
+    @property
+    def bloqueado(self):
+        """
+        True si el PDF está abierto o reservado por otro usuario: el borrado
+        se puede reintentar más tarde tal cual.
+        """
+        return self.fase in ("bloqueado", "reservado") or (
+            self.fase == "escritura" and isinstance(self.causa, PermissionError)
+        )
+
+
+def _sin_avance(porcentaje, descripcion):
+    pass
+
+
+def _sin_cancelacion():
+    pass
+
+
+def _sin_log(mensaje, level="info"):
+    pass
+
+
+def borrar_fojas_expediente(pdf_path, subcarpeta, paginas, cache, compactar=False,
+                            backup_delta=False, log=None, avance=None,
+                            verificar_cancelacion=None, solicitante="", origen=""):
+    """
+    Flujo completo de borrado de fojas de un expediente, compartido por la
+    ventana y el modo por lotes: verificación, backup, lectura y escritura.
+    Antes del backup se comprueba que el PDF se pueda escribir, para no
+    gastar el backup y la lectura en un archivo que otro usuario tiene abierto,
+    y se toma la reserva del expediente (ver ReservaExpediente), que se
+    mantiene hasta terminar la escritura.
+
+    'paginas' es el RangosFojas a eliminar (base 1) y 'cache' la
+    CachePDF desde la que se obtiene el documento. 'verificar_cancelacion'
+    se llama entre fases (nunca durante la escritura) y puede lanzar una
+    excepción para abortar.
+
+    Con backup_delta=True sólo se respaldan las fojas eliminadas (más un
+    manifiesto para restaurar), tomadas del documento ya leído; si no, se
+    respalda el archivo completo en el almacén de backups.
+
+    Cada llamada deja un registro en la auditoría (ver Modules.auditoria)
+    con el resultado, el tamaño del PDF y la duración y bytes de cada fase;
+    'solicitante' y 'origen' ("ventana", "lote", "cola") sólo se usan para
+    ese registro.
+
+    Retorna el dict de eliminar_paginas más la ruta del backup.
+    """
+    log = log or _sin_log
+    avance = avance or _sin_avance
+    verificar_cancelacion = verificar_cancelacion or _sin_cancelacion
+
+    registro = {
+        "expediente": subcarpeta,
+        "pdf_path": pdf_path,
+        "fojas": str(paginas),
+        "solicitante": solicitante,
+        "origen": origen,
+        "compactar": compactar,
+        "backup_delta": backup_delta,
+    }
+    fases = Fases()
+    inicio = time.monotonic()
+    try:
+        resultado = _borrar(pdf_path, subcarpeta, paginas, cache, compactar, backup_delta,
+                            log, avance, verificar_cancelacion, fases, registro)
+    except ErrorBorrado as e:
+        registrar("borrado", log=log, resultado="bloqueado" if e.bloqueado else "error",
+                  fase=e.fase, error=str(e.causa), segundos=round(time.monotonic() - inicio, 3),
+                  fases=fases.datos, **registro)
+        raise
+    except Exception as e:
+        # Cancelación del operador u otro corte antes de escribir
+        registrar("borrado", log=log, resultado="interrumpido", error=str(e) or type(e).__name__,
+                  segundos=round(time.monotonic() - inicio, 3), fases=fases.datos, **registro)
+        raise
+
+    registrar("borrado", log=log, resultado="ok",
+              paginas_antes=resultado["paginas_antes"],
+              paginas_despues=resultado["paginas_despues"],
+              fojas_eliminadas=resultado["paginas_antes"] - resultado["paginas_despues"],
+              bytes_escritos=resultado["bytes_escritos"],
+              modo=resultado["modo"],
+              backup_path=resultado["backup_path"],
+              segundos=round(time.monotonic() - inicio, 3),
+              fases=fases.datos,
+              **registro)
+    return resultado
+
+
+def _borrar(pdf_path, subcarpeta, paginas, cache, compactar, backup_delta, log, avance,
+            verificar_cancelacion, fases, registro):
+    avance(5, f"{subcarpeta}: verificando...")
+    with fases.medir("verificacion"):
+        if not os.path.isfile(pdf_path):
+            raise ErrorBorrado("verificacion", FileNotFoundError(f"No existe: {pdf_path}"))
+        registro["tamanio"] = os.path.getsize(pdf_path)
+
+        escribible, motivo = archivo_escribible(pdf_path)
+        if not escribible:
+            raise ErrorBorrado("bloqueado", PermissionError(motivo))
+
+    reserva = ReservaExpediente(pdf_path, log=log)
+    with fases.medir("reserva"):
+        try:
+            reserva.adquirir()
+        except ExpedienteReservado as e:
+            raise ErrorBorrado("reservado", e)
+        except OSError as e:
+            raise ErrorBorrado("verificacion", e)
+
+    try:
+        if not backup_delta:
+            avance(10, f"{subcarpeta}: creando backup...")
+            with fases.medir("backup") as medicion:
+                try:
+                    backup_path = crear_backup(pdf_path, subcarpeta, log=log)
+                except Exception as e:
+                    raise ErrorBorrado("backup", e)
+                medicion["bytes"] = registro["tamanio"]
+            log(f"Backup creado: {backup_path}")
+
+            verificar_cancelacion()
+
+        with fases.medir("espera_cache"):
+            bloqueo = cache.bloqueo(pdf_path)
+            bloqueo.acquire()
+        try:
+            avance(40, f"{subcarpeta}: leyendo PDF...")
+            metricas = {}
+            with fases.medir("lectura") as medicion:
+                try:
+                    reader = cache.obtener(pdf_path, log=log, metricas=metricas)
+                except Exception as e:
+                    raise ErrorBorrado("lectura", e)
+                medicion["bytes"] = metricas.get("bytes", 0) if metricas.get("modo") != "cache" else 0
+            if "segundos_red" in metricas:
+                # Desglose de la lectura: traer el archivo del share vs. parsearlo
+                fases.agregar("lectura_red", metricas["segundos_red"], metricas["bytes"])
+                fases.agregar("lectura_parseo", metricas["segundos_parseo"], metricas["bytes"])
+
+            if backup_delta:
+                avance(50, f"{subcarpeta}: respaldando fojas a eliminar...")
+                with fases.medir("backup") as medicion:
+                    try:
+                        backup_path = crear_backup_delta(pdf_path, subcarpeta, reader, paginas)
+                    except Exception as e:
+                        raise ErrorBorrado("backup", e)
+                    if os.path.isfile(backup_path):
+                        medicion["bytes"] = os.path.getsize(backup_path)
+                log(f"Backup de las fojas a eliminar creado: {backup_path}")
+
+            verificar_cancelacion()
+
+            # Si la reserva venció (p.ej. el share no respondió a los
+            # latidos) y otro puesto la tomó, no se pisa su trabajo
+            try:
+                reserva.confirmar()
+            except ExpedienteReservado as e:
+                raise ErrorBorrado("reservado", e)
+
+            # A partir de acá la operación ya no se interrumpe
+            avance(70, f"{subcarpeta}: escribiendo PDF...")
+            with fases.medir("escritura") as medicion:
+                try:
+                    resultado = eliminar_paginas(pdf_path, reader, paginas, compactar=compactar, log=log)
+                except Exception as e:
+                    raise ErrorBorrado("escritura", e)
+                finally:
+                    # El contenido en disco ya no coincide con el documento cacheado
+                    cache.invalidar(pdf_path)
+                medicion["bytes"] = resultado["bytes_escritos"]
+        finally:
+            bloqueo.release()
+
+        if backup_delta:
+            with fases.medir("cierre_backup"):
+                completar_backup_delta(backup_path, resultado)
+    finally:
+        reserva.liberar()
+
+    avance(100, f"{subcarpeta}: listo")
+    resultado["backup_path"] = backup_path
+    return resultado
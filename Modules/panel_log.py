@@ -0,0 +1,127 @@
+# Modules/panel_log.py
+
+import threading
+from collections import deque
+from itertools import islice
+
+from PyQt5.QtCore import QTimer
+from PyQt5.QtGui import QTextCursor
+from PyQt5.QtWidgets import QPlainTextEdit
+
+# Líneas que quedan en el widget mientras se sigue el final del log
+LINEAS_VISIBLES = 1000
+
+# Líneas que se conservan en memoria (anillo); las más viejas se descartan
+LINEAS_HISTORIAL = 20000
+
+# Líneas anteriores que se cargan cada vez que se llega arriba de todo
+TANDA_HISTORIAL = 500
+
+# Cada cuánto se vuelcan al widget las líneas acumuladas
+INTERVALO_VOLCADO_MS = 100
+
+
+class PanelLog(QPlainTextEdit):
+    """
+    Panel de log acotado. Las líneas se guardan en un anillo de
+    LINEAS_HISTORIAL y el widget muestra sólo las últimas LINEAS_VISIBLES;
+    al llegar arriba con el scroll se cargan las anteriores de a
+    TANDA_HISTORIAL, y al volver al final se recorta de nuevo.
+
+    agregar() se puede llamar desde cualquier hilo: las líneas se acumulan
+    y se vuelcan juntas cada INTERVALO_VOLCADO_MS, con un solo repintado
+    por tanda en lugar de uno por línea.
+    """
+
+    def __init__(self, parent=None, lineas_visibles=LINEAS_VISIBLES, lineas_historial=LINEAS_HISTORIAL):
+        super().__init__(parent)
+        self.setReadOnly(True)
+        self.setUndoRedoEnabled(False)
+        self.lineas_visibles = lineas_visibles
+        self._historial = deque(maxlen=lineas_historial)
+        # El widget muestra siempre las últimas '_mostradas' líneas del historial
+        self._mostradas = 0
+        self._pendientes = []
+        self._lock = threading.Lock()
+
+        self._timer = QTimer(self)
+        self._timer.timeout.connect(self._volcar)
+        self._timer.start(INTERVALO_VOLCADO_MS)
+        self.verticalScrollBar().valueChanged.connect(self._scroll_movido)
+
+    def agregar(self, linea):
+        """
+        Agrega un mensaje. Si tiene varias líneas, cada una se guarda por
+        separado: el widget las muestra como bloques distintos y los
+        contadores (_mostradas, recorte, historial) van en líneas de pantalla.
+        """
+        partes = linea.split("\n")
+        with self._lock:
+            self._pendientes.extend(partes)
+
+    def agregar_lineas(self, lineas):
+        partes = [parte for linea in lineas for parte in linea.split("\n")]
+        with self._lock:
+            self._pendientes.extend(partes)
+
+    def limpiar(self):
+        with self._lock:
+            self._pendientes = []
+        self._historial.clear()
+        self._mostradas = 0
+        self.clear()
+
+    def _volcar(self):
+        with self._lock:
+            if not self._pendientes:
+                return
+            lineas, self._pendientes = self._pendientes, []
+
+        barra = self.verticalScrollBar()
+        al_final = barra.value() == barra.maximum()
+
+        self._historial.extend(lineas)
+        # Si la tanda supera lo visible, sólo se agrega al widget su final
+        lineas = lineas[-max(self.lineas_visibles, 1):]
+        self.appendPlainText("\n".join(lineas))
+        self._mostradas = min(self._mostradas + len(lineas), len(self._historial))
+
+        # Leyendo historia se tolera más texto, pero sin crecer indefinidamente
+        limite = self.lineas_visibles if al_final else self.lineas_visibles * 4
+        if self._mostradas > limite:
+            self._recortar(self._mostradas - self.lineas_visibles)
+        if al_final:
+            barra.setValue(barra.maximum())
+
+    def _recortar(self, cantidad):
+        """
+        Quita las primeras 'cantidad' líneas del widget (siguen en el historial).
+        """
+        cursor = QTextCursor(self.document())
+        cursor.movePosition(QTextCursor.Start)
+        cursor.movePosition(QTextCursor.NextBlock, QTextCursor.KeepAnchor, cantidad)
+        cursor.removeSelectedText()
+        self._mostradas -= cantidad
+
+    def _scroll_movido(self, valor):
+        if valor == self.verticalScrollBar().minimum():
+            self._cargar_anteriores()
+
+    def _cargar_anteriores(self):
+        """
+        Inserta arriba la tanda anterior del historial, manteniendo a la
+        vista las mismas líneas que se estaban leyendo.
+        """
+        anteriores = len(self._historial) - self._mostradas
+        if anteriores <= 0:
+            return
+        cantidad = min(TANDA_HISTORIAL, anteriores)
+        lineas = list(islice(self._historial, anteriores - cantidad, anteriores))
+
+        cursor = QTextCursor(self.document())
+        cursor.movePosition(QTextCursor.Start)
+        cursor.insertText("\n".join(lineas) + "\n")
+        self._mostradas += cantidad
+
+        # En QPlainTextEdit el scroll vertical se mide en líneas
+        self.verticalScrollBar().setValue(cantidad)
@@ -0,0 +1,329 @@
+# Modules/planificador_escritura.py
+
+import os
+import json
+import time
+import uuid
+import random
+import socket
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+from Modules.backup_expedientes import DIR_BACKUP
+
+# Cola local de borrados que esperan que se libere el PDF
+RUTA_COLA = os.path.join(DIR_BACKUP, "escrituras_pendientes.json")
+
+# Espera entre reintentos: se duplica en cada intento, hasta el máximo
+BACKOFF_INICIAL = 30
+BACKOFF_MAXIMO = 30 * 60
+
+# Pasado este tiempo sin poder escribir, el trabajo se da por vencido
+VENCIMIENTO = 24 * 60 * 60
+
+# Un trabajo tomado ("en_curso") por un proceso que no lo terminó ni lo
+# devolvió en este tiempo (se cerró de golpe) vuelve a quedar pendiente
+RECLAMO_VENCIDO = 60 * 60
+
+# Bloqueo entre procesos de la cola (la ventana y delete_fs_batch.py
+# --pendientes usan el mismo archivo): cuánto se espera para tomarlo y a
+# partir de qué antigüedad se considera abandonado
+ESPERA_BLOQUEO = 10
+BLOQUEO_VENCIDO = 60
+
+
+def archivo_escribible(pdf_path):
+    """
+    Comprueba, sin modificarlo, si 'pdf_path' se puede abrir para escritura.
+    En Windows un visor que tiene el PDF abierto deniega el acceso de
+    escritura, y la apertura falla con PermissionError.
+    Retorna (True, None) o (False, motivo). Cualquier otro error (el PDF
+    no existe, el share no responde) se propaga: lo decide quien llama.
+    """
+    try:
+        with open(pdf_path, "r+b"):
+            pass
+    except PermissionError as e:
+        return False, str(e)
+    return True, None
+
+
+class ColaEscrituras:
+    """
+    Cola persistente (un archivo JSON) de borrados que no se pudieron
+    escribir porque el PDF estaba abierto por otro usuario.
+
+    Cada trabajo guarda lo necesario para repetir el borrado (ruta, fojas,
+    opciones, solicitante), la cantidad de intentos y cuándo toca el
+    próximo. Los reintentos se espacian con backoff exponencial.
+
+    La ventana y el lote (--pendientes) son procesos distintos sobre el
+    mismo archivo: cada lectura-modificación-escritura se hace con un
+    archivo de bloqueo (O_EXCL) tomado, y antes de ejecutar un trabajo se
+    lo reclama (estado "en_curso" con su dueño) para que nadie más lo tome.
+    """
+
+    def __init__(self, ruta=RUTA_COLA):
+        self.ruta = ruta
+        self.ruta_bloqueo = f"{ruta}.lock"
+        self.ruta_vencidos = f"{os.path.splitext(ruta)[0]}_vencidos.jsonl"
+        self.duenio = f"{socket.gethostname()}:{os.getpid()}"
+        self._lock = threading.Lock()
+
+    def encolar(self, pdf_path, subcarpeta, fojas, compactar=False, backup_delta=False,
+                solicitante="", motivo=None):
+        """
+        Agrega un trabajo y retorna su dict. Si ya había uno igual para el
+        mismo PDF y fojas, se retorna ese en lugar de duplicarlo.
+        """
+        with self._exclusivo():
+            trabajos = self._leer()
+            for trabajo in trabajos:
+                if (trabajo["pdf_path"] == pdf_path and trabajo["fojas"] == str(fojas)
+                        and trabajo["estado"] in ("pendiente", "en_curso")):
+                    return trabajo
+
+            ahora = time.time()
+            trabajo = {
+                "id": uuid.uuid4().hex,
+                "pdf_path": pdf_path,
+                "subcarpeta": subcarpeta,
+                "fojas": str(fojas),
+                "compactar": compactar,
+                "backup_delta": backup_delta,
+                "solicitante": solicitante,
+                "creado": ahora,
+                "intentos": 0,
+                "proximo_intento": ahora + _espera(0),
+                "ultimo_error": motivo,
+                "estado": "pendiente",
+            }
+            trabajos.append(trabajo)
+            self._guardar(trabajos)
+            return trabajo
+
+    def pendientes(self):
+        with self._exclusivo():
+            return [t for t in self._leer() if t["estado"] == "pendiente"]
+
+    def listos(self, ahora=None):
+        """
+        Trabajos pendientes cuyo próximo intento ya llegó. De paso devuelve
+        a pendientes los reclamos abandonados (ver RECLAMO_VENCIDO) y pasa
+        los vencidos al archivo de vencidos (ya los informó quien los
+        reprogramó), así la cola no crece indefinidamente.
+        """
+        ahora = ahora or time.time()
+        with self._exclusivo():
+            trabajos = self._leer()
+            abandonados = [
+                t for t in trabajos
+                if t["estado"] == "en_curso" and ahora - t.get("reclamado", 0) > RECLAMO_VENCIDO
+            ]
+            for trabajo in abandonados:
+                _devolver(trabajo)
+            vencidos = [t for t in trabajos if t["estado"] == "vencido"]
+            if vencidos:
+                self._archivar(vencidos)
+                trabajos = [t for t in trabajos if t["estado"] != "vencido"]
+            if abandonados or vencidos:
+                self._guardar(trabajos)
+            return [t for t in trabajos if t["estado"] == "pendiente" and t["proximo_intento"] <= ahora]
+
+    def reclamar(self, id_trabajo):
+        """
+        Marca el trabajo como "en_curso" a nombre de este proceso y lo
+        retorna. Si ya no está pendiente (otro proceso lo tomó, lo terminó
+        o lo descartó) retorna None y no hay que ejecutarlo.
+        """
+        with self._exclusivo():
+            trabajos = self._leer()
+            trabajo = _buscar(trabajos, id_trabajo)
+            if trabajo is None or trabajo["estado"] != "pendiente":
+                return None
+            trabajo["estado"] = "en_curso"
+            trabajo["duenio"] = self.duenio
+            trabajo["reclamado"] = time.time()
+            self._guardar(trabajos)
+            return trabajo
+
+    def liberar(self, id_trabajo):
+        """
+        Devuelve a pendiente un trabajo que este proceso reclamó y no llegó
+        a terminar ni reprogramar (p.ej. se canceló antes de empezar).
+        """
+        with self._exclusivo():
+            trabajos = self._leer()
+            trabajo = _buscar(trabajos, id_trabajo)
+            if trabajo is None or trabajo["estado"] != "en_curso" or trabajo.get("duenio") != self.duenio:
+                return
+            _devolver(trabajo)
+            self._guardar(trabajos)
+
+    def reprogramar(self, id_trabajo, motivo):
+        """
+        Registra un intento fallido y calcula el próximo. Si el trabajo ya
+        superó el vencimiento queda en estado "vencido". Retorna el trabajo,
+        o None si ya no está en la cola.
+        """
+        with self._exclusivo():
+            trabajos = self._leer()
+            trabajo = _buscar(trabajos, id_trabajo)
+            if trabajo is None:
+                return None
+            ahora = time.time()
+            _devolver(trabajo)
+            trabajo["intentos"] += 1
+            trabajo["ultimo_error"] = motivo
+            if ahora - trabajo["creado"] > VENCIMIENTO:
+                trabajo["estado"] = "vencido"
+            else:
+                trabajo["proximo_intento"] = ahora + _espera(trabajo["intentos"])
+            self._guardar(trabajos)
+            return trabajo
+
+    def completar(self, id_trabajo):
+        """
+        Quita de la cola un trabajo que se escribió con éxito.
+        """
+        self._quitar(id_trabajo)
+
+    def descartar(self, id_trabajo):
+        """
+        Quita de la cola un trabajo que falló por otro motivo (no reintentable).
+        """
+        self._quitar(id_trabajo)
+
+    def _quitar(self, id_trabajo):
+        with self._exclusivo():
+            trabajos = self._leer()
+            restantes = [t for t in trabajos if t["id"] != id_trabajo]
+            if len(restantes) != len(trabajos):
+                self._guardar(restantes)
+
+    @contextmanager
+    def _exclusivo(self):
+        """
+        Bloqueo entre hilos (threading.Lock) y entre procesos (archivo
+        .lock creado con O_EXCL). Un .lock más viejo que BLOQUEO_VENCIDO
+        quedó de un proceso que se cerró de golpe: se aparta renombrándolo
+        (sólo un proceso gana el rename) y se vuelve a intentar.
+        """
+        with self._lock:
+            carpeta = os.path.dirname(self.ruta_bloqueo)
+            if carpeta:
+                os.makedirs(carpeta, exist_ok=True)
+            limite = time.monotonic() + ESPERA_BLOQUEO
+            while True:
+                try:
+                    fd = os.open(self.ruta_bloqueo, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                    break
+                except FileExistsError:
+                    self._apartar_bloqueo_vencido()
+                    if time.monotonic() > limite:
+                        raise RuntimeError("La cola de borrados pendientes está bloqueada por otro proceso.")
+                    time.sleep(0.05)
+            try:
+                try:
+                    os.write(fd, self.duenio.encode("utf-8"))
+                finally:
+                    os.close(fd)
+                yield
+            finally:
+                try:
+                    os.remove(self.ruta_bloqueo)
+                except OSError:
+                    pass
+
+    def _apartar_bloqueo_vencido(self):
+        try:
+            if time.time() - os.path.getmtime(self.ruta_bloqueo) <= BLOQUEO_VENCIDO:
+                return
+            apartado = f"{self.ruta_bloqueo}.{uuid.uuid4().hex}"
+            os.replace(self.ruta_bloqueo, apartado)
+            os.remove(apartado)
+        except OSError:
+            pass
+
+    def _archivar(self, trabajos):
+        """
+        Agrega 'trabajos' (uno por línea) al archivo de vencidos, que queda
+        como registro de los borrados que nunca se pudieron hacer.
+        """
+        with open(self.ruta_vencidos, "a", encoding="utf-8") as f:
+            for trabajo in trabajos:
+                f.write(json.dumps(trabajo, ensure_ascii=False) + "\n")
+
+    def _leer(self):
+        if not os.path.isfile(self.ruta):
+            return []
+        try:
+            with open(self.ruta, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except ValueError:
+            return []
+
+    def _guardar(self, trabajos):
+        carpeta = os.path.dirname(self.ruta)
+        if carpeta:
+            os.makedirs(carpeta, exist_ok=True)
+        fd, ruta_temp = tempfile.mkstemp(dir=carpeta or ".", prefix="escrituras_", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(trabajos, f, ensure_ascii=False, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(ruta_temp, self.ruta)
+        except BaseException:
+            try:
+                os.remove(ruta_temp)
+            except OSError:
+                pass
+            raise
+
+
+def _buscar(trabajos, id_trabajo):
+    for trabajo in trabajos:
+        if trabajo["id"] == id_trabajo:
+            return trabajo
+    return None
+
+
+def _devolver(trabajo):
+    """
+    Deja el trabajo pendiente, sin dueño.
+    """
+    trabajo["estado"] = "pendiente"
+    trabajo.pop("duenio", None)
+    trabajo.pop("reclamado", None)
+
+
+def _espera(intentos):
+    """
+    Segundos hasta el próximo intento, con un 20% de variación para que
+    varios trabajos bloqueados no reintenten todos a la vez.
+    """
+    base = min(BACKOFF_MAXIMO, BACKOFF_INICIAL * (2 ** intentos))
+    return base * random.uniform(0.8, 1.2)
+
+
+def describir_trabajo(trabajo):
+    creado = datetime.fromtimestamp(trabajo["creado"]).strftime("%Y-%m-%d %H:%M:%S")
+    return (f"{trabajo['subcarpeta']} fojas {trabajo['fojas']} "
+            f"(en cola desde {creado}, {trabajo['intentos']} reintentos)")
+
+
+_colas = {}
+_lock_colas = threading.Lock()
+
+
+def obtener_cola(ruta=RUTA_COLA):
+    """
+    Retorna la ColaEscrituras de 'ruta' (una por archivo y proceso).
+    """
+    with _lock_colas:
+        if ruta not in _colas:
+            _colas[ruta] = ColaEscrituras(ruta)
+        return _colas[ruta]
@@ -0,0 +1,28 @@
+# Modules/portada_expediente.py
+
+def extraer_datos_portada(reader):
+    """
+    Lee la primera página del documento y busca los datos:
+      Nro, Iniciado y Extracto
+    El texto sale de la página 0 del mismo 'reader' (el de CachePDF), sin
+    volver a abrir ni copiar el documento.
+    Retorna un dict con esas claves ("-" si no se encontró el dato),
+    o None si el PDF no contiene páginas.
+    """
+    if len(reader.pages) == 0:
+        return None
+
+    text = reader.pages[0].extract_text() or ""
+
+    datos = {"nro": "-", "iniciado": "-", "extracto": "-"}
+
+    for line in text.split("\n"):
+        line = line.strip()
+        if line.startswith("Nro:"):
+            datos["nro"] = line.replace("Nro:", "").strip()
+        elif line.startswith("Iniciado:"):
+            datos["iniciado"] = line.replace("Iniciado:", "").strip()
+        elif line.startswith("Extracto:"):
+            datos["extracto"] = line.replace("Extracto:", "").strip()
+
+    return datos
@@ -0,0 +1,88 @@
+# Modules/rangos_fojas.py
+
+import re
+from bisect import bisect_right
+
+
+class RangosFojas:
+    """
+    Conjunto de fojas guardado como lista ordenada de intervalos cerrados
+    disjuntos, p.ej. "3-5,12,40-42" -> [(3, 5), (12, 12), (40, 42)].
+    Los intervalos superpuestos o contiguos se unen al construirlo.
+    """
+
+    def __init__(self, intervalos=()):
+        self.intervalos = self._normalizar(intervalos)
+        self._inicios = [inicio for inicio, _ in self.intervalos]
+
+    @staticmethod
+    def _normalizar(intervalos):
+        unidos = []
+        for inicio, fin in sorted(intervalos):
+            if unidos and inicio <= unidos[-1][1] + 1:
+                unidos[-1] = (unidos[-1][0], max(unidos[-1][1], fin))
+            else:
+                unidos.append((inicio, fin))
+        return unidos
+
+    @classmethod
+    def parsear(cls, texto):
+        """
+        Convierte un texto como "3-5, 12, 40-42" (separado por comas o punto
+        y coma) en un RangosFojas. Lanza ValueError si el formato no es válido.
+        """
+        partes = [p.strip() for p in re.split(r"[,;]", str(texto)) if p.strip()]
+        if not partes:
+            raise ValueError("No se indicaron fojas.")
+
+        intervalos = []
+        for parte in partes:
+            coincidencia = re.fullmatch(r"(\d+)\s*(?:-\s*(\d+))?", parte)
+            if not coincidencia:
+                raise ValueError(
+                    f"Formato de fojas incorrecto en '{parte}'. "
+                    f"Usa rangos separados por coma, ej: 3-5,12,40-42."
+                )
+            inicio = int(coincidencia.group(1))
+            fin = int(coincidencia.group(2) or inicio)
+            if inicio <= 0 or fin <= 0:
+                raise ValueError("Los números de página deben ser positivos.")
+            if inicio > fin:
+                raise ValueError(f"El rango de fojas '{parte}' es inválido (inicio > fin).")
+            intervalos.append((inicio, fin))
+
+        return cls(intervalos)
+
+    def recortar(self, total_paginas):
+        """
+        Retorna un RangosFojas con sólo las fojas que existen en un documento
+        de 'total_paginas' páginas.
+        """
+        return RangosFojas(
+            (inicio, min(fin, total_paginas))
+            for inicio, fin in self.intervalos
+            if inicio <= total_paginas
+        )
+
+    def __contains__(self, foja):
+        posicion = bisect_right(self._inicios, foja) - 1
+        return posicion >= 0 and foja <= self.intervalos[posicion][1]
+
+    def __len__(self):
+        return sum(fin - inicio + 1 for inicio, fin in self.intervalos)
+
+    def __iter__(self):
+        for inicio, fin in self.intervalos:
+            yield from range(inicio, fin + 1)
+
+    def __eq__(self, otro):
+        return isinstance(otro, RangosFojas) and self.intervalos == otro.intervalos
+
+    def __str__(self):
+        return ",".join(
+            str(inicio) if inicio == fin else f"{inicio}-{fin}"
+            for inicio, fin in self.intervalos
+        )
+
+    def __repr__(self):
+        return f"RangosFojas('{self}')"
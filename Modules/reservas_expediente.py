@@ -0,0 +1,234 @@
+# Modules/reservas_expediente.py
+
+import os
+import json
+import time
+import uuid
+import socket
+import getpass
+import threading
+from datetime import datetime
+
+# Una reserva sin latido durante este tiempo se considera abandonada
+TTL_RESERVA = 120
+
+# Cada cuánto el titular renueva el latido de su reserva
+INTERVALO_LATIDO = 30
+
+
+class ExpedienteReservado(Exception):
+    """
+    Otro operador (u otro proceso) tiene reservado el expediente.
+    'titular' es el contenido de su archivo de reserva.
+    """
+    def __init__(self, titular):
+        super().__init__(f"Expediente reservado por {describir_titular(titular)}")
+        self.titular = titular
+
+
+def ruta_reserva(pdf_path):
+    """
+    El archivo de reserva vive junto al PDF, en la carpeta del expediente,
+    así lo ven todos los puestos que trabajan sobre el share.
+    """
+    return f"{pdf_path}.reserva"
+
+
+def describir_titular(titular):
+    desde = "?"
+    if titular.get("adquirida"):
+        desde = datetime.fromtimestamp(titular["adquirida"]).strftime("%H:%M:%S")
+    return f"{titular.get('usuario', '?')} en {titular.get('equipo', '?')} (desde {desde})"
+
+
+def leer_reserva(pdf_path, ahora=None):
+    """
+    Datos de la reserva vigente de 'pdf_path', o None si no hay ninguna o
+    ya venció (su titular dejó de renovarla).
+    """
+    titular = _leer(ruta_reserva(pdf_path))
+    if titular is None or _vencida(titular, ahora):
+        return None
+    return titular
+
+
+def _leer(ruta):
+    try:
+        with open(ruta, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError):
+        # Recién creado (todavía vacío) o ilegible: vale como reserva de un
+        # titular desconocido hasta que pase el TTL desde su última modificación
+        try:
+            return {"latido": os.path.getmtime(ruta)}
+        except OSError:
+            return None
+
+
+def _vencida(titular, ahora=None):
+    ahora = ahora or time.time()
+    return ahora - titular.get("latido", 0) > titular.get("ttl", TTL_RESERVA)
+
+
+def _escribir(ruta, datos):
+    ruta_temp = f"{ruta}.{uuid.uuid4().hex[:8]}.tmp"
+    with open(ruta_temp, "w", encoding="utf-8") as f:
+        json.dump(datos, f, ensure_ascii=False)
+    os.replace(ruta_temp, ruta)
+
+
+def _borrar(ruta):
+    try:
+        os.remove(ruta)
+    except OSError:
+        pass
+
+
+class ReservaExpediente:
+    """
+    Reserva exclusiva de un expediente entre puestos de trabajo, mediante
+    un archivo <pdf>.reserva con titular (usuario, equipo, proceso), un
+    latido y un TTL.
+
+    - Se crea con O_EXCL: si ya existe y está vigente, se lanza
+      ExpedienteReservado con los datos del titular.
+    - Mientras dura, un hilo renueva el latido cada INTERVALO_LATIDO.
+    - Si el titular deja de renovarla (se colgó o se cortó la red), al
+      pasar el TTL cualquier otro puesto puede tomarla; antes de escribir,
+      el titular llama a confirmar() para no pisar al nuevo.
+
+    Se usa como context manager alrededor de las operaciones que
+    reescriben el PDF.
+    """
+
+    def __init__(self, pdf_path, ttl=TTL_RESERVA, log=None):
+        self.pdf_path = pdf_path
+        self.ruta = ruta_reserva(pdf_path)
+        self.ttl = ttl
+        self.log = log
+        self.token = uuid.uuid4().hex
+        self.perdida = False
+        self._detener = threading.Event()
+        self._hilo = None
+        self._datos = None
+
+    def adquirir(self):
+        ahora = time.time()
+        self._datos = {
+            "token": self.token,
+            "usuario": getpass.getuser(),
+            "equipo": socket.gethostname(),
+            "pid": os.getpid(),
+            "adquirida": ahora,
+            "latido": ahora,
+            "ttl": self.ttl,
+        }
+
+        try:
+            fd = os.open(self.ruta, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            self._tomar_vencida()
+        else:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self._datos, f, ensure_ascii=False)
+
+        self._hilo = threading.Thread(target=self._latir, daemon=True)
+        self._hilo.start()
+        return self
+
+    def _tomar_vencida(self):
+        """
+        Ya hay un archivo de reserva: si está vigente se respeta; si venció,
+        se aparta renombrándolo (atómico: solo un puesto logra moverlo) y se
+        vuelve a crear con O_EXCL. Si entre la lectura y el renombre otro
+        puesto ya la había tomado, lo apartado es su reserva vigente y se
+        restituye.
+        """
+        titular = _leer(self.ruta)
+        if titular is not None and not _vencida(titular):
+            raise ExpedienteReservado(titular)
+
+        apartada = f"{self.ruta}.{uuid.uuid4().hex[:8]}.vencida"
+        try:
+            os.replace(self.ruta, apartada)
+        except FileNotFoundError:
+            # Otro puesto la apartó primero: compite por crearla de nuevo
+            pass
+        else:
+            movida = _leer(apartada)
+            if movida is not None and not _vencida(movida):
+                self._restituir(apartada)
+                raise ExpedienteReservado(movida)
+            _borrar(apartada)
+            if self.log and titular:
+                self.log(f"Se toma la reserva vencida de {describir_titular(titular)}.", level="warning")
+
+        try:
+            fd = os.open(self.ruta, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            raise ExpedienteReservado(_leer(self.ruta) or {})
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(self._datos, f, ensure_ascii=False)
+
+    def _restituir(self, apartada):
+        """
+        Devuelve a su lugar una reserva vigente apartada por error. Si
+        mientras tanto se creó otra, la apartada se descarta: su titular lo
+        detecta en el próximo latido y no escribe (ver confirmar).
+        """
+        try:
+            fd = os.open(self.ruta, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except OSError:
+            _borrar(apartada)
+            return
+        try:
+            with open(apartada, "rb") as origen, os.fdopen(fd, "wb") as destino:
+                destino.write(origen.read())
+        finally:
+            _borrar(apartada)
+
+    def confirmar(self):
+        """
+        Comprueba que la reserva sigue siendo nuestra justo antes de
+        escribir el PDF. Si el latido ya la dio por perdida o el archivo
+        tiene otro titular, lanza ExpedienteReservado.
+        """
+        if not self.perdida:
+            actual = _leer(self.ruta) or {}
+            if actual.get("token") == self.token:
+                return
+            self.perdida = True
+        raise ExpedienteReservado(_leer(self.ruta) or {})
+
+    def _latir(self):
+        while not self._detener.wait(INTERVALO_LATIDO):
+            actual = _leer(self.ruta) or {}
+            if actual.get("token") != self.token:
+                self.perdida = True
+                if self.log:
+                    self.log(f"Se perdió la reserva de {self.pdf_path}.", level="warning")
+                return
+            self._datos["latido"] = time.time()
+            try:
+                _escribir(self.ruta, self._datos)
+            except OSError as e:
+                if self.log:
+                    self.log(f"No se pudo renovar la reserva de {self.pdf_path}: {e}", level="warning")
+
+    def liberar(self):
+        self._detener.set()
+        if self._hilo is not None:
+            self._hilo.join()
+            self._hilo = None
+        actual = _leer(self.ruta) or {}
+        if actual.get("token") == self.token:
+            _borrar(self.ruta)
+
+    def __enter__(self):
+        return self.adquirir()
+
+    def __exit__(self, tipo, valor, traza):
+        self.liberar()
+        return False
@@ -0,0 +1,276 @@
+# Modules/sondeo_pdf.py
+
+import io
+import os
+import re
+
+from PyPDF2.filters import FlateDecode
+from PyPDF2.generic import DictionaryObject, IndirectObject, read_object
+
+from Modules.lectura_local import leer_pdf
+
+# Bytes que se leen del final del archivo para encontrar startxref y el trailer
+TAMANIO_COLA = 4096
+
+# Tamaño inicial de cada lectura puntual; se agranda si el objeto no entra
+TAMANIO_LECTURA = 4096
+TAMANIO_LECTURA_MAX = 1024 * 1024
+
+# Límite de secciones xref que se siguen por /Prev antes de rendirse
+MAX_SECCIONES = 64
+
+
+def leer_startxref(datos_finales):
+    """
+    Devuelve el offset indicado por el último 'startxref' de los bytes
+    finales del archivo, o None si no se encuentra.
+    """
+    coincidencias = list(re.finditer(rb"startxref\s+(\d+)", datos_finales))
+    if not coincidencias:
+        return None
+    return int(coincidencias[-1].group(1))
+
+
+class SondeoFallido(Exception):
+    """
+    El archivo no se pudo interpretar sólo con lecturas parciales.
+    """
+
+
+def sondear_pdf(pdf_path):
+    """
+    Cantidad de páginas de 'pdf_path' leyendo sólo lo necesario:
+    la cola del archivo (startxref + trailer), las entradas xref del
+    catálogo y del nodo raíz /Pages, y esos dos objetos.
+    Si el archivo tiene una estructura que el sondeo no contempla
+    (encriptado, xref dañada, etc.) se hace el parseo completo.
+
+    Retorna un dict con paginas, tamanio, lecturas, bytes_leidos y metodo
+    ("rapido" o "completo").
+    """
+    tamanio = os.path.getsize(pdf_path)
+    with open(pdf_path, "rb") as f:
+        lector = _LectorParcial(f, tamanio)
+        try:
+            paginas = lector.contar_paginas()
+            return {"paginas": paginas, "tamanio": tamanio, "lecturas": lector.lecturas,
+                    "bytes_leidos": lector.bytes_leidos, "metodo": "rapido"}
+        except Exception:
+            pass
+
+    # Parseo completo, desde una copia local traída con una sola lectura
+    reader, _ = leer_pdf(pdf_path)
+    return {"paginas": len(reader.pages), "tamanio": tamanio, "lecturas": lector.lecturas + 1,
+            "bytes_leidos": lector.bytes_leidos + tamanio, "metodo": "completo"}
+
+
+class _LectorParcial:
+    """
+    Resuelve objetos de un PDF con lecturas puntuales (seek + read) sin
+    cargar el archivo completo ni la tabla xref entera.
+    """
+
+    def __init__(self, f, tamanio):
+        self.f = f
+        self.tamanio = tamanio
+        self.lecturas = 0
+        self.bytes_leidos = 0
+        self._secciones = None
+
+    def leer(self, offset, cantidad):
+        self.lecturas += 1
+        self.f.seek(offset)
+        datos = self.f.read(cantidad)
+        self.bytes_leidos += len(datos)
+        return datos
+
+    def contar_paginas(self):
+        trailer = self.secciones()[0]["trailer"]
+        if "/Encrypt" in trailer:
+            raise SondeoFallido("documento encriptado")
+
+        catalogo = self.resolver(trailer.raw_get("/Root"))
+        pages = self.resolver(catalogo.raw_get("/Pages"))
+        if pages.get("/Type") != "/Pages":
+            raise SondeoFallido("/Pages no es un nodo de páginas")
+
+        cantidad = self.resolver(pages.raw_get("/Count"))
+        if not isinstance(cantidad, int) or cantidad < 0:
+            raise SondeoFallido("/Count inválido")
+        return int(cantidad)
+
+    def secciones(self):
+        """
+        Lista de secciones xref, de la más nueva a la más vieja. Cada una
+        guarda su trailer y cómo encontrar sus entradas; las entradas se
+        leen recién cuando se busca un objeto.
+        """
+        if self._secciones is not None:
+            return self._secciones
+
+        inicio_cola = max(0, self.tamanio - TAMANIO_COLA)
+        cola = self.leer(inicio_cola, TAMANIO_COLA)
+        offset = leer_startxref(cola)
+        # El archivo debe terminar en startxref + %%EOF: si quedó cortado, el
+        # startxref anterior describiría una versión vieja del documento
+        final = list(re.finditer(rb"startxref\s+\d+\s+%%EOF", cola))
+        if offset is None or not final or cola[final[-1].end():].strip(b"\r\n\t \x00"):
+            raise SondeoFallido("el archivo no termina en un startxref completo")
+
+        self._secciones = []
+        pendientes = [offset]
+        vistos = set()
+        while pendientes and len(self._secciones) < MAX_SECCIONES:
+            offset = pendientes.pop(0)
+            if offset in vistos or not 0 <= offset < self.tamanio:
+                continue
+            vistos.add(offset)
+            seccion = self._leer_seccion(offset)
+            self._secciones.append(seccion)
+            # En archivos híbridos /XRefStm complementa a la tabla clásica
+            for clave in ("/XRefStm", "/Prev"):
+                if clave in seccion["trailer"]:
+                    pendientes.append(int(seccion["trailer"][clave]))
+        return self._secciones
+
+    def _leer_seccion(self, offset):
+        datos = self.leer(offset, TAMANIO_LECTURA)
+        if datos.startswith(b"xref"):
+            return self._leer_tabla(offset, datos)
+        return self._leer_xref_stream(offset)
+
+    def _leer_tabla(self, offset, datos):
+        """
+        Tabla xref clásica: sólo se leen los encabezados de subsección (las
+        entradas tienen 20 bytes fijos, así que se saltean) y el trailer.
+        """
+        subsecciones = []
+        posicion = offset + 4
+        while True:
+            datos = self.leer(posicion, 64)
+            coincidencia = re.match(rb"\s*(\d+)\s+(\d+)[ \t]*\r?\n?", datos)
+            if not coincidencia:
+                break
+            primero, cantidad = int(coincidencia.group(1)), int(coincidencia.group(2))
+            inicio_entradas = posicion + coincidencia.end()
+            subsecciones.append((primero, cantidad, inicio_entradas))
+            posicion = inicio_entradas + cantidad * 20
+
+        datos = self.leer(posicion, TAMANIO_LECTURA)
+        coincidencia = re.match(rb"\s*trailer\s*", datos)
+        if not coincidencia:
+            raise SondeoFallido("tabla xref sin trailer")
+        trailer = self._parsear(posicion + coincidencia.end())
+        return {"tipo": "tabla", "trailer": trailer, "subsecciones": subsecciones}
+
+    def _leer_xref_stream(self, offset):
+        objeto = self._leer_objeto_en(offset)
+        if not hasattr(objeto, "get_data") or objeto.get("/Type") != "/XRef":
+            raise SondeoFallido("startxref no apunta a una xref")
+        datos = _decodificar(objeto)
+
+        anchos = [int(w) for w in objeto["/W"]]
+        indice = [int(n) for n in objeto.get("/Index", [0, objeto["/Size"]])]
+        entradas = {}
+        posicion = 0
+        ancho_fila = sum(anchos)
+        for primero, cantidad in zip(indice[0::2], indice[1::2]):
+            for numero in range(primero, primero + cantidad):
+                fila = datos[posicion:posicion + ancho_fila]
+                posicion += ancho_fila
+                campos = []
+                inicio = 0
+                for ancho in anchos:
+                    campos.append(int.from_bytes(fila[inicio:inicio + ancho], "big") if ancho else None)
+                    inicio += ancho
+                tipo = 1 if campos[0] is None else campos[0]
+                entradas[numero] = (tipo, campos[1], campos[2] or 0)
+        return {"tipo": "stream", "trailer": objeto, "entradas": entradas}
+
+    def _buscar_entrada(self, numero):
+        for seccion in self.secciones():
+            if seccion["tipo"] == "stream":
+                entrada = seccion["entradas"].get(numero)
+                if entrada is not None:
+                    return entrada
+                continue
+            for primero, cantidad, inicio_entradas in seccion["subsecciones"]:
+                if primero <= numero < primero + cantidad:
+                    fila = self.leer(inicio_entradas + (numero - primero) * 20, 20)
+                    coincidencia = re.match(rb"(\d{10}) (\d{5}) ([nf])", fila)
+                    if not coincidencia:
+                        raise SondeoFallido("entrada xref ilegible")
+                    if coincidencia.group(3) == b"f":
+                        return (0, 0, 0)
+                    return (1, int(coincidencia.group(1)), int(coincidencia.group(2)))
+        raise SondeoFallido(f"objeto {numero} no encontrado en las xref")
+
+    def resolver(self, valor):
+        if not isinstance(valor, IndirectObject):
+            return valor
+        tipo, campo1, campo2 = self._buscar_entrada(valor.idnum)
+        if tipo == 1:
+            return self._leer_objeto_en(campo1)
+        if tipo == 2:
+            return self._leer_de_object_stream(campo1, campo2)
+        raise SondeoFallido(f"objeto {valor.idnum} libre")
+
+    def _leer_objeto_en(self, offset):
+        datos = self.leer(offset, 64)
+        coincidencia = re.match(rb"\s*\d+\s+\d+\s+obj\s*", datos)
+        if not coincidencia:
+            raise SondeoFallido("no hay un objeto en el offset indicado")
+        return self._parsear(offset + coincidencia.end())
+
+    def _parsear(self, offset):
+        """
+        Parsea el objeto que empieza en 'offset', agrandando la lectura
+        mientras quede cortado.
+        """
+        cantidad = TAMANIO_LECTURA
+        while True:
+            datos = self.leer(offset, cantidad)
+            al_final = offset + cantidad >= self.tamanio
+            try:
+                flujo = io.BytesIO(datos)
+                objeto = read_object(flujo, None)
+                # PyPDF2 devuelve a medias un diccionario o array cortado (p.ej.
+                # un /Kids de mil páginas): si el parseo llegó al final de lo
+                # leído, el objeto puede seguir más adelante
+                if flujo.tell() < len(datos) or al_final:
+                    return objeto
+            except Exception:
+                pass
+            if cantidad >= TAMANIO_LECTURA_MAX or al_final:
+                raise SondeoFallido("objeto ilegible")
+            cantidad *= 4
+
+    def _leer_de_object_stream(self, numero_stream, indice):
+        stream = self.resolver(IndirectObject(numero_stream, 0, None))
+        datos = _decodificar(stream)
+        primero = int(stream["/First"])
+        cabecera = datos[:primero].split()
+        offset_relativo = int(cabecera[indice * 2 + 1])
+        return read_object(io.BytesIO(datos[primero + offset_relativo:]), None)
+
+
+def _decodificar(stream):
+    """
+    Datos de un stream sin comprimir o con FlateDecode (con o sin predictor).
+    """
+    datos = stream._data
+    filtro = stream.get("/Filter")
+    if filtro is None:
+        return datos
+    if isinstance(filtro, list):
+        if len(filtro) != 1:
+            raise SondeoFallido("stream con varios filtros")
+        filtro = filtro[0]
+    if filtro != "/FlateDecode":
+        raise SondeoFallido(f"filtro no soportado: {filtro}")
+    parametros = stream.get("/DecodeParms")
+    if isinstance(parametros, list):
+        parametros = parametros[0] if parametros else None
+    if isinstance(parametros, DictionaryObject) or parametros is None:
+        return FlateDecode.decode(datos, parametros)
+    raise SondeoFallido("parámetros de decodificación no soportados")
@@ -0,0 +1,173 @@
+# Modules/visor_log.py
+
+from bisect import bisect_left
+
+from PyQt5.QtCore import QTimer
+from PyQt5.QtWidgets import (
+    QDialog, QLabel, QLineEdit, QComboBox, QPushButton, QHBoxLayout, QVBoxLayout
+)
+
+from Modules.panel_log import PanelLog
+from Modules.indice_log import obtener_indice_log
+from Modules.workers_pdf import GestorTareas, TareaPDF
+
+# Cada cuánto se buscan entradas nuevas al final del archivo
+INTERVALO_SEGUIMIENTO_MS = 2000
+
+# Entradas que se muestran al aplicar un filtro (las más recientes)
+MAXIMO_RESULTADOS = 5000
+
+NIVELES = ["", "INFO", "WARNING", "ERROR"]
+
+
+class VisorLog(QDialog):
+    """
+    Ventana para consultar borrado_fojas.log filtrando por expediente,
+    nivel y fecha. Usa el IndiceLog del archivo (offsets por entrada), así
+    que filtrar no recorre el archivo, y mientras está abierta agrega las
+    entradas nuevas que cumplen el filtro.
+
+    Indexar y leer el archivo se hace en tareas de lectura (de a una por
+    vez): la ventana no se congela si el índice todavía se está armando.
+    """
+
+    def __init__(self, parent=None, ruta_log=None, expediente=""):
+        super().__init__(parent)
+        self.setWindowTitle("Log de borrado de fojas")
+        self.resize(1000, 500)
+        self.indice = obtener_indice_log(ruta_log) if ruta_log else obtener_indice_log()
+        self._filtros = {}
+        self._siguiente = 0
+        self.gestor = GestorTareas(self)
+        self._tarea = None
+        self._refiltrar = False
+
+        self.input_expediente = QLineEdit(expediente)
+        self.input_expediente.setPlaceholderText("E-000000-AAAA")
+        self.combo_nivel = QComboBox()
+        self.combo_nivel.addItems(NIVELES)
+        self.input_fecha = QLineEdit()
+        self.input_fecha.setPlaceholderText("AAAA-MM-DD")
+        self.btn_filtrar = QPushButton("Filtrar")
+        self.btn_filtrar.clicked.connect(self.aplicar_filtros)
+        self.input_expediente.returnPressed.connect(self.aplicar_filtros)
+        self.input_fecha.returnPressed.connect(self.aplicar_filtros)
+        self.label_cantidad = QLabel("")
+
+        filtros = QHBoxLayout()
+        filtros.addWidget(QLabel("Expediente:"))
+        filtros.addWidget(self.input_expediente)
+        filtros.addWidget(QLabel("Nivel:"))
+        filtros.addWidget(self.combo_nivel)
+        filtros.addWidget(QLabel("Fecha:"))
+        filtros.addWidget(self.input_fecha)
+        filtros.addWidget(self.btn_filtrar)
+        filtros.addWidget(self.label_cantidad)
+
+        self.panel = PanelLog(self, lineas_historial=MAXIMO_RESULTADOS)
+
+        layout = QVBoxLayout(self)
+        layout.addLayout(filtros)
+        layout.addWidget(self.panel)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.seguir_final)
+        self.timer.start(INTERVALO_SEGUIMIENTO_MS)
+        self.finished.connect(self.timer.stop)
+
+        self.aplicar_filtros()
+
+    def aplicar_filtros(self):
+        self._filtros = {
+            "expediente": self.input_expediente.text().strip(),
+            "nivel": self.combo_nivel.currentText(),
+            "fecha": self.input_fecha.text().strip(),
+        }
+        if self._tarea is not None:
+            # Se filtra de nuevo cuando termine la lectura en curso
+            self._refiltrar = True
+            return
+        self.label_cantidad.setText("Buscando...")
+        self._ejecutar(self._tarea_filtrar, dict(self._filtros))
+
+    def seguir_final(self):
+        """
+        (Timer) Indexa lo agregado al log y muestra las entradas nuevas que
+        cumplen el filtro actual.
+        """
+        if self._tarea is not None:
+            return
+        self._ejecutar(self._tarea_seguir, dict(self._filtros), self._siguiente)
+
+    def _ejecutar(self, funcion, *args):
+        tarea = TareaPDF(funcion, *args)
+        tarea.senales.terminado.connect(self._lectura_terminada)
+        tarea.senales.fallido.connect(self._lectura_fallida)
+        tarea.senales.finalizado.connect(self._lectura_finalizada)
+        self._tarea = tarea
+        self.gestor.ejecutar(tarea, cola="lectura")
+
+    def _tarea_filtrar(self, tarea, filtros):
+        """
+        (Hilo de trabajo) Entradas que cumplen 'filtros', hasta
+        MAXIMO_RESULTADOS de las más recientes.
+        """
+        self.indice.actualizar()
+        hasta = len(self.indice)
+        indices = _anteriores(self.indice.filtrar(**filtros), hasta)
+        return {
+            "filtros": filtros,
+            "reemplazar": True,
+            "lineas": self.indice.leer(indices[-MAXIMO_RESULTADOS:]),
+            "cantidad": len(indices),
+            "siguiente": hasta,
+        }
+
+    def _tarea_seguir(self, tarea, filtros, siguiente):
+        """
+        (Hilo de trabajo) Entradas nuevas desde 'siguiente' que cumplen
+        'filtros'. Si el archivo se rotó o se vació, se vuelve a filtrar
+        desde cero.
+        """
+        if not self.indice.actualizar():
+            return None
+        hasta = len(self.indice)
+        if hasta < siguiente:
+            return self._tarea_filtrar(tarea, filtros)
+        nuevas = _anteriores(self.indice.filtrar(desde=siguiente, **filtros), hasta)
+        return {
+            "filtros": filtros,
+            "reemplazar": False,
+            "lineas": self.indice.leer(nuevas),
+            "siguiente": hasta,
+        }
+
+    def _lectura_terminada(self, resultado):
+        """
+        (Hilo de la interfaz) Muestra lo leído, salvo que los filtros hayan
+        cambiado mientras tanto (se vuelve a filtrar al terminar).
+        """
+        if resultado is None or resultado["filtros"] != self._filtros:
+            return
+        if resultado["reemplazar"]:
+            self.panel.limpiar()
+            self.label_cantidad.setText(f"{resultado['cantidad']} entradas")
+        self.panel.agregar_lineas(resultado["lineas"])
+        self._siguiente = resultado["siguiente"]
+
+    def _lectura_fallida(self, titulo, mensaje, detalle_log, advertencia):
+        self.label_cantidad.setText(f"No se pudo leer el log: {mensaje}")
+
+    def _lectura_finalizada(self, tarea):
+        self._tarea = None
+        if self._refiltrar:
+            self._refiltrar = False
+            self.aplicar_filtros()
+
+
+def _anteriores(indices, hasta):
+    """
+    Los 'indices' (ordenados) menores que 'hasta': lo indexado por otro
+    hilo después de medir el índice se muestra en la próxima vuelta.
+    """
+    return indices[:bisect_left(indices, hasta)]
@@ -0,0 +1,167 @@
+# Modules/workers_pdf.py
+
+import threading
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+
+class TareaCancelada(Exception):
+    """
+    Se lanza dentro de una tarea cuando el operador pidió cancelarla.
+    """
+
+
+class ErrorTarea(Exception):
+    """
+    Error esperado de una tarea, con el título y mensaje que se muestran
+    al operador. 'detalle_log' permite registrar un texto distinto en el log
+    y 'advertencia' indica que alcanza con un aviso en lugar de un error.
+    """
+    def __init__(self, titulo, mensaje, detalle_log=None, advertencia=False):
+        super().__init__(mensaje)
+        self.titulo = titulo
+        self.mensaje = mensaje
+        self.detalle_log = detalle_log or mensaje
+        self.advertencia = advertencia
+
+
+class SenalesTarea(QObject):
+    """
+    Señales de una tarea. Se emiten desde el hilo de trabajo y Qt las
+    entrega en el hilo de la interfaz.
+    """
+    log = pyqtSignal(str, str)                 # mensaje, nivel
+    progreso = pyqtSignal(int, str)            # porcentaje, descripción
+    terminado = pyqtSignal(object)             # resultado de la función
+    fallido = pyqtSignal(str, str, str, bool)  # título, mensaje, detalle_log, advertencia
+    cancelado = pyqtSignal()
+    finalizado = pyqtSignal(object)            # la tarea, siempre al terminar
+
+
+class TareaPDF(QRunnable):
+    """
+    Ejecuta funcion(tarea, *args) en un hilo del pool. La función usa
+    tarea.log(), tarea.progreso() y tarea.verificar_cancelacion() para
+    comunicarse con la interfaz sin tocar widgets directamente.
+    """
+    def __init__(self, funcion, *args, titulo_error="Error"):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.funcion = funcion
+        self.args = args
+        self.titulo_error = titulo_error
+        self.senales = SenalesTarea()
+        self._cancelada = threading.Event()
+        self._iniciada = threading.Event()
+
+    def cancelar(self):
+        self._cancelada.set()
+
+    def cancelada(self):
+        return self._cancelada.is_set()
+
+    def iniciada(self):
+        """
+        False mientras la tarea sigue esperando su turno en el pool.
+        """
+        return self._iniciada.is_set()
+
+    def verificar_cancelacion(self):
+        if self._cancelada.is_set():
+            raise TareaCancelada()
+
+    def log(self, mensaje, level="info"):
+        self.senales.log.emit(mensaje, level)
+
+    def progreso(self, porcentaje, descripcion=""):
+        self.senales.progreso.emit(porcentaje, descripcion)
+
+    def run(self):
+        self._iniciada.set()
+        try:
+            self.verificar_cancelacion()
+            resultado = self.funcion(self, *self.args)
+        except TareaCancelada:
+            self.senales.cancelado.emit()
+        except ErrorTarea as e:
+            self.senales.fallido.emit(e.titulo, e.mensaje, e.detalle_log, e.advertencia)
+        except Exception as e:
+            self.senales.fallido.emit(self.titulo_error, str(e), str(e), False)
+        else:
+            self.senales.terminado.emit(resultado)
+        finally:
+            self.senales.finalizado.emit(self)
+
+
+class GestorTareas(QObject):
+    """
+    Colas de trabajo de la aplicación:
+      - "lectura": búsquedas y lecturas, en paralelo.
+      - "escritura": backup + borrado, de a una y en orden de llegada.
+      - "correo": notificaciones, de a una para no pisar la sesión de Outlook.
+      - "precarga": lecturas especulativas mientras el operador tipea, de a
+        una. No cuentan como operaciones pendientes: el operador no las pidió.
+    Con contar=False una tarea de cualquier cola tampoco cuenta (tareas
+    periódicas de mantenimiento, como revisar la cola de borrados).
+    Mantiene la referencia a cada tarea hasta que termina.
+    """
+    cantidad_cambiada = pyqtSignal(int)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._pools = {
+            "lectura": QThreadPool(self),
+            "escritura": QThreadPool(self),
+            "correo": QThreadPool(self),
+            "precarga": QThreadPool(self),
+        }
+        self._pools["lectura"].setMaxThreadCount(2)
+        self._pools["escritura"].setMaxThreadCount(1)
+        self._pools["correo"].setMaxThreadCount(1)
+        self._pools["precarga"].setMaxThreadCount(1)
+        self._activas = set()
+        self._precargas = set()
+        self._internas = set()
+
+    def ejecutar(self, tarea, cola="lectura", contar=True):
+        if cola == "precarga" or not contar:
+            sin_contar = self._precargas if cola == "precarga" else self._internas
+            sin_contar.add(tarea)
+            tarea.senales.finalizado.connect(sin_contar.discard)
+            self._pools[cola].start(tarea)
+            return
+        self._activas.add(tarea)
+        tarea.senales.finalizado.connect(self._liberar)
+        self._pools[cola].start(tarea)
+        self.cantidad_cambiada.emit(len(self._activas))
+
+    def pendientes(self):
+        return len(self._activas)
+
+    def cancelar_precargas(self):
+        """
+        Cancela las lecturas especulativas (p.ej. al cerrar la ventana, para
+        no esperar a que terminen).
+        """
+        for tarea in list(self._precargas):
+            tarea.cancelar()
+
+    def cancelar_todo(self):
+        """
+        Marca como canceladas todas las tareas. Las que están en cola no llegan
+        a ejecutarse; las que están corriendo se detienen en el próximo punto
+        seguro (nunca a mitad de una escritura).
+        """
+        for tarea in list(self._activas):
+            tarea.cancelar()
+
+    def esperar(self):
+        """
+        Bloquea hasta que terminen todas las tareas (se usa al cerrar la ventana).
+        """
+        for pool in self._pools.values():
+            pool.waitForDone()
+
+    def _liberar(self, tarea):
+        self._activas.discard(tarea)
+        self.cantidad_cambiada.emit(len(self._activas))
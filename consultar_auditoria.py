@@ -0,0 +1,137 @@
+"""
+Consultas sobre la auditoría de borrados (auditoria/AAAA-MM-DD.jsonl).
+
+Cada borrado (desde la ventana, el lote o la cola de pendientes) deja un
+registro JSON con expediente, fojas, páginas antes y después, bytes
+escritos, duración y resultado. Este comando filtra y totaliza esos
+registros leyendo sólo los archivos diarios del período pedido.
+
+Uso:
+    # ¿Cuántas fojas se borraron de expedientes 2025 el mes pasado?
+    python consultar_auditoria.py --mes anterior --anio 2025
+
+    # Totales por usuario en un período, incluyendo los que fallaron
+    python consultar_auditoria.py --desde 2025-03-01 --hasta 2025-03-15 --agrupar usuario --resultado todos
+
+    # Historial de un expediente
+    python consultar_auditoria.py --expediente E-006666-2025 --detalle
+"""
+import sys
+import json
+import argparse
+from collections import OrderedDict
+
+from Modules.auditoria import DIR_AUDITORIA, agregar_argumentos_periodo, leer_registros, periodo
+
+AGRUPACIONES = ("dia", "mes", "anio", "usuario", "equipo", "origen", "resultado", "modo")
+
+
+def clave_de(registro, agrupar):
+    if agrupar == "dia":
+        return registro["momento"][:10]
+    if agrupar == "mes":
+        return registro["momento"][:7]
+    if agrupar == "anio":
+        return anio_expediente(registro)
+    return str(registro.get(agrupar, ""))
+
+
+def anio_expediente(registro):
+    """
+    Año del expediente, tomado del nombre E-000000-AAAA.
+    """
+    return registro.get("expediente", "")[-4:]
+
+
+def filtrar(registros, args):
+    for registro in registros:
+        if args.resultado != "todos" and registro.get("resultado") != args.resultado:
+            continue
+        if args.anio and anio_expediente(registro) not in args.anio:
+            continue
+        if args.expediente and registro.get("expediente", "").upper() != args.expediente.upper():
+            continue
+        if args.usuario and registro.get("usuario", "").lower() != args.usuario.lower():
+            continue
+        yield registro
+
+
+def totalizar(registros, agrupar=None):
+    """
+    Totales por grupo: operaciones, fojas eliminadas, bytes escritos y
+    segundos. Sin 'agrupar' hay un único grupo "total".
+    """
+    grupos = OrderedDict()
+    for registro in registros:
+        clave = clave_de(registro, agrupar) if agrupar else "total"
+        total = grupos.setdefault(clave, {"operaciones": 0, "fojas": 0, "bytes": 0, "segundos": 0.0})
+        total["operaciones"] += 1
+        total["fojas"] += registro.get("fojas_eliminadas", 0)
+        total["bytes"] += registro.get("bytes_escritos", 0)
+        total["segundos"] += registro.get("segundos", 0.0)
+    return OrderedDict(sorted(grupos.items()))
+
+
+def mostrar_totales(grupos):
+    if not grupos:
+        print("Sin registros para el período y los filtros indicados.")
+        return
+    ancho = max(len("Grupo"), max(len(clave) for clave in grupos))
+    print(f"{'Grupo':<{ancho}}  {'Borrados':>8}  {'Fojas':>8}  {'MB escritos':>11}  {'Seg. prom.':>10}")
+    for clave, total in grupos.items():
+        promedio = total["segundos"] / total["operaciones"]
+        print(f"{clave:<{ancho}}  {total['operaciones']:>8}  {total['fojas']:>8}  "
+              f"{total['bytes'] / (1024 * 1024):>11.1f}  {promedio:>10.2f}")
+
+
+def mostrar_detalle(registros):
+    for r in registros:
+        print(f"{r['momento'][:19]}  {r.get('expediente', '')}  fojas {r.get('fojas', '')}  "
+              f"{r.get('resultado', '')}  {r.get('usuario', '')}@{r.get('equipo', '')}  "
+              f"{r.get('paginas_antes', '-')} -> {r.get('paginas_despues', '-')}  "
+              f"{r.get('error', '')}".rstrip())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Consultas sobre la auditoría de borrados de fojas.")
+    parser.add_argument("--dir", default=DIR_AUDITORIA,
+                        help=f"Carpeta de la auditoría (por defecto {DIR_AUDITORIA}).")
+    agregar_argumentos_periodo(parser)
+    parser.add_argument("--anio", action="append",
+                        help="Sólo expedientes de este año (se puede repetir).")
+    parser.add_argument("--expediente", help="Sólo este expediente (E-000000-AAAA).")
+    parser.add_argument("--usuario", help="Sólo los borrados de este usuario.")
+    parser.add_argument("--resultado", default="ok",
+                        choices=["ok", "error", "bloqueado", "interrumpido", "todos"],
+                        help="Resultado de los borrados a considerar (por defecto ok).")
+    parser.add_argument("--agrupar", choices=AGRUPACIONES,
+                        help="Totaliza por este campo (anio es el año del expediente).")
+    parser.add_argument("--detalle", action="store_true", help="Lista los registros en lugar de totalizar.")
+    parser.add_argument("--json", action="store_true", help="Salida en JSON.")
+    args = parser.parse_args(argv)
+
+    try:
+        desde, hasta = periodo(args)
+    except ValueError as e:
+        parser.error(f"Fecha inválida: {e}")
+
+    registros = filtrar(leer_registros(desde, hasta, args.dir, operacion="borrado"), args)
+
+    if args.detalle:
+        registros = list(registros)
+        if args.json:
+            print(json.dumps(registros, ensure_ascii=False, indent=2))
+        else:
+            mostrar_detalle(registros)
+        return 0
+
+    grupos = totalizar(registros, args.agrupar)
+    if args.json:
+        print(json.dumps(grupos, ensure_ascii=False, indent=2))
+    else:
+        mostrar_totales(grupos)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,25 +1,47 @@
 import sys
 import os
-import shutil
+import time
 import logging
 from datetime import datetime
-import getpass  # <<--- IMPORTANTE: Se agrega esta importación para detectar el usuario local
 
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget,
-    QLabel, QLineEdit, QPushButton, QTextEdit,
-    QVBoxLayout, QHBoxLayout, QMessageBox
+    QLabel, QLineEdit, QPushButton, QCheckBox, QProgressBar,
+    QVBoxLayout, QHBoxLayout, QMessageBox, QInputDialog
 )
-from PyQt5.QtCore import Qt
-import PyPDF2
+from PyQt5.QtCore import Qt, QTimer
 
 # Importamos el módulo de estilos
 import Modules.style_borrado_expte as style_borrado
+from Modules.cache_pdf import CachePDF
+from Modules.expedientes import construir_ruta_pdf
+from Modules.rangos_fojas import RangosFojas
+from Modules.operacion_borrado import ErrorBorrado, borrar_fojas_expediente
+from Modules.portada_expediente import extraer_datos_portada
+from Modules.motor_pdf import obtener_motor
+from Modules.indice_portadas import obtener_indice
+from Modules.sondeo_pdf import sondear_pdf
+from Modules.planificador_escritura import archivo_escribible, describir_trabajo, obtener_cola
+from Modules.reservas_expediente import describir_titular, leer_reserva
+from Modules.correo_confirmacion import correo_de
+from Modules.correo_confirmacion import consolidar_resumenes, encolar_correo_confirmacion
+from Modules.bandeja_salida import crear_transporte, despachar_pendientes, obtener_bandeja
+from Modules.auditoria import Fases, registrar
+from Modules.panel_log import PanelLog
+from Modules.indice_log import obtener_indice_log
+from Modules.visor_log import VisorLog
+from Modules.workers_pdf import ErrorTarea, GestorTareas, TareaCancelada, TareaPDF
 
-try:
-    import win32com.client as win32
-except ImportError:
-    win32 = None
+
+# Entradas del log que se muestran al terminar un borrado
+ENTRADAS_LOG_POR_EXPEDIENTE = 50
+
+# Espera desde la última tecla en número/año antes de precargar el expediente
+DEMORA_PRECARGA_MS = 400
+
+# Segundos durante los que una precarga terminada sirve como resultado de
+# "Buscar PDF" sin volver a consultar el share
+VIGENCIA_PRECARGA = 60
 
 
 class PDFManager(QMainWindow):
@@ -38,6 +60,19 @@ class PDFManager(QMainWindow):
         self.main_layout = QVBoxLayout()
         self.central_widget.setLayout(self.main_layout)
         
+        # Layout para buscar expedientes en el índice de portadas
+        self.layout_busqueda = QHBoxLayout()
+        self.label_busqueda = QLabel("Buscar expediente:")
+        self.input_busqueda = QLineEdit()
+        self.input_busqueda.setPlaceholderText("Nombre, CUIL o Nro (ej: perez juan, 20-12345678-9, 6666/2025)")
+        self.input_busqueda.returnPressed.connect(self.buscar_en_indice)
+        self.btn_buscar_indice = QPushButton("Buscar en índice")
+        self.btn_buscar_indice.clicked.connect(self.buscar_en_indice)
+        
+        self.layout_busqueda.addWidget(self.label_busqueda)
+        self.layout_busqueda.addWidget(self.input_busqueda)
+        self.layout_busqueda.addWidget(self.btn_buscar_indice)
+        
         # Layout para los campos de entrada y botones
         self.layout_inputs = QHBoxLayout()
         
@@ -54,7 +89,7 @@ class PDFManager(QMainWindow):
         # 3) Rango de fojas a borrar (por ejemplo "22-25")
         self.label_fojas = QLabel("Fojas a Eliminar:")
         self.input_fojas = QLineEdit()
-        self.input_fojas.setPlaceholderText("Ej: 22-25:")
+        self.input_fojas.setPlaceholderText("Ej: 3-5,12,40-42")
         self.input_fojas.setObjectName("input_fojas")  # Para aplicar estilo específico si se desea
         
         # 4) Solicitante (opcional)
@@ -62,6 +97,22 @@ class PDFManager(QMainWindow):
         self.input_solicitante = QLineEdit()
         self.input_solicitante.setPlaceholderText("Ej: abouvier (opcional)")
         
+        # Compactar: reescribe el PDF completo en lugar de agregar una
+        # actualización incremental (descarta físicamente las fojas borradas
+        # y unifica los objetos repetidos)
+        self.check_compactar = QCheckBox("Compactar")
+        self.check_compactar.setToolTip(
+            "Reescribe el PDF completo en lugar de anexar los cambios al final del archivo,\n"
+            "guardando una sola vez las imágenes y fuentes repetidas. El archivo queda más chico."
+        )
+        
+        # Backup delta: respalda sólo las fojas eliminadas (con manifiesto para restaurar)
+        self.check_backup_delta = QCheckBox("Backup sólo de fojas")
+        self.check_backup_delta.setToolTip(
+            "Guarda únicamente las fojas eliminadas y los datos para restaurar el original,\n"
+            "en lugar de copiar el PDF completo."
+        )
+        
         # Botón de búsqueda para mostrar cantidad de páginas
         self.btn_buscar = QPushButton("Buscar PDF")
         self.btn_buscar.clicked.connect(self.buscar_pdf)
@@ -74,6 +125,15 @@ class PDFManager(QMainWindow):
         self.btn_abrir_pdf = QPushButton("Abrir PDF")
         self.btn_abrir_pdf.clicked.connect(self.abrir_pdf)
         
+        # Botón para consultar el log filtrando por expediente, nivel o fecha
+        self.btn_ver_log = QPushButton("Ver log")
+        self.btn_ver_log.clicked.connect(self.abrir_visor_log)
+        
+        # Botón para cancelar las operaciones en cola
+        self.btn_cancelar = QPushButton("Cancelar")
+        self.btn_cancelar.clicked.connect(self.cancelar_tareas)
+        self.btn_cancelar.setEnabled(False)
+        
         # Agregar widgets al layout_inputs
         self.layout_inputs.addWidget(self.label_numero)
         self.layout_inputs.addWidget(self.input_numero)
@@ -83,35 +143,119 @@ class PDFManager(QMainWindow):
         self.layout_inputs.addWidget(self.input_fojas)
         self.layout_inputs.addWidget(self.label_solicitante)
         self.layout_inputs.addWidget(self.input_solicitante)
+        self.layout_inputs.addWidget(self.check_compactar)
+        self.layout_inputs.addWidget(self.check_backup_delta)
         
         # Agregar los botones
         self.layout_inputs.addWidget(self.btn_buscar)
         self.layout_inputs.addWidget(self.btn_realizar)
         self.layout_inputs.addWidget(self.btn_abrir_pdf)
+        self.layout_inputs.addWidget(self.btn_ver_log)
+        self.layout_inputs.addWidget(self.btn_cancelar)
         
-        # Panel de texto para mostrar logs/procesos
-        self.text_log = QTextEdit()
-        self.text_log.setReadOnly(True)
+        # Panel de texto para mostrar logs/procesos (acotado, con historial en memoria)
+        self.text_log = PanelLog()
         
         # Layout para mostrar la información de la portada
         self.info_layout = QHBoxLayout()
         self.label_info_nro = QLabel("Nro: -")       # Se actualizará según portada
         self.label_info_iniciado = QLabel("Iniciado: -")
         self.label_info_extracto = QLabel("Extracto: -")
+        # Quién tiene reservado el expediente (otro puesto borrando fojas), si alguien
+        self.label_reserva = QLabel("")
         
         self.info_layout.addWidget(self.label_info_nro)
         self.info_layout.addWidget(self.label_info_iniciado)
         self.info_layout.addWidget(self.label_info_extracto)
+        self.info_layout.addWidget(self.label_reserva)
+        
+        # Layout de estado: avance de la operación en curso y cola pendiente
+        self.status_layout = QHBoxLayout()
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setFormat("Listo")
+        self.label_pendientes = QLabel("Operaciones pendientes: 0")
+        
+        self.status_layout.addWidget(self.progress_bar)
+        self.status_layout.addWidget(self.label_pendientes)
         
         # Agregamos todo al layout principal
+        self.main_layout.addLayout(self.layout_busqueda)
         self.main_layout.addLayout(self.layout_inputs)
         self.main_layout.addLayout(self.info_layout)
+        self.main_layout.addLayout(self.status_layout)
         self.main_layout.addWidget(self.text_log)
         
+        # Ejecutor de tareas en segundo plano (PDF, red y Outlook fuera del hilo de la interfaz)
+        self.gestor_tareas = GestorTareas(self)
+        self.gestor_tareas.cantidad_cambiada.connect(self.actualizar_pendientes)
+        
+        # Caché de PDFs ya parseados (compartida por búsqueda, portada y borrado)
+        self.cache_pdf = CachePDF()
+        
+        # Precarga: mientras el operador tipea número y año se busca el PDF
+        # en segundo plano, así "Buscar PDF" ya tiene el resultado
+        self._precarga = None
+        self.timer_precarga = QTimer(self)
+        self.timer_precarga.setSingleShot(True)
+        self.timer_precarga.setInterval(DEMORA_PRECARGA_MS)
+        self.timer_precarga.timeout.connect(self.precargar)
+        self.input_numero.textChanged.connect(self.programar_precarga)
+        self.input_anio.textChanged.connect(self.programar_precarga)
+        
+        # Índice local de portadas (evita releer la portada de expedientes sin cambios)
+        self.indice_portadas = obtener_indice()
+        
+        # Borrados que esperan que otro usuario cierre el PDF (persisten entre sesiones)
+        self.cola_escrituras = obtener_cola()
+        self._revisando_cola = False
+        self.timer_cola = QTimer(self)
+        self.timer_cola.timeout.connect(self.revisar_cola_escrituras)
+        self.timer_cola.start(15 * 1000)
+        
+        # Bandeja de salida: los correos se guardan localmente y se despachan
+        # en segundo plano (también los que quedaron de sesiones anteriores)
+        self.bandeja_salida = obtener_bandeja()
+        self.transporte_correo = crear_transporte()
+        self._despacho_en_curso = False
+        self._despacho_repetir = False
+        self.timer_correo = QTimer(self)
+        self.timer_correo.timeout.connect(self.despachar_correos)
+        self.timer_correo.start(60 * 1000)
+        
         # Configurar el logger
         self.config_logger()
         
         self.print_log("Aplicación iniciada correctamente.")
+        self.print_log(f"Motor PDF: {obtener_motor().nombre}.")
+        
+        # La cola puede estar bloqueada por el lote: se consulta fuera del hilo de la interfaz
+        tarea = TareaPDF(self._tarea_contar_cola)
+        tarea.senales.log.connect(self.print_log, Qt.DirectConnection)
+        self.gestor_tareas.ejecutar(tarea, contar=False)
+        
+        # El índice del log se arma una vez en segundo plano; después sólo lee lo nuevo
+        tarea = self.crear_tarea(self._tarea_indexar_log, titulo_error="Error al leer el log")
+        self.gestor_tareas.ejecutar(tarea, cola="lectura")
+        
+        correos = self.bandeja_salida.cantidad_pendientes()
+        if correos:
+            self.print_log(f"Hay {correos} correo(s) en la bandeja de salida; se envían en segundo plano.")
+        if self.bandeja_salida.cantidad_novedades():
+            self.print_log("Hay borrados acumulados para el próximo resumen por correo.")
+            self.despachar_correos()
+    
+    def closeEvent(self, event):
+        """
+        Antes de cerrar se espera a que terminen las operaciones en curso,
+        para no dejar un PDF a medio escribir.
+        """
+        self.timer_precarga.stop()
+        self.gestor_tareas.cancelar_precargas()
+        if self.gestor_tareas.pendientes():
+            self.print_log("Esperando que terminen las operaciones en curso...", level="warning")
+        self.gestor_tareas.esperar()
+        event.accept()
     
     def config_logger(self):
         """
@@ -128,12 +272,14 @@ class PDFManager(QMainWindow):
     
     def print_log(self, message, level="info"):
         """
-        Muestra mensajes en el QTextEdit y también en el logger.
+        Muestra mensajes en el panel de log y también en el logger.
+        Se puede llamar desde un hilo de trabajo: el panel acumula las líneas
+        y las vuelca en tandas desde el hilo de la interfaz.
         """
         current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         full_message = f"[{current_time}] {message}"
         
-        self.text_log.append(full_message)
+        self.text_log.agregar(full_message)
         
         if level == "info":
             logging.info(message)
@@ -151,121 +297,476 @@ class PDFManager(QMainWindow):
         Construye la ruta del PDF en base a los valores de numero, año y letra (por ahora 'E').
         Retorna la ruta completa y el subcarpeta (base) para usarlo en backup, etc.
         """
-        numero_str = self.input_numero.text().strip()
-        anio_str = self.input_anio.text().strip()
+        return construir_ruta_pdf(self.input_numero.text(), self.input_anio.text())
+    
+    def crear_tarea(self, funcion, *args, titulo_error="Error"):
+        """
+        Crea una tarea de segundo plano con las señales comunes ya conectadas
+        (log, progreso, errores y cancelación).
+        """
+        tarea = TareaPDF(funcion, *args, titulo_error=titulo_error)
+        # El log se atiende en el hilo de la tarea: el panel lo vuelca en tandas
+        tarea.senales.log.connect(self.print_log, Qt.DirectConnection)
+        tarea.senales.progreso.connect(self.actualizar_progreso)
+        tarea.senales.fallido.connect(self.mostrar_error_tarea)
+        tarea.senales.cancelado.connect(self.tarea_cancelada)
+        return tarea
+    
+    def actualizar_progreso(self, porcentaje, descripcion):
+        """
+        Refleja en la barra el avance informado por la tarea en curso.
+        """
+        self.progress_bar.setValue(porcentaje)
+        self.progress_bar.setFormat(f"{descripcion} %p%" if descripcion else "%p%")
+    
+    def actualizar_pendientes(self, cantidad):
+        """
+        Muestra cuántas operaciones quedan en cola o en ejecución.
+        """
+        self.label_pendientes.setText(f"Operaciones pendientes: {cantidad}")
+        self.btn_cancelar.setEnabled(cantidad > 0)
+        if cantidad == 0:
+            self.progress_bar.setValue(0)
+            self.progress_bar.setFormat("Listo")
+    
+    def mostrar_error_tarea(self, titulo, mensaje, detalle_log, advertencia):
+        """
+        Registra y muestra el error con el que terminó una tarea.
+        """
+        self.print_log(detalle_log, level="error")
+        if advertencia:
+            QMessageBox.warning(self, titulo, mensaje)
+        else:
+            QMessageBox.critical(self, titulo, mensaje)
+    
+    def tarea_cancelada(self):
+        self.print_log("Operación cancelada por el operador.", level="warning")
+    
+    def cancelar_tareas(self):
+        """
+        Botón para cancelar las operaciones en cola. La que esté en curso se
+        detiene en el próximo paso seguro (nunca a mitad de la escritura).
+        """
+        self.gestor_tareas.cancelar_todo()
+        self.print_log("Se solicitó cancelar las operaciones pendientes.", level="warning")
+    
+    def buscar_pdf(self):
+        """
+        Botón para verificar si el PDF existe y mostrar la cantidad de páginas (si es posible).
+        La lectura se hace en segundo plano; el resultado llega a buscar_pdf_terminado.
+        """
+        try:
+            pdf_path, subcarpeta = self.build_pdf_path()
+        except ValueError as e:
+            QMessageBox.warning(self, "Error de datos", str(e))
+            return
         
-        if not numero_str or not anio_str:
-            raise ValueError("Falta número o año para construir la ruta.")
+        if self.usar_precarga(pdf_path):
+            return
         
-        # Asegurar que el número tenga 6 dígitos
-        try:
-            num_int = int(numero_str)  # Verifica que sea numérico
-            numero_str = f"{num_int:06d}"
-        except ValueError:
-            raise ValueError("El número de expediente debe ser un entero válido.")
+        tarea = self.crear_tarea(self._tarea_buscar_pdf, pdf_path, subcarpeta, titulo_error="Error al abrir PDF")
+        tarea.senales.terminado.connect(self.buscar_pdf_terminado)
+        self.gestor_tareas.ejecutar(tarea, cola="lectura")
+    
+    def _tarea_buscar_pdf(self, tarea, pdf_path, subcarpeta, precarga=False):
+        """
+        (Hilo de trabajo) Verifica que exista el PDF y cuenta las páginas con
+        un sondeo liviano (sólo el final del archivo y el catálogo). Si el
+        índice de portadas tiene el expediente sin cambios, trae también la portada.
+        Con precarga=True la búsqueda no se audita todavía: se audita recién
+        si el operador la usa (ver usar_precarga).
+        """
+        fases = Fases()
+        inicio = time.monotonic()
         
-        if len(anio_str) != 4 or not anio_str.isdigit():
-            raise ValueError("El año debe ser un número de 4 dígitos.")
+        tarea.progreso(10, "Buscando PDF...")
+        with fases.medir("existencia"):
+            existe = os.path.isfile(pdf_path)
+        if not existe:
+            raise ErrorTarea(
+                "Archivo no encontrado",
+                f"No existe: {pdf_path}",
+                detalle_log=f"No se encontró el archivo en la ruta: {pdf_path}",
+                advertencia=True
+            )
         
-        letra = "E"
+        try:
+            tarea.progreso(50, "Contando páginas...")
+            with fases.medir("sondeo") as medicion:
+                sondeo = sondear_pdf(pdf_path)
+                st = os.stat(pdf_path)
+                medicion["bytes"] = sondeo["bytes_leidos"]
+        except PermissionError:
+            raise ErrorTarea(
+                "Error de Permisos",
+                "Permiso denegado al intentar leer el PDF.\n"
+                "Verifica que el archivo no esté abierto y que tengas permisos de lectura."
+            )
+        except Exception as e:
+            raise ErrorTarea(
+                "Error al abrir PDF",
+                str(e),
+                detalle_log=f"Error al intentar abrir/leer el PDF: {str(e)}"
+            )
         
-        # Ruta en la red
-        root_path = r"\\fs01\Digitalizacion_Jubilaciones"
-        anio_folder = anio_str
-        letra_folder = letra
-        subcarpeta = f"{letra}-{numero_str}-{anio_str}"
+        portada = None
+        with fases.medir("indice"):
+            try:
+                portada = self.indice_portadas.obtener_vigente(subcarpeta, st)
+            except Exception as e:
+                tarea.log(f"No se pudo consultar el índice de portadas: {str(e)}", level="warning")
         
-        pdf_name = f"{subcarpeta}.pdf"
-        pdf_path = os.path.join(root_path, anio_folder, letra_folder, subcarpeta, pdf_name)
+        with fases.medir("reserva"):
+            try:
+                reserva = leer_reserva(pdf_path)
+            except OSError:
+                reserva = None
+        
+        auditoria = {
+            "expediente": subcarpeta, "pdf_path": pdf_path, "resultado": "ok",
+            "tamanio": st.st_size, "paginas": sondeo["paginas"], "metodo": sondeo["metodo"],
+            "portada_en_indice": portada is not None,
+            "segundos": round(time.monotonic() - inicio, 3), "fases": fases.datos,
+        }
+        if not precarga:
+            registrar("busqueda", log=tarea.log, **auditoria)
         
-        return pdf_path, subcarpeta
+        tarea.progreso(100, "Búsqueda completa")
+        return {
+            "pdf_path": pdf_path,
+            "subcarpeta": subcarpeta,
+            "total_pages": sondeo["paginas"],
+            "tamanio": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+            "portada": portada,
+            "reserva": reserva,
+            "auditoria": auditoria,
+        }
     
-    def buscar_pdf(self):
+    def programar_precarga(self):
         """
-        Botón para verificar si el PDF existe y mostrar la cantidad de páginas (si es posible).
+        (Cambio en número o año) Descarta la precarga de otro expediente y
+        reinicia la espera: la precarga arranca cuando el operador deja de
+        tipear y los dos campos son válidos.
         """
         try:
             pdf_path, _ = self.build_pdf_path()
-        except ValueError as e:
-            QMessageBox.warning(self, "Error de datos", str(e))
+        except ValueError:
+            pdf_path = None
+        
+        if self._precarga is not None and self._precarga["pdf_path"] != pdf_path:
+            self._precarga["tarea"].cancelar()
+            if self._precarga["tarea_cache"] is not None:
+                self._precarga["tarea_cache"].cancelar()
+            self._precarga = None
+        
+        if pdf_path is None:
+            self.timer_precarga.stop()
+        else:
+            self.timer_precarga.start()
+    
+    def precargar(self):
+        """
+        (Timer) Busca en segundo plano el expediente tipeado, igual que
+        "Buscar PDF" pero sin mostrar nada: existencia, páginas, portada del
+        índice y reserva. Después carga el documento en la caché.
+        """
+        try:
+            pdf_path, subcarpeta = self.build_pdf_path()
+        except ValueError:
             return
+        if self._precarga is not None and self._precarga["pdf_path"] == pdf_path:
+            if self._precarga["resultado"] is None or self._precarga_vigente():
+                return
         
-        if not os.path.isfile(pdf_path):
-            self.print_log(f"No se encontró el archivo en la ruta: {pdf_path}", level="error")
-            QMessageBox.warning(self, "Archivo no encontrado", f"No existe: {pdf_path}")
+        tarea = TareaPDF(self._tarea_buscar_pdf, pdf_path, subcarpeta, True)
+        tarea.senales.terminado.connect(self.precarga_terminada)
+        tarea.senales.finalizado.connect(self.precarga_finalizada)
+        self._precarga = {
+            "pdf_path": pdf_path,
+            "tarea": tarea,
+            "tarea_cache": None,
+            "resultado": None,
+            "momento": None,
+            # Momento en que se pidió "Buscar PDF" mientras la precarga seguía en curso
+            "esperando": None,
+        }
+        self.gestor_tareas.ejecutar(tarea, cola="precarga")
+    
+    def _precarga_vigente(self):
+        return time.monotonic() - self._precarga["momento"] < VIGENCIA_PRECARGA
+    
+    def precarga_terminada(self, resultado):
+        """
+        (Hilo de la interfaz) Guarda el resultado de la precarga y, si el
+        documento entra en la caché, lo carga también.
+        """
+        estado = self._precarga
+        if estado is None or estado["pdf_path"] != resultado["pdf_path"]:
             return
+        estado["resultado"] = resultado
+        estado["momento"] = time.monotonic()
         
-        # Intentar abrir y contar páginas
+        if resultado["tamanio"] <= self.cache_pdf.max_bytes and self._sigue_tipeado(resultado["pdf_path"]):
+            tarea = TareaPDF(self._tarea_precargar_documento, resultado["pdf_path"])
+            estado["tarea_cache"] = tarea
+            self.gestor_tareas.ejecutar(tarea, cola="precarga")
+        
+        if estado["esperando"] is not None and not self.usar_precarga(resultado["pdf_path"]):
+            # El PDF cambió mientras se precargaba: búsqueda normal
+            self.buscar_pdf()
+    
+    def precarga_finalizada(self, tarea):
+        """
+        (Hilo de la interfaz) Si la precarga falló (p.ej. el PDF no existe)
+        y el operador ya había pedido la búsqueda, se hace la búsqueda
+        normal, que muestra el error.
+        """
+        estado = self._precarga
+        if estado is None or estado["tarea"] is not tarea or estado["resultado"] is not None:
+            return
+        esperando = estado["esperando"] is not None
+        self._precarga = None
+        if esperando:
+            self.buscar_pdf()
+    
+    def _sigue_tipeado(self, pdf_path):
+        """
+        True si número y año siguen apuntando a 'pdf_path': no se calienta
+        la caché con un documento que el operador ya dejó de tipear.
+        """
         try:
-            with open(pdf_path, "rb") as f:
-                reader = PyPDF2.PdfReader(f)
-                total_pages = len(reader.pages)
-                
-                self.print_log(f"El archivo '{pdf_path}' existe. Páginas: {total_pages}")
-                QMessageBox.information(
-                    self,
-                    "Búsqueda exitosa",
-                    f"Se encontró el PDF.\nCantidad de páginas: {total_pages}"
-                )
-            
+            return self.build_pdf_path()[0] == pdf_path
+        except ValueError:
+            return False
+    
+    def _tarea_precargar_documento(self, tarea, pdf_path):
+        """
+        (Hilo de trabajo) Trae y parsea el documento en la caché, para que
+        la portada y el borrado no tengan que esperar la lectura del share.
+        Si se cancela (el operador tipeó otro expediente), la lectura se
+        abandona entre bloque y bloque.
+        """
+        with self.cache_pdf.bloqueo(pdf_path):
+            tarea.verificar_cancelacion()
+            self.cache_pdf.obtener(pdf_path, verificar_cancelacion=tarea.verificar_cancelacion)
+    
+    def usar_precarga(self, pdf_path):
+        """
+        (Botón "Buscar PDF") Si hay una precarga de 'pdf_path' vigente, la
+        muestra como resultado de la búsqueda y retorna True. Si se está
+        ejecutando, la búsqueda queda esperándola. Si no hay, si todavía
+        espera turno en el pool de precarga (detrás de otra lectura) o si el
+        PDF cambió desde la precarga (otro puesto borró fojas), retorna False
+        y se hace la búsqueda normal.
+        """
+        estado = self._precarga
+        if estado is None or estado["pdf_path"] != pdf_path:
+            return False
+        if estado["resultado"] is None:
+            if not estado["tarea"].iniciada():
+                estado["tarea"].cancelar()
+                self._precarga = None
+                return False
+            if estado["esperando"] is None:
+                estado["esperando"] = time.monotonic()
+            return True
+        if not self._precarga_vigente():
+            self._precarga = None
+            return False
+        
+        resultado = estado["resultado"]
+        try:
+            st = os.stat(pdf_path)
+        except OSError:
+            st = None
+        if st is None or (st.st_size, st.st_mtime_ns) != (resultado["tamanio"], resultado["mtime_ns"]):
+            self.print_log(f"{resultado['subcarpeta']} cambió desde la precarga; se busca de nuevo.")
+            self._precarga = None
+            return False
+        espera = time.monotonic() - estado["esperando"] if estado["esperando"] is not None else 0.0
+        estado["esperando"] = None
+        # Lo que el operador esperó es el total; las fases son las de la precarga
+        auditoria = dict(resultado["auditoria"], segundos=round(espera, 3), precarga=True,
+                         segundos_precarga=resultado["auditoria"]["segundos"])
+        registrar("busqueda", log=self.print_log, **auditoria)
+        self.print_log(f"Resultado de {resultado['subcarpeta']} precargado mientras se tipeaba.")
+        self.buscar_pdf_terminado(resultado)
+        return True
+    
+    def buscar_pdf_terminado(self, resultado):
+        """
+        (Hilo de la interfaz) Muestra el resultado de la búsqueda y encola
+        la lectura de la portada, que requiere el documento completo.
+        """
+        pdf_path = resultado["pdf_path"]
+        total_pages = resultado["total_pages"]
+        self.print_log(f"El archivo '{pdf_path}' existe. Páginas: {total_pages}")
+        self.mostrar_reserva(resultado["reserva"])
+        
+        if resultado["portada"] is not None:
+            self.mostrar_datos_portada(resultado["portada"])
+        else:
             # Intentar leer la primera página (portada)
-            self.leer_datos_portada(pdf_path)
-            
-        except PermissionError:
-            error_msg = (
-                "Permiso denegado al intentar leer el PDF.\n"
-                "Verifica que el archivo no esté abierto y que tengas permisos de lectura."
+            tarea = self.crear_tarea(
+                self._tarea_leer_portada, pdf_path, resultado["subcarpeta"],
+                titulo_error="Error leyendo portada"
             )
-            self.print_log(error_msg, level="error")
-            QMessageBox.critical(self, "Error de Permisos", error_msg)
+            tarea.senales.terminado.connect(self.leer_portada_terminado)
+            self.gestor_tareas.ejecutar(tarea, cola="lectura")
+        
+        QMessageBox.information(
+            self,
+            "Búsqueda exitosa",
+            f"Se encontró el PDF.\nCantidad de páginas: {total_pages}"
+        )
+    
+    def mostrar_reserva(self, reserva):
+        """
+        Indica si otro operador tiene reservado el expediente en este momento.
+        """
+        if reserva is None:
+            self.label_reserva.setText("")
+            return
+        texto = f"Reservado por {describir_titular(reserva)}"
+        self.label_reserva.setText(texto)
+        self.print_log(f"{texto}: los borrados quedarán en cola hasta que termine.", level="warning")
+    
+    def _tarea_leer_portada(self, tarea, pdf_path, subcarpeta):
+        """
+        (Hilo de trabajo) Carga el documento en la caché, lee la portada y
+        la registra en el índice de portadas.
+        """
+        fases = Fases()
+        inicio = time.monotonic()
+        try:
+            with self.cache_pdf.bloqueo(pdf_path):
+                tarea.progreso(30, "Leyendo portada...")
+                metricas = {}
+                with fases.medir("lectura") as medicion:
+                    st = os.stat(pdf_path)
+                    reader = self.cache_pdf.obtener(pdf_path, log=tarea.log, metricas=metricas)
+                    if metricas.get("modo") != "cache":
+                        medicion["bytes"] = metricas["bytes"]
+                if "segundos_red" in metricas:
+                    fases.agregar("lectura_red", metricas["segundos_red"], metricas["bytes"])
+                    fases.agregar("lectura_parseo", metricas["segundos_parseo"], metricas["bytes"])
+                tarea.verificar_cancelacion()
+                with fases.medir("extraccion"):
+                    datos = self.leer_datos_portada(tarea, reader)
+                if datos is not None:
+                    with fases.medir("indice"):
+                        self.registrar_en_indice(tarea, subcarpeta, pdf_path, datos, len(reader.pages), st)
+                registrar("portada", log=tarea.log, expediente=subcarpeta, pdf_path=pdf_path,
+                          resultado="ok" if datos is not None else "sin_datos", tamanio=st.st_size,
+                          segundos=round(time.monotonic() - inicio, 3), fases=fases.datos)
+                return datos
+        except PermissionError as e:
+            tarea.log(f"Permiso denegado al leer portada: {str(e)}", level="error")
+        except TareaCancelada:
+            raise
         except Exception as e:
-            self.print_log(f"Error al intentar abrir/leer el PDF: {str(e)}", level="error")
-            QMessageBox.critical(self, "Error al abrir PDF", str(e))
+            tarea.log(f"Error leyendo portada: {str(e)}", level="error")
+        return None
     
-    def leer_datos_portada(self, pdf_path):
+    def leer_portada_terminado(self, portada):
+        if portada is not None:
+            self.mostrar_datos_portada(portada)
+    
+    def leer_datos_portada(self, tarea, reader):
         """
-        Lee la primera página de 'pdf_path' y busca los datos:
+        (Hilo de trabajo) Lee la primera página y busca los datos:
           Nro, Iniciado y Extracto
-        Ajusta el contenido de los label_info_* en la interfaz.
+        Retorna el dict de extraer_datos_portada, o None si no se pudo leer.
         """
         try:
-            with open(pdf_path, "rb") as f:
-                reader = PyPDF2.PdfReader(f)
-                if len(reader.pages) == 0:
-                    self.print_log("El PDF no contiene páginas.", level="warning")
-                    return
-                
-                first_page = reader.pages[0]
-                text = first_page.extract_text() or ""
-                
-                lines = text.split("\n")
-                
-                nro_val = "-"
-                iniciado_val = "-"
-                extracto_val = "-"
-                
-                for line in lines:
-                    line = line.strip()
-                    if line.startswith("Nro:"):
-                        nro_val = line.replace("Nro:", "").strip()
-                    elif line.startswith("Iniciado:"):
-                        iniciado_val = line.replace("Iniciado:", "").strip()
-                    elif line.startswith("Extracto:"):
-                        extracto_val = line.replace("Extracto:", "").strip()
-                
-                # Actualizamos los labels
-                self.label_info_nro.setText(f"Nro: {nro_val}")
-                self.label_info_iniciado.setText(f"Iniciado: {iniciado_val}")
-                self.label_info_extracto.setText(f"Extracto: {extracto_val}")
-                
-                self.print_log(
-                    f"Datos portada => Nro: {nro_val}, Iniciado: {iniciado_val}, Extracto: {extracto_val}"
-                )
-                
+            datos = extraer_datos_portada(reader)
+            if datos is None:
+                tarea.log("El PDF no contiene páginas.", level="warning")
+            return datos
         except PermissionError as e:
-            self.print_log(f"Permiso denegado al leer portada: {str(e)}", level="error")
+            tarea.log(f"Permiso denegado al leer portada: {str(e)}", level="error")
+        except Exception as e:
+            tarea.log(f"Error leyendo portada: {str(e)}", level="error")
+        return None
+    
+    def registrar_en_indice(self, tarea, subcarpeta, pdf_path, datos, paginas, st):
+        """
+        (Hilo de trabajo) Guarda la portada leída en el índice. Un fallo del
+        índice no afecta la búsqueda: sólo se registra en el log.
+        """
+        try:
+            self.indice_portadas.guardar(subcarpeta, pdf_path, datos, paginas, st)
+        except Exception as e:
+            tarea.log(f"No se pudo actualizar el índice de portadas: {str(e)}", level="warning")
+    
+    def buscar_en_indice(self):
+        """
+        Busca expedientes en el índice de portadas por nombre, CUIL o Nro.
+        """
+        texto = self.input_busqueda.text().strip()
+        if not texto:
+            QMessageBox.warning(self, "Error de datos", "Ingresa un nombre, CUIL o Nro para buscar.")
+            return
+        
+        tarea = self.crear_tarea(self._tarea_buscar_en_indice, texto, titulo_error="Error en el índice")
+        tarea.senales.terminado.connect(self.buscar_en_indice_terminado)
+        self.gestor_tareas.ejecutar(tarea, cola="lectura")
+    
+    def _tarea_buscar_en_indice(self, tarea, texto):
+        try:
+            resultados = self.indice_portadas.buscar(texto)
         except Exception as e:
-            self.print_log(f"Error leyendo portada: {str(e)}", level="error")
+            raise ErrorTarea(
+                "Error en el índice",
+                f"No se pudo consultar el índice de portadas.\n{e}",
+                detalle_log=f"Error consultando el índice de portadas: {str(e)}"
+            )
+        tarea.log(f"Búsqueda en índice '{texto}': {len(resultados)} resultado(s).")
+        return resultados
+    
+    def buscar_en_indice_terminado(self, resultados):
+        """
+        (Hilo de la interfaz) Con un resultado se carga directamente; con
+        varios, el operador elige cuál.
+        """
+        if not resultados:
+            QMessageBox.information(self, "Sin resultados", "No se encontraron expedientes en el índice.")
+            return
+        
+        fila = resultados[0]
+        if len(resultados) > 1:
+            opciones = [f"{r['subcarpeta']} - {r['extracto']}" for r in resultados]
+            elegido, ok = QInputDialog.getItem(
+                self, "Resultados", "Selecciona el expediente:", opciones, 0, False
+            )
+            if not ok:
+                return
+            fila = resultados[opciones.index(elegido)]
+        
+        self.seleccionar_expediente(fila)
+    
+    def seleccionar_expediente(self, fila):
+        """
+        Carga número y año del expediente elegido y muestra su portada.
+        """
+        if fila.get("numero") is not None and fila.get("anio") is not None:
+            self.input_numero.setText(str(fila["numero"]))
+            self.input_anio.setText(str(fila["anio"]))
+        self.mostrar_datos_portada(fila)
+    
+    def mostrar_datos_portada(self, datos):
+        """
+        Ajusta el contenido de los label_info_* en la interfaz.
+        """
+        self.label_info_nro.setText(f"Nro: {datos['nro']}")
+        self.label_info_iniciado.setText(f"Iniciado: {datos['iniciado']}")
+        self.label_info_extracto.setText(f"Extracto: {datos['extracto']}")
+        
+        self.print_log(
+            f"Datos portada => Nro: {datos['nro']}, Iniciado: {datos['iniciado']}, "
+            f"Extracto: {datos['extracto']}"
+        )
     
     def abrir_pdf(self):
         """
@@ -277,25 +778,40 @@ class PDFManager(QMainWindow):
             QMessageBox.warning(self, "Error de datos", str(e))
             return
         
+        tarea = self.crear_tarea(self._tarea_abrir_pdf, pdf_path, titulo_error="Error al abrir PDF")
+        self.gestor_tareas.ejecutar(tarea, cola="lectura")
+    
+    def _tarea_abrir_pdf(self, tarea, pdf_path):
+        """
+        (Hilo de trabajo) Verifica que exista el PDF y lo abre.
+        """
         if not os.path.isfile(pdf_path):
-            self.print_log(f"No se encontró el archivo para abrir: {pdf_path}", level="error")
-            QMessageBox.warning(self, "Archivo no encontrado", f"No existe: {pdf_path}")
-            return
+            raise ErrorTarea(
+                "Archivo no encontrado",
+                f"No existe: {pdf_path}",
+                detalle_log=f"No se encontró el archivo para abrir: {pdf_path}",
+                advertencia=True
+            )
         
         try:
             os.startfile(pdf_path)
-            self.print_log(f"Abriendo PDF: {pdf_path}")
+            tarea.log(f"Abriendo PDF: {pdf_path}")
         except Exception as e:
-            self.print_log(f"No se pudo abrir el PDF: {str(e)}", level="error")
-            QMessageBox.critical(self, "Error al abrir PDF", str(e))
+            raise ErrorTarea(
+                "Error al abrir PDF",
+                str(e),
+                detalle_log=f"No se pudo abrir el PDF: {str(e)}"
+            )
     
     def borrar_fojas(self):
         """
         Botón para realizar la copia de seguridad y eliminar las páginas solicitadas.
+        Los datos se validan acá y el trabajo se encola en segundo plano, así el
+        operador puede seguir cargando el próximo expediente.
         """
         fojas_str = self.input_fojas.text().strip()
         if not fojas_str:
-            QMessageBox.warning(self, "Error de datos", "Por favor ingresa las fojas a eliminar (rango 'x-y').")
+            QMessageBox.warning(self, "Error de datos", "Por favor ingresa las fojas a eliminar (ej: '3-5,12,40-42').")
             return
         
         try:
@@ -304,188 +820,403 @@ class PDFManager(QMainWindow):
             QMessageBox.warning(self, "Error de datos", str(e))
             return
         
-        if not os.path.isfile(pdf_path):
-            self.print_log(f"No se encontró el archivo en la ruta: {pdf_path}", level="error")
-            QMessageBox.warning(self, "Archivo no encontrado", f"No existe: {pdf_path}")
-            return
-        
-        backup_dir = r"C:\Bk_de_Expedientes"
-        
-        if not os.path.exists(backup_dir):
-            try:
-                os.makedirs(backup_dir)
-            except Exception as e:
-                self.print_log(f"No se pudo crear la carpeta de backup: {backup_dir}", level="error")
-                QMessageBox.critical(self, "Error de Backup", f"No se pudo crear {backup_dir}\n{e}")
-                return
-        
-        backup_filename = f"{subcarpeta}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-        backup_path = os.path.join(backup_dir, backup_filename)
-        
-        # Crear el backup
+        # Parsear fojas: uno o más rangos, p.ej. "3-5,12,40-42"
         try:
-            shutil.copy2(pdf_path, backup_path)
-            self.print_log(f"Backup creado: {backup_path}")
-        except PermissionError as e:
-            self.print_log(f"Permiso denegado al crear backup: {str(e)}", level="error")
-            QMessageBox.critical(
-                self,
-                "Error de Permisos",
-                "No se pudo crear la copia de seguridad.\n"
-                "Revisa si tienes permisos de escritura."
-            )
-            return
-        except Exception as e:
-            self.print_log(f"Error creando backup: {str(e)}", level="error")
-            QMessageBox.critical(self, "Error de Backup", f"No se pudo crear la copia de seguridad.\n{e}")
-            return
-        
-        # Parsear fojas (x-y)
-        try:
-            inicio, fin = fojas_str.split("-")
-            inicio = int(inicio)
-            fin = int(fin)
-            if inicio <= 0 or fin <= 0:
-                raise ValueError("Los números de página deben ser positivos.")
-            if inicio > fin:
-                raise ValueError("El rango de fojas es inválido (inicio > fin).")
-        except ValueError:
-            self.print_log("Formato de fojas incorrecto. Usa 'inicio-fin', ej: 30-34.", level="error")
+            fojas = RangosFojas.parsear(fojas_str)
+        except ValueError as e:
+            self.print_log(f"Formato de fojas incorrecto: {e}", level="error")
             QMessageBox.warning(
                 self, "Error de Formato", 
-                "Fojas debe ser un rango válido, ej: 30-34."
+                f"{e}\n\nFojas debe ser uno o más rangos válidos, ej: 3-5,12,40-42."
             )
             return
         
-        # Eliminar páginas
+        solicitante = self.input_solicitante.text().strip()
+        compactar = self.check_compactar.isChecked()
+        backup_delta = self.check_backup_delta.isChecked()
+        
+        tarea = self.crear_tarea(
+            self._tarea_borrar_fojas,
+            pdf_path, subcarpeta, fojas, compactar, backup_delta, solicitante,
+            titulo_error="Error al procesar PDF"
+        )
+        tarea.senales.terminado.connect(self.borrar_fojas_terminado)
+        self.print_log(f"Borrado de fojas {fojas} de {subcarpeta} en cola.")
+        self.gestor_tareas.ejecutar(tarea, cola="escritura")
+    
+    def _tarea_borrar_fojas(self, tarea, pdf_path, subcarpeta, fojas, compactar, backup_delta,
+                            solicitante):
+        """
+        (Hilo de trabajo) Crea el backup y elimina las páginas del PDF.
+        """
         try:
-            with open(pdf_path, 'rb') as f:
-                reader = PyPDF2.PdfReader(f)
-                writer = PyPDF2.PdfWriter()
-                
-                total_pages = len(reader.pages)
-                
-                for idx in range(total_pages):
-                    page_number = idx + 1
-                    if inicio <= page_number <= fin:
-                        continue
-                    writer.add_page(reader.pages[idx])
-                
-                with open(pdf_path, 'wb') as out_f:
-                    writer.write(out_f)
-                    
-            self.print_log(f"Fojas {inicio}-{fin} eliminadas correctamente en: {pdf_path}")
-            QMessageBox.information(
-                self, 
-                "Proceso completado", 
-                f"Fojas {inicio}-{fin} eliminadas con éxito.\nRevisa el log para más detalles."
+            resultado = borrar_fojas_expediente(
+                pdf_path,
+                subcarpeta,
+                fojas,
+                self.cache_pdf,
+                compactar=compactar,
+                backup_delta=backup_delta,
+                log=tarea.log,
+                avance=tarea.progreso,
+                verificar_cancelacion=tarea.verificar_cancelacion,
+                solicitante=solicitante,
+                origen="ventana"
             )
-            
-            # Enviar correo de confirmación si hay solicitante
-            solicitante = self.input_solicitante.text().strip()
-            if solicitante:
-                # Armar correo destino (solicitante@insssep.gov.ar)
-                correo_destino = f"{solicitante}@insssep.gov.ar"
-            else:
-                # Si no hay solicitante, dejamos un string vacío
-                correo_destino = ""
-            
-            self.enviar_correo_confirmacion(correo_destino, pdf_path, inicio, fin)
-            
-            # Mostrar el contenido del log al finalizar
-            self.mostrar_contenido_log()
+        except ErrorBorrado as e:
+            if not e.bloqueado:
+                raise self._error_de_borrado(e, pdf_path)
+            trabajo = self.cola_escrituras.encolar(
+                pdf_path, subcarpeta, fojas,
+                compactar=compactar, backup_delta=backup_delta,
+                solicitante=solicitante, motivo=str(e.causa)
+            )
+            tarea.log(f"El PDF está en uso por otro usuario ({e.causa}). "
+                      f"Borrado en cola: {describir_trabajo(trabajo)}", level="warning")
+            return {"en_cola": trabajo}
         
-        except PermissionError:
-            error_msg = (
+        resultado.update(
+            pdf_path=pdf_path,
+            subcarpeta=subcarpeta,
+            fojas=str(fojas),
+            solicitante=solicitante
+        )
+        return resultado
+    
+    def _error_de_borrado(self, e, pdf_path):
+        """
+        Traduce el fallo de una fase del borrado al mensaje que ve el operador.
+        """
+        if e.fase == "verificacion":
+            return ErrorTarea(
+                "Archivo no encontrado",
+                f"No existe: {pdf_path}",
+                detalle_log=f"No se encontró el archivo en la ruta: {pdf_path}",
+                advertencia=True
+            )
+        if e.fase == "backup":
+            if isinstance(e.causa, PermissionError):
+                return ErrorTarea(
+                    "Error de Permisos",
+                    "No se pudo crear la copia de seguridad.\n"
+                    "Revisa si tienes permisos de escritura.",
+                    detalle_log=f"Permiso denegado al crear backup: {str(e.causa)}"
+                )
+            return ErrorTarea(
+                "Error de Backup",
+                f"No se pudo crear la copia de seguridad.\n{e.causa}",
+                detalle_log=f"Error creando backup: {str(e.causa)}"
+            )
+        if isinstance(e.causa, PermissionError):
+            return ErrorTarea(
+                "Error de Permisos",
                 f"Permiso denegado al intentar escribir en el PDF:\n{pdf_path}\n\n"
                 f"Verifica que el archivo no esté abierto y que tengas permisos de escritura."
             )
-            self.print_log(error_msg, level="error")
-            QMessageBox.critical(self, "Error de Permisos", error_msg)
-        except Exception as e:
-            self.print_log(f"Error al procesar el PDF: {str(e)}", level="error")
-            QMessageBox.critical(self, "Error al procesar PDF", str(e))
+        return ErrorTarea(
+            "Error al procesar PDF",
+            str(e.causa),
+            detalle_log=f"Error al procesar el PDF: {str(e.causa)}"
+        )
     
-    def enviar_correo_confirmacion(self, destinatario, pdf_path, inicio, fin):
+    def borrar_fojas_terminado(self, resultado):
         """
-        Envía un correo de confirmación (vía Outlook) indicando que se borraron las fojas.
-        
-        - Se detecta el username local. 
-        - Por defecto se va a enviar a wbenitez y abouvier, 
-          excepto al usuario que coincida con el username local.
-        - Además, se incluye el 'destinatario' (campo 'Solicitante') si no está vacío.
+        (Hilo de la interfaz) Informa el borrado y encola el correo de confirmación.
         """
-        if not win32:
-            # Si no está instalado pywin32, no se puede enviar correo
-            self.print_log("pywin32 no está disponible. No se envía correo.", level="warning")
+        if "en_cola" in resultado:
+            QMessageBox.information(
+                self,
+                "PDF en uso",
+                f"El PDF está en uso por otro usuario:\n{resultado['en_cola']['ultimo_error']}\n\n"
+                "El borrado quedó en cola y se reintentará automáticamente; "
+                "puedes seguir con el próximo expediente."
+            )
             return
         
+        pdf_path = resultado["pdf_path"]
+        # La precarga de este expediente describe el PDF anterior al borrado
+        if self._precarga is not None and self._precarga["pdf_path"] == pdf_path:
+            self._precarga = None
+        fojas = resultado["fojas"]
+        
+        self.print_log(f"Fojas {fojas} eliminadas correctamente en: {pdf_path}")
+        self.print_log(
+            f"Páginas: {resultado['paginas_antes']} -> {resultado['paginas_despues']}. "
+            f"Bytes escritos: {resultado['bytes_escritos']} (modo {resultado['modo']})"
+        )
+        QMessageBox.information(
+            self, 
+            "Proceso completado", 
+            f"Fojas {fojas} eliminadas con éxito.\nRevisa el log para más detalles."
+        )
+        
+        # Enviar correo de confirmación (solicitante@insssep.gov.ar, si hay solicitante)
+        correo_destino = correo_de(resultado["solicitante"])
+        self.enviar_correo_confirmacion(correo_destino, pdf_path, fojas)
+        
+        # Mostrar lo registrado en el log para este expediente
+        self.mostrar_contenido_log(resultado["subcarpeta"])
+    
+    def _tarea_contar_cola(self, tarea):
+        """
+        (Hilo de trabajo) Avisa al iniciar si quedaron borrados en cola.
+        """
         try:
-            # 1) Detectar el nombre de usuario de la PC:
-            username_local = getpass.getuser().lower()  # p.ej. "wbenitez" o "abouvier"
-            
-            # 2) Lista de destinatarios por defecto:
-            default_recipients = ["wbenitez@insssep.gov.ar", "abouvier@insssep.gov.ar"]
-            
-            # 3) Remover de esa lista el que coincida con el username_local:
-            correo_local = f"{username_local}@insssep.gov.ar"
-            
-            if correo_local in default_recipients:
-                default_recipients.remove(correo_local)
-            
-            # 4) Agregar el 'destinatario' (si no está vacío) a la lista
-            if destinatario and destinatario not in default_recipients:
-                default_recipients.append(destinatario)
-            
-            # Si al final no hay nadie en la lista, no enviamos nada
-            if not default_recipients:
-                self.print_log("No hay destinatarios a quien enviar el correo.", level="warning")
-                return
-            
-            # Crear la instancia de Outlook
-            outlook = win32.Dispatch("Outlook.Application")
-            mail = outlook.CreateItem(0)  # 0 = olMailItem
-            
-            # Unir todos los destinatarios en un string separado por ;
-            mail.To = ";".join(default_recipients)
-            mail.Subject = "Confirmación de Borrado de Fojas"
-            
-            expediente = os.path.basename(os.path.dirname(pdf_path))  # Extrae la carpeta (E-000000-YYYY)
-            cuerpo = (
-                f"Estimado/a,\n\n"
-                f"Se han borrado las fojas {inicio}-{fin} del expediente:\n"
-                f"{expediente}\n\n"
-                f"Estado: REALIZADO.\n\n"
-                f"Saludos,\n"
-                f"Equipo de Automatización"
+            pendientes = self.cola_escrituras.pendientes()
+        except Exception as e:
+            tarea.log(f"No se pudo leer la cola de borrados pendientes: {e}", level="error")
+            return
+        if pendientes:
+            tarea.log(f"Hay {len(pendientes)} borrado(s) en cola esperando que se libere el PDF.")
+    
+    def revisar_cola_escrituras(self):
+        """
+        (Timer) Revisa la cola en segundo plano: el archivo de la cola se
+        comparte con el lote y tomar su bloqueo puede demorar (ver
+        ESPERA_BLOQUEO). Los trabajos reclamados llegan a cola_revisada.
+        """
+        if self._revisando_cola:
+            return
+        self._revisando_cola = True
+        tarea = TareaPDF(self._tarea_revisar_cola)
+        tarea.senales.log.connect(self.print_log, Qt.DirectConnection)
+        tarea.senales.terminado.connect(self.cola_revisada)
+        tarea.senales.finalizado.connect(self.revision_cola_finalizada)
+        self.gestor_tareas.ejecutar(tarea, contar=False)
+    
+    def _tarea_revisar_cola(self, tarea):
+        """
+        (Hilo de trabajo) Reclama cada borrado bloqueado cuyo próximo intento
+        ya llegó. Reclamarlo evita que otro proceso (o este mismo, en el
+        próximo tic del timer) ejecute el mismo borrado a la vez.
+        """
+        reclamados = []
+        try:
+            for trabajo in self.cola_escrituras.listos():
+                trabajo = self.cola_escrituras.reclamar(trabajo["id"])
+                if trabajo is not None:
+                    reclamados.append(trabajo)
+        except Exception as e:
+            tarea.log(f"No se pudo leer la cola de borrados pendientes: {e}", level="error")
+        return reclamados
+    
+    def cola_revisada(self, reclamados):
+        """
+        (Hilo de la interfaz) Encola un reintento por cada trabajo reclamado.
+        """
+        for trabajo in reclamados:
+            tarea = self.crear_tarea(
+                self._tarea_reintentar_borrado, trabajo,
+                titulo_error="Error al procesar PDF"
             )
+            tarea.id_trabajo = trabajo["id"]
+            tarea.senales.terminado.connect(self.reintento_terminado)
+            tarea.senales.finalizado.connect(self.reintento_finalizado)
+            self.gestor_tareas.ejecutar(tarea, cola="escritura")
+    
+    def revision_cola_finalizada(self, tarea):
+        self._revisando_cola = False
+    
+    def _tarea_reintentar_borrado(self, tarea, trabajo):
+        """
+        (Hilo de trabajo) Reintenta un borrado de la cola. Si el PDF sigue
+        abierto se reprograma sin hacer backup ni leerlo. Si el PDF ya no
+        existe o el error no se resuelve reintentando, el trabajo se
+        descarta; ante cualquier otro error (p.ej. el share no responde)
+        se reprograma.
+        """
+        try:
+            escribible, motivo = archivo_escribible(trabajo["pdf_path"])
+            if not escribible:
+                return {"reprogramado": self.cola_escrituras.reprogramar(trabajo["id"], motivo)}
             
-            mail.Body = cuerpo
-            mail.Send()
-            
-            self.print_log(
-                f"Correo de confirmación enviado a: {', '.join(default_recipients)}"
+            resultado = borrar_fojas_expediente(
+                trabajo["pdf_path"],
+                trabajo["subcarpeta"],
+                RangosFojas.parsear(trabajo["fojas"]),
+                self.cache_pdf,
+                compactar=trabajo["compactar"],
+                backup_delta=trabajo["backup_delta"],
+                log=tarea.log,
+                avance=tarea.progreso,
+                verificar_cancelacion=tarea.verificar_cancelacion,
+                solicitante=trabajo["solicitante"],
+                origen="cola"
+            )
+        except TareaCancelada:
+            # El reclamo se devuelve en reintento_finalizado
+            raise
+        except ErrorBorrado as e:
+            if e.bloqueado:
+                return {"reprogramado": self.cola_escrituras.reprogramar(trabajo["id"], str(e.causa))}
+            self.cola_escrituras.descartar(trabajo["id"])
+            raise self._error_de_borrado(e, trabajo["pdf_path"])
+        except FileNotFoundError as e:
+            self.cola_escrituras.descartar(trabajo["id"])
+            raise ErrorTarea(
+                "Archivo no encontrado",
+                f"Se descartó el borrado en cola de {trabajo['subcarpeta']}: el PDF ya no existe.",
+                detalle_log=f"Se descartó el borrado en cola de {describir_trabajo(trabajo)}: {e}",
+                advertencia=True
             )
-        
         except Exception as e:
-            self.print_log(f"No se pudo enviar el correo a {destinatario}: {str(e)}", level="error")
+            return {"reprogramado": self.cola_escrituras.reprogramar(trabajo["id"], str(e)), "error": str(e)}
+        
+        self.cola_escrituras.completar(trabajo["id"])
+        resultado.update(
+            pdf_path=trabajo["pdf_path"],
+            subcarpeta=trabajo["subcarpeta"],
+            fojas=trabajo["fojas"],
+            solicitante=trabajo["solicitante"],
+            trabajo=trabajo
+        )
+        return resultado
     
-    def mostrar_contenido_log(self):
+    def reintento_terminado(self, resultado):
         """
-        Carga y muestra el contenido del archivo de log al final del proceso.
+        (Hilo de la interfaz) Informa el resultado de un reintento de la cola.
         """
-        log_filename = "borrado_fojas.log"
-        if os.path.isfile(log_filename):
-            try:
-                with open(log_filename, "r", encoding="utf-8") as log_file:
-                    contenido = log_file.read()
-                self.print_log("\n=== CONTENIDO DEL LOG ===")
-                self.text_log.append(contenido)
-                self.print_log("=== FIN DEL LOG ===\n")
-            except Exception as e:
-                self.print_log(f"Error al leer el log: {e}", level="error")
+        if "reprogramado" not in resultado:
+            self.print_log(f"Borrado en cola completado: {describir_trabajo(resultado['trabajo'])}")
+            self.borrar_fojas_terminado(resultado)
+            return
+        
+        trabajo = resultado["reprogramado"]
+        if trabajo is None:
+            return
+        if trabajo["estado"] == "vencido":
+            self.print_log(
+                f"Se abandonó el borrado en cola de {describir_trabajo(trabajo)}: "
+                f"no se pudo escribir el PDF. Último error: {trabajo['ultimo_error']}",
+                level="error"
+            )
+            QMessageBox.warning(
+                self,
+                "Borrado no realizado",
+                f"No se pudo borrar las fojas {trabajo['fojas']} de {trabajo['subcarpeta']}:\n"
+                f"{trabajo['ultimo_error']}\nVuelve a intentarlo."
+            )
+        elif "error" in resultado:
+            espera = max(0, int(trabajo["proximo_intento"] - datetime.now().timestamp()))
+            self.print_log(f"Falló el reintento del borrado en cola de {trabajo['subcarpeta']} "
+                           f"({resultado['error']}); próximo intento en {espera} s.", level="warning")
         else:
-            self.print_log("No se encontró el archivo de log para mostrar.", level="warning")
+            espera = max(0, int(trabajo["proximo_intento"] - datetime.now().timestamp()))
+            self.print_log(f"{trabajo['subcarpeta']} sigue en uso por otro usuario; "
+                           f"próximo intento en {espera} s.")
+    
+    def reintento_finalizado(self, tarea):
+        """
+        (Hilo de la interfaz) Si el reintento terminó sin completar ni
+        reprogramar el trabajo (p.ej. se canceló), se devuelve a la cola,
+        en segundo plano como las demás operaciones sobre la cola.
+        """
+        liberacion = TareaPDF(self._tarea_liberar_trabajo, tarea.id_trabajo)
+        liberacion.senales.log.connect(self.print_log, Qt.DirectConnection)
+        self.gestor_tareas.ejecutar(liberacion, contar=False)
+    
+    def _tarea_liberar_trabajo(self, tarea, id_trabajo):
+        try:
+            self.cola_escrituras.liberar(id_trabajo)
+        except Exception as e:
+            tarea.log(f"No se pudo devolver el borrado a la cola: {e}", level="error")
+    
+    def enviar_correo_confirmacion(self, destinatario, pdf_path, fojas):
+        """
+        Guarda el correo de confirmación en la bandeja de salida (escritura
+        local, inmediata) y pide un despacho en segundo plano.
+        """
+        try:
+            encolar_correo_confirmacion(destinatario, pdf_path, fojas, log=self.print_log,
+                                        bandeja=self.bandeja_salida)
+        except Exception as e:
+            self.print_log(f"No se pudo guardar el correo de confirmación: {e}", level="error")
+            return
+        self.despachar_correos()
+    
+    def despachar_correos(self):
+        """
+        (Timer) Arma los resúmenes cuya ventana ya se cumplió y encola un
+        despacho de la bandeja de salida si hay correos listos para enviar y
+        no hay otro despacho en curso.
+        """
+        if self._despacho_en_curso:
+            # Se repite al terminar, para no dejar esperando un correo recién encolado
+            self._despacho_repetir = True
+            return
+        try:
+            consolidar_resumenes(self.bandeja_salida)
+            if not self.bandeja_salida.listos(limite=1):
+                return
+        except Exception as e:
+            self.print_log(f"No se pudo leer la bandeja de salida: {e}", level="error")
+            return
+        
+        self._despacho_en_curso = True
+        tarea = self.crear_tarea(self._tarea_despachar_correos, titulo_error="Error de correo")
+        tarea.senales.finalizado.connect(self.despacho_finalizado)
+        self.gestor_tareas.ejecutar(tarea, cola="correo")
+    
+    def _tarea_despachar_correos(self, tarea):
+        despachar_pendientes(self.bandeja_salida, self.transporte_correo, tarea.log)
+    
+    def despacho_finalizado(self, tarea):
+        self._despacho_en_curso = False
+        if self._despacho_repetir:
+            self._despacho_repetir = False
+            self.despachar_correos()
+    
+    def mostrar_contenido_log(self, subcarpeta):
+        """
+        Muestra las últimas entradas del archivo de log sobre 'subcarpeta'.
+        La consulta al índice corre en segundo plano: si el indexado inicial
+        todavía no terminó, la ventana no se congela esperándolo.
+        """
+        tarea = self.crear_tarea(self._tarea_leer_log, subcarpeta, titulo_error="Error al leer el log")
+        tarea.senales.terminado.connect(self.contenido_log_leido)
+        self.gestor_tareas.ejecutar(tarea, cola="lectura")
+    
+    def _tarea_leer_log(self, tarea, subcarpeta):
+        """
+        (Hilo de trabajo) El índice del log sólo lee lo agregado desde la
+        consulta anterior.
+        """
+        indice = obtener_indice_log()
+        try:
+            indice.actualizar()
+            entradas = indice.ultimas(ENTRADAS_LOG_POR_EXPEDIENTE, expediente=subcarpeta)
+        except OSError as e:
+            tarea.log(f"Error al leer el log: {e}", level="error")
+            return None
+        return {"subcarpeta": subcarpeta, "entradas": entradas}
+    
+    def contenido_log_leido(self, resultado):
+        """
+        (Hilo de la interfaz) Agrega al panel lo leído por _tarea_leer_log.
+        """
+        if resultado is None:
+            return
+        entradas = resultado["entradas"]
+        if not entradas:
+            self.print_log("No se encontraron entradas del expediente en el log.", level="warning")
+            return
+        self.text_log.agregar(f"=== LOG DE {resultado['subcarpeta']} (últimas {len(entradas)} entradas) ===")
+        self.text_log.agregar_lineas(entradas)
+        self.text_log.agregar("=== FIN DEL LOG ===")
+    
+    def _tarea_indexar_log(self, tarea):
+        obtener_indice_log().actualizar()
+    
+    def abrir_visor_log(self):
+        """
+        Abre el visor del log, filtrado por el expediente cargado si lo hay.
+        """
+        try:
+            _, subcarpeta = self.build_pdf_path()
+        except ValueError:
+            subcarpeta = ""
+        visor = VisorLog(self, expediente=subcarpeta)
+        visor.show()
 
 
 def main():
@@ -0,0 +1,411 @@
+"""
+Borrado de fojas por lotes, sin interfaz gráfica.
+
+Procesa un archivo CSV o JSONL con una fila por pedido:
+    numero, anio (o año), fojas, solicitante (opcional)
+donde fojas acepta varios rangos, p.ej. "3-5,12,40-42".
+
+Usa la misma construcción de rutas, backup y borrado que delete_fs.py.
+Los pedidos de expedientes distintos se procesan en paralelo; los de un
+mismo expediente se aplican en orden, de a uno, porque cada borrado
+cambia la numeración de las fojas siguientes.
+
+Si un PDF está abierto por otro usuario, el pedido (y los siguientes del
+mismo expediente) pasan a la cola de borrados pendientes, la misma que
+reintenta delete_fs.py. Con --pendientes se procesa esa cola.
+
+Los correos de confirmación pasan por la bandeja de salida local: si
+Outlook (o el transporte elegido) no responde, quedan guardados y se envían
+en la próxima ejecución. Cada destinatario recibe un único resumen con los
+borrados del lote (--sin-resumen vuelve a un correo por pedido).
+
+Uso:
+    python delete_fs_batch.py pedidos.csv
+    python delete_fs_batch.py pedidos.jsonl --hilos 8 --reporte resultado.json
+    python delete_fs_batch.py --pendientes
+"""
+import os
+import sys
+import csv
+import json
+import time
+import uuid
+import logging
+import argparse
+from datetime import datetime
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from Modules.cache_pdf import CachePDF
+from Modules.expedientes import RUTA_RAIZ, construir_ruta_pdf
+from Modules.rangos_fojas import RangosFojas
+from Modules.operacion_borrado import ErrorBorrado, borrar_fojas_expediente
+from Modules.correo_confirmacion import consolidar_resumenes, correo_de, encolar_correo_confirmacion
+from Modules.bandeja_salida import crear_transporte, despachar_pendientes, obtener_bandeja
+from Modules.planificador_escritura import describir_trabajo, obtener_cola
+
+
+def config_logger():
+    """
+    Registra en el mismo archivo de log que la aplicación de escritorio y en consola.
+    """
+    logging.basicConfig(
+        format="%(asctime)s - %(levelname)s - %(message)s",
+        level=logging.INFO,
+        handlers=[
+            logging.FileHandler("borrado_fojas.log", mode="a"),
+            logging.StreamHandler(sys.stdout),
+        ]
+    )
+
+
+def log(mensaje, level="info"):
+    if level == "info":
+        logging.info(mensaje)
+    elif level == "warning":
+        logging.warning(mensaje)
+    elif level == "error":
+        logging.error(mensaje)
+    else:
+        logging.debug(mensaje)
+
+
+def leer_pedidos(ruta):
+    """
+    Lee los pedidos de un CSV (con encabezado) o de un JSONL.
+    Retorna una lista de dicts con las claves numero, anio, fojas, solicitante.
+    """
+    if ruta.lower().endswith((".jsonl", ".json")):
+        with open(ruta, "r", encoding="utf-8") as f:
+            filas = [json.loads(linea) for linea in f if linea.strip()]
+    else:
+        with open(ruta, "r", encoding="utf-8-sig", newline="") as f:
+            filas = list(csv.DictReader(f))
+
+    pedidos = []
+    for nro_fila, fila in enumerate(filas, start=1):
+        fila = {str(k).strip().lower(): v for k, v in fila.items()}
+        pedidos.append({
+            "fila": nro_fila,
+            "numero": str(fila.get("numero", "")).strip(),
+            "anio": str(fila.get("anio", fila.get("año", ""))).strip(),
+            "fojas": str(fila.get("fojas", "")).strip(),
+            "solicitante": str(fila.get("solicitante") or "").strip(),
+        })
+    return pedidos
+
+
+def procesar_pedido(pedido, cache, opciones, encolar=False):
+    """
+    Ejecuta un pedido y retorna su resultado (nunca lanza excepciones).
+    Con encolar=True no se intenta el borrado: el pedido va directo a la
+    cola de pendientes (se usa cuando un pedido anterior del mismo
+    expediente quedó bloqueado, para respetar el orden).
+    """
+    resultado = dict(pedido)
+    inicio_reloj = time.monotonic()
+
+    try:
+        pdf_path, subcarpeta = construir_ruta_pdf(pedido["numero"], pedido["anio"], opciones.raiz)
+        resultado["pdf_path"] = pdf_path
+        fojas = RangosFojas.parsear(pedido["fojas"])
+
+        if encolar:
+            return _encolar(resultado, pdf_path, subcarpeta, fojas, opciones,
+                            "un pedido anterior del expediente quedó en cola", inicio_reloj)
+
+        datos = borrar_fojas_expediente(
+            pdf_path,
+            subcarpeta,
+            fojas,
+            cache,
+            compactar=opciones.compactar,
+            backup_delta=opciones.backup_delta,
+            log=log,
+            solicitante=pedido["solicitante"],
+            origen="lote"
+        )
+        resultado.update(datos)
+        resultado["estado"] = "ok"
+        log(f"[lote] Fojas {fojas} eliminadas correctamente en: {pdf_path}")
+
+    except ErrorBorrado as e:
+        if e.bloqueado:
+            return _encolar(resultado, pdf_path, subcarpeta, fojas, opciones,
+                            str(e.causa), inicio_reloj)
+        resultado["estado"] = "error"
+        resultado["fase"] = e.fase
+        resultado["mensaje"] = str(e.causa)
+        log(f"[lote] Fila {pedido['fila']}: error en {e.fase}: {e.causa}", level="error")
+    except Exception as e:
+        resultado["estado"] = "error"
+        resultado["fase"] = "datos"
+        resultado["mensaje"] = str(e)
+        log(f"[lote] Fila {pedido['fila']}: {e}", level="error")
+
+    resultado["duracion_s"] = round(time.monotonic() - inicio_reloj, 3)
+    return resultado
+
+
+def _encolar(resultado, pdf_path, subcarpeta, fojas, opciones, motivo, inicio_reloj):
+    """
+    Deja el pedido en la cola de pendientes. Si la cola no se puede
+    escribir (su bloqueo no se liberó a tiempo, el disco falló) el pedido
+    queda como error de la fase "cola", sin cortar el lote.
+    """
+    try:
+        trabajo = obtener_cola().encolar(
+            pdf_path, subcarpeta, fojas,
+            compactar=opciones.compactar, backup_delta=opciones.backup_delta,
+            solicitante=resultado["solicitante"], motivo=motivo
+        )
+    except Exception as e:
+        resultado["estado"] = "error"
+        resultado["fase"] = "cola"
+        resultado["mensaje"] = f"No se pudo dejar en cola ({motivo}): {e}"
+        resultado["duracion_s"] = round(time.monotonic() - inicio_reloj, 3)
+        log(f"[lote] Fila {resultado['fila']}: {resultado['mensaje']}", level="error")
+        return resultado
+    resultado["estado"] = "en_cola"
+    resultado["mensaje"] = motivo
+    resultado["trabajo"] = trabajo["id"]
+    resultado["duracion_s"] = round(time.monotonic() - inicio_reloj, 3)
+    log(f"[lote] Fila {resultado['fila']}: PDF en uso, en cola: {describir_trabajo(trabajo)}",
+        level="warning")
+    return resultado
+
+
+def procesar_grupo(pedidos, cache, opciones):
+    """
+    Procesa en orden todos los pedidos de un mismo expediente. Si uno
+    queda en cola (o no se pudo encolar), los siguientes también van a la
+    cola (cada borrado cambia la numeración de las fojas que siguen).
+    """
+    resultados = []
+    bloqueado = False
+    for pedido in pedidos:
+        resultado = procesar_pedido(pedido, cache, opciones, encolar=bloqueado)
+        bloqueado = bloqueado or resultado["estado"] == "en_cola" or resultado.get("fase") == "cola"
+        resultados.append(resultado)
+    return resultados
+
+
+def procesar_pendientes(opciones):
+    """
+    Reintenta, en orden de llegada, todos los borrados de la cola de
+    pendientes. Retorna los resultados con el mismo formato que ejecutar_lote.
+    """
+    cola = obtener_cola()
+    cache = CachePDF(max_documentos=1)
+    resultados = []
+    expedientes_bloqueados = set()
+
+    for nro, trabajo in enumerate(cola.pendientes(), start=1):
+        resultado = {
+            "fila": nro,
+            "trabajo": trabajo["id"],
+            "pdf_path": trabajo["pdf_path"],
+            "fojas": trabajo["fojas"],
+            "solicitante": trabajo["solicitante"],
+        }
+        inicio_reloj = time.monotonic()
+        # La ventana también reintenta esta cola: sólo se ejecuta lo que se
+        # pudo reclamar a nombre de este proceso
+        reclamado = cola.reclamar(trabajo["id"])
+        if reclamado is None:
+            resultado["estado"] = "ya_procesado"
+            resultado["mensaje"] = "otro proceso lo tomó, lo completó o lo descartó"
+            resultado["duracion_s"] = 0.0
+            resultados.append(resultado)
+            continue
+        try:
+            if trabajo["pdf_path"] in expedientes_bloqueados:
+                raise ErrorBorrado("bloqueado", PermissionError("un pedido anterior sigue en cola"))
+            resultado.update(borrar_fojas_expediente(
+                trabajo["pdf_path"],
+                trabajo["subcarpeta"],
+                RangosFojas.parsear(trabajo["fojas"]),
+                cache,
+                compactar=trabajo["compactar"],
+                backup_delta=trabajo["backup_delta"],
+                log=log,
+                solicitante=trabajo["solicitante"],
+                origen="cola"
+            ))
+            cola.completar(trabajo["id"])
+            resultado["estado"] = "ok"
+            log(f"[lote] Borrado en cola completado: {describir_trabajo(trabajo)}")
+        except ErrorBorrado as e:
+            if e.bloqueado:
+                expedientes_bloqueados.add(trabajo["pdf_path"])
+                reprogramado = cola.reprogramar(trabajo["id"], str(e.causa))
+                if reprogramado is None:
+                    resultado["estado"] = "descartado"
+                else:
+                    trabajo = reprogramado
+                    resultado["estado"] = "en_cola" if trabajo["estado"] == "pendiente" else "error"
+                resultado["fase"] = "bloqueado"
+            else:
+                cola.descartar(trabajo["id"])
+                resultado["estado"] = "error"
+                resultado["fase"] = e.fase
+            resultado["mensaje"] = str(e.causa)
+            log(f"[lote] {describir_trabajo(trabajo)}: {e.causa}", level="warning")
+        except Exception as e:
+            # Error inesperado: el trabajo vuelve a la cola para otro intento
+            # y se sigue con el resto, así el reporte se escribe igual
+            cola.reprogramar(trabajo["id"], str(e))
+            resultado["estado"] = "error"
+            resultado["fase"] = "inesperado"
+            resultado["mensaje"] = str(e)
+            log(f"[lote] {describir_trabajo(trabajo)}: {e}", level="error")
+        resultado["duracion_s"] = round(time.monotonic() - inicio_reloj, 3)
+        resultados.append(resultado)
+
+    return resultados
+
+
+def agrupar_por_expediente(pedidos, raiz):
+    """
+    Agrupa los pedidos por ruta de PDF conservando el orden del archivo.
+    Los pedidos con datos inválidos quedan en un grupo propio.
+    """
+    grupos = OrderedDict()
+    for pedido in pedidos:
+        try:
+            clave, _ = construir_ruta_pdf(pedido["numero"], pedido["anio"], raiz)
+            clave = os.path.normcase(clave)
+        except ValueError:
+            clave = f"fila-{pedido['fila']}"
+        grupos.setdefault(clave, []).append(pedido)
+    return list(grupos.values())
+
+
+def ejecutar_lote(pedidos, opciones):
+    """
+    Procesa todos los pedidos con un pool acotado de hilos y retorna
+    los resultados en el orden original. 'opciones' son los argumentos
+    de línea de comandos (hilos, raiz, compactar, backup_delta).
+    """
+    hilos = max(1, opciones.hilos)
+    # Cada expediente se lee una vez y se invalida al escribirse: alcanza con uno por hilo
+    cache = CachePDF(max_documentos=hilos)
+    resultados = []
+
+    with ThreadPoolExecutor(max_workers=hilos) as pool:
+        futuros = [
+            pool.submit(procesar_grupo, grupo, cache, opciones)
+            for grupo in agrupar_por_expediente(pedidos, opciones.raiz)
+        ]
+        for futuro in futuros:
+            resultados.extend(futuro.result())
+
+    resultados.sort(key=lambda r: r["fila"])
+    return resultados
+
+
+def enviar_correos(resultados, transporte, resumir=True):
+    """
+    Encola en la bandeja de salida los avisos de los pedidos exitosos y
+    después los despacha en tandas con 'transporte'. Con resumir=True cada
+    destinatario recibe un solo correo con todos los borrados del lote: se
+    consolidan sólo las novedades de esta corrida, no las que la ventana
+    viene acumulando para su propio resumen.
+    Lo que no se pueda enviar queda en la bandeja para la próxima vez.
+    """
+    bandeja = obtener_bandeja()
+    grupo = f"lote-{uuid.uuid4().hex}"
+    for resultado in resultados:
+        if resultado["estado"] != "ok":
+            continue
+        encolar_correo_confirmacion(
+            correo_de(resultado["solicitante"]),
+            resultado["pdf_path"],
+            str(RangosFojas.parsear(resultado["fojas"])),
+            log=log,
+            bandeja=bandeja,
+            resumir=resumir,
+            grupo=grupo
+        )
+    if resumir:
+        consolidar_resumenes(bandeja, resumen_minutos=0, grupo=grupo)
+
+    while True:
+        enviados, _ = despachar_pendientes(bandeja, transporte, log)
+        if not enviados:
+            break
+    pendientes = bandeja.cantidad_pendientes()
+    if pendientes:
+        log(f"[lote] {pendientes} correo(s) quedan en la bandeja de salida.", level="warning")
+
+
+def escribir_reporte(resultados, ruta_reporte, inicio_lote):
+    """
+    Guarda el reporte del lote en JSON: resumen + un registro por pedido.
+    """
+    reporte = {
+        "inicio": inicio_lote.isoformat(timespec="seconds"),
+        "fin": datetime.now().isoformat(timespec="seconds"),
+        "total": len(resultados),
+        "ok": sum(1 for r in resultados if r["estado"] == "ok"),
+        "en_cola": sum(1 for r in resultados if r["estado"] == "en_cola"),
+        "error": sum(1 for r in resultados if r["estado"] == "error"),
+        "omitidos": sum(1 for r in resultados if r["estado"] in ("ya_procesado", "descartado")),
+        "resultados": resultados,
+    }
+    with open(ruta_reporte, "w", encoding="utf-8") as f:
+        json.dump(reporte, f, ensure_ascii=False, indent=2)
+    return reporte
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Borrado de fojas por lotes (sin interfaz).")
+    parser.add_argument("pedidos", nargs="?",
+                        help="Archivo CSV o JSONL con numero, anio, fojas y solicitante.")
+    parser.add_argument("--pendientes", action="store_true",
+                        help="Procesa la cola de borrados que quedaron esperando un PDF en uso.")
+    parser.add_argument("--hilos", type=int, default=4,
+                        help="Cantidad de expedientes que se procesan en paralelo (por defecto 4).")
+    parser.add_argument("--reporte", default=None,
+                        help="Ruta del reporte JSON (por defecto reporte_lote_<fecha>.json).")
+    parser.add_argument("--raiz", default=RUTA_RAIZ,
+                        help=f"Carpeta raíz de los expedientes (por defecto {RUTA_RAIZ}).")
+    parser.add_argument("--compactar", action="store_true",
+                        help="Reescribe y compacta cada PDF completo en lugar de anexar los cambios.")
+    parser.add_argument("--backup-delta", action="store_true",
+                        help="Respalda sólo las fojas eliminadas en lugar del PDF completo.")
+    parser.add_argument("--sin-correo", action="store_true",
+                        help="No envía correos de confirmación.")
+    parser.add_argument("--sin-resumen", action="store_true",
+                        help="Envía un correo por pedido en lugar de uno por destinatario para todo el lote.")
+    parser.add_argument("--transporte", choices=["outlook", "smtp", "archivo"], default=None,
+                        help="Cómo se envían los correos (por defecto el de BORRADO_FOJAS_TRANSPORTE, "
+                             "o outlook).")
+    args = parser.parse_args(argv)
+    if not args.pedidos and not args.pendientes:
+        parser.error("Indica el archivo de pedidos o --pendientes.")
+
+    config_logger()
+
+    inicio_lote = datetime.now()
+    ruta_reporte = args.reporte or f"reporte_lote_{inicio_lote.strftime('%Y%m%d_%H%M%S')}.json"
+
+    if args.pendientes:
+        resultados = procesar_pendientes(args)
+    else:
+        pedidos = leer_pedidos(args.pedidos)
+        log(f"[lote] {len(pedidos)} pedidos leídos de {args.pedidos}. Hilos: {args.hilos}")
+        resultados = ejecutar_lote(pedidos, args)
+
+    if not args.sin_correo:
+        enviar_correos(resultados, crear_transporte(args.transporte), resumir=not args.sin_resumen)
+
+    reporte = escribir_reporte(resultados, ruta_reporte, inicio_lote)
+    log(f"[lote] Terminado: {reporte['ok']} ok, {reporte['en_cola']} en cola, "
+        f"{reporte['error']} con error. Reporte: {ruta_reporte}")
+
+    return 0 if reporte["error"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -10,10 +10,12 @@ from PyQt5.QtWidgets import (
     QVBoxLayout, QHBoxLayout, QMessageBox
 )
 from PyQt5.QtCore import Qt
-import PyPDF2
 
 # Importamos el módulo de estilos
 import Modules.style_borrado_expte as style_borrado
+from Modules.cache_pdf import CachePDF
+from Modules.borrado_fojas import reemplazar_atomico
+from Modules.motor_pdf import obtener_motor
 
 try:
     import win32com.client as win32
@@ -107,6 +109,9 @@ class PDFManager(QMainWindow):
         self.main_layout.addLayout(self.info_layout)
         self.main_layout.addWidget(self.text_log)
         
+        # Caché de PDFs ya parseados (compartida por búsqueda, portada y borrado)
+        self.cache_pdf = CachePDF()
+        
         # Configurar el logger
         self.config_logger()
         
@@ -196,16 +201,15 @@ class PDFManager(QMainWindow):
         
         # Intentar abrir y contar páginas
         try:
-            with open(pdf_path, "rb") as f:
-                reader = PyPDF2.PdfReader(f)
-                total_pages = len(reader.pages)
-                
-                self.print_log(f"El archivo '{pdf_path}' existe. Páginas: {total_pages}")
-                QMessageBox.information(
-                    self,
-                    "Búsqueda exitosa",
-                    f"Se encontró el PDF.\nCantidad de páginas: {total_pages}"
-                )
+            reader = self.cache_pdf.obtener(pdf_path)
+            total_pages = len(reader.pages)
+            
+            self.print_log(f"El archivo '{pdf_path}' existe. Páginas: {total_pages}")
+            QMessageBox.information(
+                self,
+                "Búsqueda exitosa",
+                f"Se encontró el PDF.\nCantidad de páginas: {total_pages}"
+            )
             
             # Intentar leer la primera página (portada)
             self.leer_datos_portada(pdf_path)
@@ -228,37 +232,35 @@ class PDFManager(QMainWindow):
         Ajusta el contenido de los label_info_* en la interfaz.
         """
         try:
-            with open(pdf_path, "rb") as f:
-                reader = PyPDF2.PdfReader(f)
-                if len(reader.pages) == 0:
-                    self.print_log("El PDF no contiene páginas.", level="warning")
-                    return
-                
-                first_page = reader.pages[0]
-                text = first_page.extract_text() or ""
-                
-                lines = text.split("\n")
-                
-                nro_val = "-"
-                iniciado_val = "-"
-                extracto_val = "-"
-                
-                for line in lines:
-                    line = line.strip()
-                    if line.startswith("Nro:"):
-                        nro_val = line.replace("Nro:", "").strip()
-                    elif line.startswith("Iniciado:"):
-                        iniciado_val = line.replace("Iniciado:", "").strip()
-                    elif line.startswith("Extracto:"):
-                        extracto_val = line.replace("Extracto:", "").strip()
-                
-                # Actualizamos los labels
-                self.label_info_nro.setText(f"Nro: {nro_val}")
-                self.label_info_iniciado.setText(f"Iniciado: {iniciado_val}")
-                self.label_info_extracto.setText(f"Extracto: {extracto_val}")
-                
-                self.print_log(f"Datos portada => Nro: {nro_val}, Iniciado: {iniciado_val}, Extracto: {extracto_val}")
-                
+            reader = self.cache_pdf.obtener(pdf_path)
+            if len(reader.pages) == 0:
+                self.print_log("El PDF no contiene páginas.", level="warning")
+                return
+            
+            text = reader.pages[0].extract_text() or ""
+            
+            lines = text.split("\n")
+            
+            nro_val = "-"
+            iniciado_val = "-"
+            extracto_val = "-"
+            
+            for line in lines:
+                line = line.strip()
+                if line.startswith("Nro:"):
+                    nro_val = line.replace("Nro:", "").strip()
+                elif line.startswith("Iniciado:"):
+                    iniciado_val = line.replace("Iniciado:", "").strip()
+                elif line.startswith("Extracto:"):
+                    extracto_val = line.replace("Extracto:", "").strip()
+            
+            # Actualizamos los labels
+            self.label_info_nro.setText(f"Nro: {nro_val}")
+            self.label_info_iniciado.setText(f"Iniciado: {iniciado_val}")
+            self.label_info_extracto.setText(f"Extracto: {extracto_val}")
+            
+            self.print_log(f"Datos portada => Nro: {nro_val}, Iniciado: {iniciado_val}, Extracto: {extracto_val}")
+            
         except PermissionError as e:
             self.print_log(f"Permiso denegado al leer portada: {str(e)}", level="error")
         except Exception as e:
@@ -357,21 +359,22 @@ class PDFManager(QMainWindow):
         
         # Eliminar páginas
         try:
-            with open(pdf_path, 'rb') as f:
-                reader = PyPDF2.PdfReader(f)
-                writer = PyPDF2.PdfWriter()
-                
-                total_pages = len(reader.pages)
-                
-                for idx in range(total_pages):
-                    page_number = idx + 1
-                    if inicio <= page_number <= fin:
-                        continue
-                    writer.add_page(reader.pages[idx])
-                
-                with open(pdf_path, 'wb') as out_f:
-                    writer.write(out_f)
-                    
+            # El reader trabaja sobre una copia en memoria, por lo que el archivo
+            # original no queda abierto mientras se reescribe
+            reader = self.cache_pdf.obtener(pdf_path)
+            
+            try:
+                with obtener_motor().abrir(reader) as documento:
+                    documento.eliminar_paginas(range(inicio, fin + 1))
+                    # Se escribe en un temporal y se reemplaza el original al final
+                    reemplazar_atomico(
+                        pdf_path, documento.guardar,
+                        paginas_esperadas=documento.cantidad_paginas()
+                    )
+            finally:
+                # El contenido en disco ya no coincide con el documento cacheado
+                self.cache_pdf.invalidar(pdf_path)
+            
             self.print_log(f"Fojas {inicio}-{fin} eliminadas correctamente en: {pdf_path}")
             QMessageBox.information(
                 self, 
@@ -0,0 +1,176 @@
+"""
+Índice local de portadas de expedientes.
+
+Recorre \\\\fs01\\Digitalizacion_Jubilaciones\\<año>\\E\\... y guarda en una
+base SQLite los datos de portada (Nro, Iniciado, Extracto y CUIL), la
+cantidad de páginas y el SHA-256 de cada expediente, con la misma
+extracción que usa delete_fs.py.
+
+Los PDFs se procesan con un pool de hilos: en el share cada archivo es
+casi todo espera de red, así que conviene tener muchos en vuelo. Los que no
+cambiaron (mismo tamaño y mtime) desde la última pasada no se vuelven a
+leer. El avance queda registrado en la base: si el recorrido se interrumpe,
+la próxima ejecución continúa desde donde quedó.
+
+Uso:
+    # Construir o actualizar el índice (todos los años, o sólo algunos)
+    python indexar_portadas.py
+    python indexar_portadas.py --anio 2024 --anio 2025 --hilos 32
+
+    # Empezar un recorrido nuevo aunque el anterior haya quedado a medias
+    python indexar_portadas.py --desde-cero
+
+    # Buscar por nombre, CUIL o Nro
+    python indexar_portadas.py --buscar "perez juan"
+    python indexar_portadas.py --buscar 20-12345678-9
+    python indexar_portadas.py --buscar E-006666-2025
+"""
+import sys
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from Modules.expedientes import RUTA_RAIZ
+from Modules.indice_portadas import DB_INDICE, indexar_pdf, obtener_indice, recorrer_expedientes
+
+# Archivos en vuelo por hilo: acota la memoria sin dejar hilos ociosos
+EN_VUELO_POR_HILO = 4
+
+# Cada cuántos expedientes se informa el avance
+INTERVALO_AVANCE = 500
+
+
+def log(mensaje, level="info"):
+    print(f"[{level.upper()}] {mensaje}")
+
+
+class Contadores:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.indexados = 0
+        self.salteados = 0
+        self.ya_hechos = 0
+        self.sin_pdf = 0
+        self.errores = 0
+
+    def sumar(self, campo):
+        with self._lock:
+            setattr(self, campo, getattr(self, campo) + 1)
+            return self.total()
+
+    def total(self):
+        return self.indexados + self.salteados + self.ya_hechos + self.sin_pdf + self.errores
+
+
+def procesar(indice, pdf_path, subcarpeta, forzar, recorrido, contadores):
+    try:
+        if indexar_pdf(indice, pdf_path, subcarpeta, forzar=forzar, recorrido=recorrido):
+            total = contadores.sumar("indexados")
+        else:
+            total = contadores.sumar("salteados")
+    except FileNotFoundError:
+        total = contadores.sumar("sin_pdf")
+    except Exception as e:
+        total = contadores.sumar("errores")
+        log(f"{subcarpeta}: {e}", level="error")
+    if total % INTERVALO_AVANCE == 0:
+        log(f"{total} expedientes procesados ({contadores.indexados} indexados)...")
+
+
+def construir(indice, raiz, anios=None, forzar=False, hilos=16, reanudar=True):
+    """
+    Recorre 'raiz' e indexa los expedientes con 'hilos' hilos. Con
+    reanudar=True se saltean, sin tocar el share, los expedientes que un
+    recorrido interrumpido ya había procesado. Retorna los Contadores.
+    """
+    recorrido = indice.iniciar_recorrido(raiz, reanudar=reanudar)
+    ya_procesados = indice.verificados(recorrido)
+    if ya_procesados:
+        log(f"Reanudando el recorrido {recorrido}: {len(ya_procesados)} expedientes ya procesados.")
+
+    contadores = Contadores()
+    limite_en_vuelo = max(1, hilos) * EN_VUELO_POR_HILO
+    en_vuelo = set()
+    with ThreadPoolExecutor(max_workers=max(1, hilos)) as pool:
+        try:
+            for pdf_path, subcarpeta in recorrer_expedientes(raiz, anios):
+                if subcarpeta in ya_procesados:
+                    contadores.sumar("ya_hechos")
+                    continue
+                if len(en_vuelo) >= limite_en_vuelo:
+                    _, en_vuelo = wait(en_vuelo, return_when=FIRST_COMPLETED)
+                en_vuelo.add(pool.submit(
+                    procesar, indice, pdf_path, subcarpeta, forzar, recorrido, contadores
+                ))
+            wait(en_vuelo)
+        except KeyboardInterrupt:
+            # Lo ya procesado quedó registrado; se espera sólo a los que están en curso
+            for futuro in en_vuelo:
+                futuro.cancel()
+            log(f"Recorrido {recorrido} interrumpido. La próxima ejecución continúa desde acá.",
+                level="warning")
+            raise
+
+    if contadores.errores == 0:
+        # Sólo con un recorrido completo y sin errores se sabe qué expedientes ya no existen
+        eliminados = indice.eliminar_no_vistos(recorrido, anios)
+        if eliminados:
+            log(f"{eliminados} expedientes que ya no existen se quitaron del índice.")
+        indice.terminar_recorrido(recorrido)
+    else:
+        # Queda en curso: la próxima ejecución reintenta sólo los que fallaron
+        log(f"El recorrido {recorrido} terminó con errores; se reintentarán en la próxima ejecución.",
+            level="warning")
+    return contadores
+
+
+def mostrar(resultados):
+    if not resultados:
+        print("Sin resultados.")
+        return
+    for fila in resultados:
+        print(f"{fila['subcarpeta']}  Nro: {fila['nro']}  Iniciado: {fila['iniciado']}  "
+              f"Extracto: {fila['extracto']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Índice local de portadas de expedientes.")
+    parser.add_argument("--db", default=DB_INDICE, help=f"Base del índice (por defecto {DB_INDICE}).")
+    parser.add_argument("--raiz", default=RUTA_RAIZ,
+                        help=f"Carpeta raíz de los expedientes (por defecto {RUTA_RAIZ}).")
+    parser.add_argument("--anio", action="append", help="Indexa sólo este año (se puede repetir).")
+    parser.add_argument("--forzar", action="store_true", help="Vuelve a leer también los PDFs sin cambios.")
+    parser.add_argument("--hilos", type=int, default=16,
+                        help="PDFs que se procesan en paralelo (por defecto 16).")
+    parser.add_argument("--desde-cero", action="store_true",
+                        help="No reanuda un recorrido interrumpido: empieza uno nuevo.")
+    parser.add_argument("--buscar", help="Busca por nombre, CUIL o Nro en lugar de indexar.")
+    args = parser.parse_args(argv)
+
+    indice = obtener_indice(args.db)
+
+    if args.buscar:
+        inicio = time.perf_counter()
+        resultados = indice.buscar(args.buscar)
+        mostrar(resultados)
+        log(f"{len(resultados)} resultado(s) en {(time.perf_counter() - inicio) * 1000:.1f} ms")
+        return 0
+
+    inicio = time.monotonic()
+    try:
+        c = construir(indice, args.raiz, args.anio, args.forzar, args.hilos,
+                      reanudar=not args.desde_cero)
+    except OSError as e:
+        log(str(e), level="error")
+        return 1
+    except KeyboardInterrupt:
+        return 130
+    log(f"Índice actualizado en {time.monotonic() - inicio:.1f} s: {c.indexados} indexados, "
+        f"{c.salteados} sin cambios, {c.ya_hechos} ya procesados antes de la interrupción, "
+        f"{c.sin_pdf} carpetas sin PDF, {c.errores} con error.")
+    return 0 if c.errores == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
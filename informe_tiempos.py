@@ -0,0 +1,153 @@
+"""
+Informe de latencias por fase a partir de la auditoría.
+
+Cada búsqueda, lectura de portada, borrado y tanda de correos deja en la
+auditoría (auditoria/AAAA-MM-DD.jsonl) la duración y los bytes de cada
+fase: sondeo, backup, lectura (red y parseo), escritura, envío, etc. Este
+comando calcula p50, p95 y p99 por fase, en total y por tamaño de archivo,
+para saber dónde conviene optimizar.
+
+Uso:
+    python informe_tiempos.py --dias 30
+    python informe_tiempos.py --mes anterior --operacion borrado
+    python informe_tiempos.py --desde 2025-03-01 --sin-tramos --json
+"""
+import sys
+import json
+import math
+import argparse
+from collections import OrderedDict
+
+from Modules.auditoria import DIR_AUDITORIA, agregar_argumentos_periodo, leer_registros, periodo
+
+MB = 1024 * 1024
+
+# Tramos de tamaño del PDF: (límite superior exclusivo, etiqueta)
+TRAMOS_TAMANIO = [
+    (1 * MB, "< 1 MB"),
+    (10 * MB, "1-10 MB"),
+    (50 * MB, "10-50 MB"),
+    (200 * MB, "50-200 MB"),
+    (math.inf, ">= 200 MB"),
+]
+
+PERCENTILES = (50, 95, 99)
+
+
+def tramo_de(tamanio):
+    if tamanio is None:
+        return "sin tamaño"
+    for limite, etiqueta in TRAMOS_TAMANIO:
+        if tamanio < limite:
+            return etiqueta
+    return TRAMOS_TAMANIO[-1][1]
+
+
+def percentil(ordenados, p):
+    """
+    Percentil 'p' (0-100) de una lista ordenada, con interpolación lineal.
+    """
+    posicion = (len(ordenados) - 1) * p / 100
+    abajo = math.floor(posicion)
+    arriba = min(abajo + 1, len(ordenados) - 1)
+    return ordenados[abajo] + (ordenados[arriba] - ordenados[abajo]) * (posicion - abajo)
+
+
+def agrupar_muestras(registros, por_tramo=True):
+    """
+    {(tramo, "operacion.fase"): {"segundos": [...], "velocidades": [...]}}.
+    Además de las fases, cada operación aporta su duración total como
+    "operacion.total". Con por_tramo=False todo va al tramo "todos".
+    """
+    muestras = {}
+
+    def agregar(tramo, nombre, segundos, cantidad_bytes):
+        muestra = muestras.setdefault((tramo, nombre), {"segundos": [], "velocidades": []})
+        muestra["segundos"].append(segundos)
+        if cantidad_bytes and segundos > 0:
+            muestra["velocidades"].append(cantidad_bytes / segundos / MB)
+
+    for registro in registros:
+        fases = registro.get("fases")
+        if not fases:
+            continue
+        operacion = registro.get("operacion", "?")
+        tramos = ["todos"]
+        if por_tramo:
+            tramos.append(tramo_de(registro.get("tamanio")))
+        for tramo in tramos:
+            for fase, medicion in fases.items():
+                agregar(tramo, f"{operacion}.{fase}", medicion.get("segundos", 0.0), medicion.get("bytes", 0))
+            if "segundos" in registro:
+                agregar(tramo, f"{operacion}.total", registro["segundos"], 0)
+    return muestras
+
+
+def calcular(muestras):
+    """
+    Estadísticas por (tramo, fase), ordenadas por tramo y luego por fase.
+    """
+    orden_tramos = ["todos"] + [etiqueta for _, etiqueta in TRAMOS_TAMANIO] + ["sin tamaño"]
+    filas = OrderedDict()
+    for (tramo, nombre) in sorted(muestras, key=lambda c: (orden_tramos.index(c[0]), c[1])):
+        muestra = muestras[(tramo, nombre)]
+        segundos = sorted(muestra["segundos"])
+        velocidades = sorted(muestra["velocidades"])
+        fila = {"muestras": len(segundos)}
+        for p in PERCENTILES:
+            fila[f"p{p}"] = round(percentil(segundos, p), 4)
+        fila["max"] = round(segundos[-1], 4)
+        fila["mb_s_p50"] = round(percentil(velocidades, 50), 1) if velocidades else None
+        filas.setdefault(tramo, OrderedDict())[nombre] = fila
+    return filas
+
+
+def mostrar(filas):
+    if not filas:
+        print("Sin registros con tiempos por fase para el período indicado.")
+        return
+    for tramo, fases in filas.items():
+        print(f"\n== {'Todos los tamaños' if tramo == 'todos' else tramo} ==")
+        ancho = max(len("Fase"), max(len(nombre) for nombre in fases))
+        print(f"{'Fase':<{ancho}}  {'n':>6}  {'p50 s':>8}  {'p95 s':>8}  {'p99 s':>8}  "
+              f"{'máx s':>8}  {'MB/s p50':>8}")
+        for nombre, fila in fases.items():
+            velocidad = f"{fila['mb_s_p50']:.1f}" if fila["mb_s_p50"] is not None else "-"
+            print(f"{nombre:<{ancho}}  {fila['muestras']:>6}  {fila['p50']:>8.3f}  {fila['p95']:>8.3f}  "
+                  f"{fila['p99']:>8.3f}  {fila['max']:>8.3f}  {velocidad:>8}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Latencias p50/p95/p99 por fase, según la auditoría.")
+    parser.add_argument("--dir", default=DIR_AUDITORIA,
+                        help=f"Carpeta de la auditoría (por defecto {DIR_AUDITORIA}).")
+    agregar_argumentos_periodo(parser)
+    parser.add_argument("--operacion", choices=["borrado", "busqueda", "portada", "correo"],
+                        help="Sólo esta operación.")
+    parser.add_argument("--resultado", default="ok",
+                        help="Sólo operaciones con este resultado (por defecto ok; 'todos' para no filtrar).")
+    parser.add_argument("--sin-tramos", action="store_true",
+                        help="No desglosa por tamaño de archivo.")
+    parser.add_argument("--json", action="store_true", help="Salida en JSON.")
+    args = parser.parse_args(argv)
+
+    try:
+        desde, hasta = periodo(args)
+    except ValueError as e:
+        parser.error(f"Fecha inválida: {e}")
+
+    registros = (
+        r for r in leer_registros(desde, hasta, args.dir, operacion=args.operacion)
+        if args.resultado == "todos" or r.get("resultado") == args.resultado
+    )
+    filas = calcular(agrupar_muestras(registros, por_tramo=not args.sin_tramos))
+
+    if args.json:
+        print(json.dumps(filas, ensure_ascii=False, indent=2))
+    else:
+        mostrar(filas)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,61 @@
+"""
+Mide los motores PDF instalados y elige el más rápido como predeterminado.
+
+Abre, cuenta páginas, extrae texto, quita una foja y guarda cada PDF de
+muestra con cada motor disponible (PyPDF2 siempre; PyMuPDF si está
+instalado). El resultado queda en motores_pdf.json y a partir de ahí la
+ventana, el lote y el proceso de resoluciones usan el de mayor MB/s.
+La variable BORRADO_FOJAS_MOTOR_PDF fuerza un motor sin medir.
+
+Conviene usar como muestra algunos expedientes reales (escaneos grandes y
+chicos), copiados a una carpeta local.
+
+Uso:
+    python medir_motores_pdf.py C:\\Temp\\muestras\\*.pdf
+    python medir_motores_pdf.py muestra.pdf --paginas-texto 5 --no-guardar
+"""
+import sys
+import glob
+import argparse
+
+from Modules.motor_pdf import (
+    MEDICIONES_MOTORES, guardar_mediciones, medir_motores, motor_por_defecto, motores_disponibles
+)
+
+
+def mostrar(mediciones):
+    print(f"{'Motor':<8}  {'MB/s':>8}  {'Apertura s':>10}  {'Texto s':>8}  {'Borrado s':>9}  {'Total s':>8}")
+    for nombre, datos in mediciones["motores"].items():
+        if "error" in datos:
+            print(f"{nombre:<8}  error: {datos['error']}")
+            continue
+        segundos = datos["segundos"]
+        print(f"{nombre:<8}  {datos['mb_s'] or 0:>8.2f}  {segundos['apertura']:>10.3f}  "
+              f"{segundos['texto']:>8.3f}  {segundos['borrado']:>9.3f}  {segundos['total']:>8.3f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mide los motores PDF y elige el predeterminado.")
+    parser.add_argument("muestras", nargs="+", help="PDFs de muestra (acepta comodines).")
+    parser.add_argument("--motor", action="append", choices=motores_disponibles(),
+                        help="Sólo este motor (se puede repetir).")
+    parser.add_argument("--paginas-texto", type=int,
+                        help="Extrae el texto sólo de las primeras N páginas (por defecto, de todas).")
+    parser.add_argument("--salida", default=MEDICIONES_MOTORES,
+                        help=f"Dónde guardar las mediciones (por defecto {MEDICIONES_MOTORES}).")
+    parser.add_argument("--no-guardar", action="store_true",
+                        help="Sólo muestra las mediciones, sin cambiar el motor predeterminado.")
+    args = parser.parse_args(argv)
+
+    muestras = [ruta for patron in args.muestras for ruta in (glob.glob(patron) or [patron])]
+    mediciones = medir_motores(muestras, args.motor, args.paginas_texto)
+    mostrar(mediciones)
+
+    if not args.no_guardar:
+        guardar_mediciones(mediciones, args.salida)
+        print(f"\nMediciones guardadas en {args.salida}. Motor predeterminado: {motor_por_defecto(args.salida)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,336 @@
+"""
+Banco de pruebas de rendimiento del borrado de fojas y la extracción de texto.
+
+Genera un corpus sintético y determinístico (ver Modules/corpus_sintetico.py):
+expedientes escaneados, de texto y mixtos de 1 a 1000 páginas, más
+resoluciones de texto. Sobre cada PDF mide las operaciones de la ventana,
+el lote y el proceso de resoluciones:
+
+    paginas           conteo de páginas por sondeo (Buscar PDF)
+    portada           lectura del documento y de los datos de la portada
+    borrado           lectura + eliminación de un rango (actualización incremental)
+    borrado_completo  lectura + eliminación de un rango reescribiendo el PDF
+    backup            copia al almacén de backups
+    texto             extracción del texto completo (proceso de resoluciones)
+
+De cada medición guarda el tiempo de reloj, el pico de memoria (RSS) y los
+bytes escritos. Cada medición corre en un proceso nuevo, para que el pico de
+memoria sea el de esa operación y no el de las anteriores.
+
+Los resultados se guardan en JSON y se pueden comparar con una corrida
+anterior: el comando termina con código 1 si alguna operación empeoró más
+que la tolerancia, así sirve para comparar una rama contra la base.
+
+Uso:
+    python medir_rendimiento.py --guardar base.json
+    python medir_rendimiento.py --comparar base.json --guardar nuevo.json
+    python medir_rendimiento.py --tamanios 1,10,100 --operacion borrado --operacion texto
+    python medir_rendimiento.py --corpus C:\\Temp\\corpus_fojas --solo-generar
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import socket
+import argparse
+import platform
+import statistics
+import tempfile
+import multiprocessing
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows: el pico de memoria se pide con GetProcessMemoryInfo
+    resource = None
+    import ctypes
+    from ctypes import wintypes
+
+from Modules.corpus_sintetico import (
+    DPI_ESCANEO, TAMANIOS, TAMANIOS_RESOLUCION, TIPOS, generar_corpus
+)
+from Modules.backup_expedientes import AlmacenBackups
+from Modules.borrado_fojas import eliminar_paginas
+from Modules.lectura_local import leer_pdf
+from Modules.motor_pdf import obtener_motor
+from Modules.portada_expediente import extraer_datos_portada
+from Modules.rangos_fojas import RangosFojas
+from Modules.sondeo_pdf import sondear_pdf
+
+CORPUS_POR_DEFECTO = os.path.join(tempfile.gettempdir(), "corpus_fojas")
+
+OPERACIONES = ("paginas", "portada", "borrado", "borrado_completo", "backup", "texto")
+
+# Operaciones que sólo tienen sentido para una clase de documento
+_SOLO_EXPEDIENTES = ("portada",)
+
+# Por debajo de esta diferencia (segundos) no se habla de regresión: es ruido
+DIFERENCIA_MINIMA = 0.005
+
+MB = 1024 * 1024
+
+
+def rss_pico():
+    """
+    Pico de memoria residente del proceso actual, en bytes.
+    """
+    if resource is not None:
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux informa KB; macOS, bytes
+        return pico if sys.platform == "darwin" else pico * 1024
+    return _rss_pico_windows()
+
+
+def _rss_pico_windows():
+    class ContadoresMemoria(ctypes.Structure):
+        _fields_ = [
+            ("cb", wintypes.DWORD),
+            ("PageFaultCount", wintypes.DWORD),
+            ("PeakWorkingSetSize", ctypes.c_size_t),
+            ("WorkingSetSize", ctypes.c_size_t),
+            ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+            ("PagefileUsage", ctypes.c_size_t),
+            ("PeakPagefileUsage", ctypes.c_size_t),
+        ]
+
+    kernel32 = ctypes.WinDLL("kernel32")
+    kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+    psapi = ctypes.WinDLL("psapi")
+    psapi.GetProcessMemoryInfo.argtypes = [wintypes.HANDLE, ctypes.POINTER(ContadoresMemoria), wintypes.DWORD]
+    contadores = ContadoresMemoria()
+    contadores.cb = ctypes.sizeof(contadores)
+    psapi.GetProcessMemoryInfo(kernel32.GetCurrentProcess(), ctypes.byref(contadores), contadores.cb)
+    return contadores.PeakWorkingSetSize
+
+
+def rango_a_borrar(paginas):
+    """
+    El 10% de las fojas del medio del documento (al menos una).
+    """
+    cantidad = max(1, paginas // 10)
+    inicio = max(1, (paginas - cantidad) // 2 + 1)
+    return RangosFojas([(inicio, inicio + cantidad - 1)])
+
+
+def _borrar(caso, trabajo, compactar):
+    copia = os.path.join(trabajo, os.path.basename(caso["ruta"]))
+    shutil.copyfile(caso["ruta"], copia)
+    inicio = time.perf_counter()
+    reader, metricas = leer_pdf(copia)
+    resultado = eliminar_paginas(copia, reader, rango_a_borrar(caso["paginas"]), compactar=compactar)
+    return inicio, {"bytes_leidos": metricas["bytes"], "bytes_escritos": resultado["bytes_escritos"],
+                    "modo": resultado["modo"]}
+
+
+def ejecutar_operacion(operacion, caso):
+    """
+    Ejecuta una vez 'operacion' sobre el PDF de 'caso' y retorna la
+    medición: segundos, pico de RSS (total y lo que creció durante la
+    operación) y bytes leídos/escritos. Lo que se prepara antes (copias de
+    trabajo, carpetas) no entra en el tiempo.
+    """
+    trabajo = tempfile.mkdtemp(prefix="medicion_")
+    try:
+        rss_antes = rss_pico()
+        inicio = time.perf_counter()
+        datos = {"bytes_leidos": 0, "bytes_escritos": 0}
+
+        if operacion == "paginas":
+            sondeo = sondear_pdf(caso["ruta"])
+            datos["bytes_leidos"] = sondeo["bytes_leidos"]
+        elif operacion == "portada":
+            reader, metricas = leer_pdf(caso["ruta"])
+            extraer_datos_portada(reader)
+            datos["bytes_leidos"] = metricas["bytes"]
+        elif operacion == "borrado":
+            inicio, datos = _borrar(caso, trabajo, compactar=False)
+        elif operacion == "borrado_completo":
+            inicio, datos = _borrar(caso, trabajo, compactar=True)
+        elif operacion == "backup":
+            entrada = AlmacenBackups(trabajo).guardar(caso["ruta"], caso["subcarpeta"])
+            datos["bytes_leidos"] = datos["bytes_escritos"] = os.path.getsize(entrada["objeto"])
+        elif operacion == "texto":
+            with obtener_motor().abrir(caso["ruta"]) as documento:
+                documento.extraer_texto()
+            datos["bytes_leidos"] = caso["tamanio"]
+        else:
+            raise ValueError(f"Operación desconocida: {operacion}")
+
+        datos["segundos"] = time.perf_counter() - inicio
+        pico = rss_pico()
+        datos["rss_pico"] = pico
+        datos["rss_operacion"] = max(0, pico - rss_antes)
+        return datos
+    finally:
+        shutil.rmtree(trabajo, ignore_errors=True)
+
+
+def medir(casos, operaciones, repeticiones, aislar=True, log=print):
+    """
+    Mide cada operación sobre cada caso 'repeticiones' veces y retorna una
+    fila por (caso, operación) con mínimo, mediana y máximo de los tiempos,
+    el mayor pico de RSS y los bytes de la última repetición.
+    """
+    contexto = multiprocessing.get_context("spawn")
+    filas = []
+    for caso in casos:
+        for operacion in operaciones:
+            if operacion in _SOLO_EXPEDIENTES and caso["clase"] != "expediente":
+                continue
+            if operacion.startswith("borrado") and caso["paginas"] < 2:
+                continue
+            mediciones = []
+            for _ in range(repeticiones):
+                if aislar:
+                    # Un proceso por medición: el pico de RSS arranca de cero
+                    with contexto.Pool(1) as pool:
+                        mediciones.append(pool.apply(ejecutar_operacion, (operacion, caso)))
+                else:
+                    mediciones.append(ejecutar_operacion(operacion, caso))
+            segundos = [m["segundos"] for m in mediciones]
+            fila = {
+                "caso": caso["caso"],
+                "operacion": operacion,
+                "paginas": caso["paginas"],
+                "tamanio": caso["tamanio"],
+                "segundos": {
+                    "min": round(min(segundos), 4),
+                    "mediana": round(statistics.median(segundos), 4),
+                    "max": round(max(segundos), 4),
+                },
+                "rss_pico": max(m["rss_pico"] for m in mediciones),
+                "rss_operacion": max(m["rss_operacion"] for m in mediciones),
+                "bytes_leidos": mediciones[-1]["bytes_leidos"],
+                "bytes_escritos": mediciones[-1]["bytes_escritos"],
+            }
+            if "modo" in mediciones[-1]:
+                fila["modo"] = mediciones[-1]["modo"]
+            log(f"{caso['caso']:<26} {operacion:<17} {fila['segundos']['mediana']:>9.3f} s  "
+                f"RSS {fila['rss_pico'] / MB:>7.1f} MB (+{fila['rss_operacion'] / MB:.1f})  "
+                f"escritos {fila['bytes_escritos'] / MB:>8.2f} MB")
+            filas.append(fila)
+    return filas
+
+
+def comparar(actual, base, tolerancia):
+    """
+    Compara la mediana de cada (caso, operación) con la corrida 'base'.
+    Retorna la lista de diferencias y cuántas son regresiones (más lento que
+    base * (1 + tolerancia) y por más de DIFERENCIA_MINIMA segundos).
+    """
+    anteriores = {(f["caso"], f["operacion"]): f for f in base["resultados"]}
+    diferencias = []
+    regresiones = 0
+    for fila in actual["resultados"]:
+        anterior = anteriores.get((fila["caso"], fila["operacion"]))
+        if anterior is None:
+            continue
+        antes = anterior["segundos"]["mediana"]
+        ahora = fila["segundos"]["mediana"]
+        relacion = ahora / antes if antes > 0 else 1.0
+        if relacion > 1 + tolerancia and ahora - antes > DIFERENCIA_MINIMA:
+            estado = "PEOR"
+            regresiones += 1
+        elif relacion < 1 - tolerancia and antes - ahora > DIFERENCIA_MINIMA:
+            estado = "mejor"
+        else:
+            estado = "igual"
+        diferencias.append({
+            "caso": fila["caso"],
+            "operacion": fila["operacion"],
+            "antes": antes,
+            "ahora": ahora,
+            "relacion": round(relacion, 3),
+            "rss_antes": anterior["rss_operacion"],
+            "rss_ahora": fila["rss_operacion"],
+            "escritos_antes": anterior["bytes_escritos"],
+            "escritos_ahora": fila["bytes_escritos"],
+            "estado": estado,
+        })
+    return diferencias, regresiones
+
+
+def mostrar_comparacion(diferencias):
+    print(f"\n{'Caso':<26} {'Operación':<17} {'Antes s':>9} {'Ahora s':>9} {'x':>6}  "
+          f"{'RSS op. MB':>15}  {'Escritos MB':>17}  Estado")
+    for d in diferencias:
+        rss = f"{d['rss_antes'] / MB:.1f}->{d['rss_ahora'] / MB:.1f}"
+        escritos = f"{d['escritos_antes'] / MB:.2f}->{d['escritos_ahora'] / MB:.2f}"
+        print(f"{d['caso']:<26} {d['operacion']:<17} {d['antes']:>9.3f} {d['ahora']:>9.3f} "
+              f"{d['relacion']:>6.2f}  {rss:>15}  {escritos:>17}  {d['estado']}")
+
+
+def _lista_enteros(texto):
+    return tuple(int(parte) for parte in texto.split(",") if parte.strip())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Banco de pruebas de borrado de fojas y extracción de texto.")
+    parser.add_argument("--corpus", default=CORPUS_POR_DEFECTO,
+                        help=f"Carpeta del corpus sintético (por defecto {CORPUS_POR_DEFECTO}).")
+    parser.add_argument("--tamanios", type=_lista_enteros, default=TAMANIOS,
+                        help="Páginas de los expedientes, separadas por coma (por defecto "
+                             f"{','.join(map(str, TAMANIOS))}).")
+    parser.add_argument("--tipo", action="append", choices=TIPOS,
+                        help="Sólo expedientes de este tipo (se puede repetir).")
+    parser.add_argument("--sin-resoluciones", action="store_true", help="No incluye resoluciones.")
+    parser.add_argument("--dpi", type=int, default=DPI_ESCANEO,
+                        help=f"Resolución de las páginas escaneadas (por defecto {DPI_ESCANEO}).")
+    parser.add_argument("--regenerar", action="store_true", help="Vuelve a generar el corpus aunque exista.")
+    parser.add_argument("--solo-generar", action="store_true", help="Genera el corpus y termina.")
+    parser.add_argument("--operacion", action="append", choices=OPERACIONES,
+                        help="Sólo esta operación (se puede repetir).")
+    parser.add_argument("--repeticiones", type=int, default=3,
+                        help="Veces que se mide cada operación; se informa la mediana (por defecto 3).")
+    parser.add_argument("--sin-aislar", action="store_true",
+                        help="Mide en este mismo proceso (más rápido, pero el pico de RSS se acumula).")
+    parser.add_argument("--guardar", help="Guarda los resultados en este JSON.")
+    parser.add_argument("--comparar", help="JSON de una corrida anterior contra el cual comparar.")
+    parser.add_argument("--tolerancia", type=float, default=0.10,
+                        help="Empeoramiento relativo tolerado antes de marcar una regresión (por defecto 0.10).")
+    args = parser.parse_args(argv)
+
+    casos = generar_corpus(
+        args.corpus, args.tamanios, tuple(args.tipo or TIPOS),
+        () if args.sin_resoluciones else TAMANIOS_RESOLUCION,
+        dpi=args.dpi, regenerar=args.regenerar,
+    )
+    if args.solo_generar:
+        print(f"Corpus listo en {args.corpus}: {len(casos)} PDFs, "
+              f"{sum(c['tamanio'] for c in casos) / MB:.1f} MB.")
+        return 0
+
+    resultados = {
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "equipo": socket.gethostname(),
+        "python": platform.python_version(),
+        "sistema": platform.platform(),
+        "motor_pdf": obtener_motor().nombre,
+        "repeticiones": args.repeticiones,
+        "aislado": not args.sin_aislar,
+        "dpi": args.dpi,
+        "resultados": medir(casos, args.operacion or OPERACIONES, args.repeticiones, not args.sin_aislar),
+    }
+
+    if args.guardar:
+        with open(args.guardar, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=2)
+        print(f"\nResultados guardados en {args.guardar}")
+
+    if args.comparar:
+        with open(args.comparar, "r", encoding="utf-8") as f:
+            base = json.load(f)
+        diferencias, regresiones = comparar(resultados, base, args.tolerancia)
+        mostrar_comparacion(diferencias)
+        if regresiones:
+            print(f"\n{regresiones} operación(es) más lentas que la base (tolerancia {args.tolerancia:.0%}).")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
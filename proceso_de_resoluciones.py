@@ -2,9 +2,10 @@ import os
 import re
 import shutil
 import pyodbc
-import PyPDF2
 from datetime import datetime
 
+from Modules.motor_pdf import obtener_motor
+
 # Configuración de la base de datos
 def get_db_connection():
     server = 'sql01'
@@ -28,14 +29,11 @@ def copy_files():
                     shutil.copy(full_file_name, dest_dir)
                     print(f'Archivo {file} copiado a {dest_dir}')
 
-# Función para extraer texto de PDF usando PyPDF2
+# Función para extraer texto de PDF con el motor PDF por defecto (ver Modules/motor_pdf.py)
 def extract_text_from_pdf(pdf_path):
     try:
-        with open(pdf_path, 'rb') as file:
-            reader = PyPDF2.PdfReader(file)
-            text = ''
-            for page_num in range(len(reader.pages)):
-                text += reader.pages[page_num].extract_text()
+        with obtener_motor().abrir(pdf_path) as documento:
+            text = documento.extraer_texto()
         return text.strip()
     except Exception as e:
         raise Exception(f"Error al leer el archivo PDF {pdf_path}: {e}")
@@ -0,0 +1,96 @@
+"""
+Restauración de expedientes desde C:\\Bk_de_Expedientes.
+
+Uso:
+    # Listar los backups de un expediente
+    python restaurar_backup.py --expediente E-006666-2025 --listar
+
+    # Restaurar el último backup completo (o uno puntual con --digest)
+    python restaurar_backup.py --expediente E-006666-2025
+
+    # Restaurar desde un backup delta (sólo fojas eliminadas)
+    python restaurar_backup.py --manifiesto C:\\Bk_de_Expedientes\\deltas\\E-006666-2025_20250117_095624.json
+
+Con --destino el resultado se escribe en otra ruta en lugar de sobrescribir el PDF.
+"""
+import sys
+import shutil
+import argparse
+
+from Modules.backup_expedientes import (
+    DIR_BACKUP, leer_manifiesto, obtener_almacen, restaurar_backup_delta
+)
+from Modules.borrado_fojas import reemplazar_atomico
+from Modules.reservas_expediente import ExpedienteReservado, ReservaExpediente
+
+
+def log(mensaje, level="info"):
+    print(f"[{level.upper()}] {mensaje}")
+
+
+def listar(almacen, expediente):
+    entradas = almacen.listar(expediente)
+    if not entradas:
+        print(f"No hay backups de {expediente}.")
+        return
+    for entrada in entradas:
+        tipo = entrada.get("tipo", "completo")
+        referencia = entrada.get("manifiesto") or entrada.get("objeto")
+        print(f"{entrada['fecha']}  {tipo:<8}  {entrada['digest'][:12]}  "
+              f"{entrada['tamanio']:>12} bytes  {referencia}")
+
+
+def restaurar_completo(almacen, expediente, digest=None, destino=None):
+    """
+    Copia de vuelta el contenido de un backup completo al PDF de origen.
+    """
+    candidatas = [
+        e for e in almacen.listar(expediente)
+        if e.get("tipo", "completo") == "completo"
+        and (digest is None or e["digest"].startswith(digest))
+    ]
+    if not candidatas:
+        raise ValueError(f"No se encontró un backup completo de {expediente}.")
+
+    entrada = candidatas[-1]
+    objeto = almacen.ruta_objeto(entrada["digest"])
+    destino = destino or entrada["origen"]
+
+    with ReservaExpediente(destino, log=log), open(objeto, "rb") as origen:
+        reemplazar_atomico(destino, lambda f: shutil.copyfileobj(origen, f, 8 * 1024 * 1024))
+    log(f"Backup del {entrada['fecha']} ({entrada['digest'][:12]}) restaurado en: {destino}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Restaura expedientes desde el almacén de backups.")
+    parser.add_argument("--backup-dir", default=DIR_BACKUP,
+                        help=f"Carpeta de backups (por defecto {DIR_BACKUP}).")
+    parser.add_argument("--expediente", help="Expediente, p.ej. E-006666-2025.")
+    parser.add_argument("--listar", action="store_true", help="Sólo lista los backups del expediente.")
+    parser.add_argument("--digest", help="Prefijo del hash del backup completo a restaurar.")
+    parser.add_argument("--manifiesto", help="Manifiesto JSON de un backup delta.")
+    parser.add_argument("--destino", help="Escribe el resultado en esta ruta en lugar del PDF original.")
+    args = parser.parse_args(argv)
+
+    almacen = obtener_almacen(args.backup_dir)
+
+    try:
+        if args.manifiesto:
+            destino = args.destino or leer_manifiesto(args.manifiesto)["origen"]
+            with ReservaExpediente(destino, log=log):
+                restaurar_backup_delta(args.manifiesto, destino=args.destino, log=log)
+        elif args.expediente and args.listar:
+            listar(almacen, args.expediente)
+        elif args.expediente:
+            restaurar_completo(almacen, args.expediente, args.digest, args.destino)
+        else:
+            parser.error("Indica --manifiesto o --expediente.")
+    except (OSError, ValueError, ExpedienteReservado) as e:
+        log(str(e), level="error")
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
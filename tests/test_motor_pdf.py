@@ -0,0 +1,113 @@
+# tests/test_motor_pdf.py
+#
+# Desde la raíz del repositorio:
+#   python -m unittest discover -s tests
+# Las pruebas de PyMuPDF se saltean si el paquete no está instalado (o su
+# versión es anterior a VERSION_MINIMA_PYMUPDF).
+
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import PyPDF2
+
+from Modules import motor_pdf
+from Modules.corpus_sintetico import generar_pdf
+from Modules.lectura_local import leer_pdf
+from Modules.sondeo_pdf import sondear_pdf
+
+
+class _MotorBase:
+    """
+    Pruebas comunes a todos los motores: abrir desde el reader y su ruta,
+    quitar fojas y guardar en un archivo, con y sin compactar.
+    """
+    nombre = None
+
+    def setUp(self):
+        self.carpeta = tempfile.mkdtemp(prefix="motor_pdf_")
+        self.ruta = os.path.join(self.carpeta, "expediente.pdf")
+        generar_pdf(self.ruta, 6, "mixto", portada=["Nro: E-000001-2025"], semilla=1)
+        self.motor = motor_pdf.crear_motor(self.nombre)
+
+    def tearDown(self):
+        shutil.rmtree(self.carpeta, ignore_errors=True)
+
+    def _guardar(self, compactar):
+        reader, _ = leer_pdf(self.ruta)
+        destino = os.path.join(self.carpeta, "salida.pdf")
+        metricas = {}
+        with self.motor.abrir(reader, ruta=self.ruta) as documento:
+            self.assertEqual(documento.cantidad_paginas(), 6)
+            documento.eliminar_paginas({2, 3})
+            with open(destino, "wb") as f:
+                escritos = documento.guardar(f, compactar=compactar, metricas=metricas)
+        self.assertEqual(escritos, os.path.getsize(destino))
+        self.assertEqual(sondear_pdf(destino)["paginas"], 4)
+        self.assertEqual(len(PyPDF2.PdfReader(destino, strict=True).pages), 4)
+        return metricas
+
+    def test_guardar(self):
+        self._guardar(compactar=False)
+
+    def test_guardar_compactando(self):
+        metricas = self._guardar(compactar=True)
+        self.assertIn("objetos_originales", metricas)
+        self.assertLessEqual(metricas["objetos_escritos"], metricas["objetos_originales"])
+
+    def test_texto_portada(self):
+        with self.motor.abrir(self.ruta) as documento:
+            self.assertIn("E-000001-2025", documento.extraer_texto([0]))
+
+    def test_guardar_en_memoria(self):
+        with open(self.ruta, "rb") as f:
+            datos = f.read()
+        salida = io.BytesIO()
+        with self.motor.abrir(datos) as documento:
+            documento.eliminar_paginas({1})
+            documento.guardar(salida)
+        self.assertEqual(len(PyPDF2.PdfReader(salida).pages), 5)
+
+
+class PruebasPyPDF2(_MotorBase, unittest.TestCase):
+    nombre = "pypdf2"
+
+
+@unittest.skipUnless(motor_pdf.MotorPyMuPDF.disponible(), "PyMuPDF no instalado o muy viejo")
+class PruebasPyMuPDF(_MotorBase, unittest.TestCase):
+    nombre = "pymupdf"
+
+    def test_cerrar_dos_veces(self):
+        documento = self.motor.abrir(self.ruta)
+        documento.cerrar()
+        documento.cerrar()
+
+
+class PruebasSeleccionMotor(unittest.TestCase):
+
+    def test_pymupdf_viejo_no_se_elige(self):
+        viejo = mock.Mock(VersionBind="1.18.0")
+        mediciones = {"motores": {"pymupdf": {"mb_s": 100.0}, "pypdf2": {"mb_s": 1.0}}}
+        with mock.patch.object(motor_pdf, "fitz", viejo), \
+                mock.patch.object(motor_pdf, "MOTOR_POR_DEFECTO", ""), \
+                mock.patch.object(motor_pdf, "leer_mediciones", return_value=mediciones):
+            self.assertFalse(motor_pdf.MotorPyMuPDF.disponible())
+            self.assertEqual(motor_pdf.motor_por_defecto(), "pypdf2")
+            with self.assertRaises(ValueError):
+                motor_pdf.crear_motor("pymupdf")
+
+    def test_pymupdf_actual_se_elige_por_mediciones(self):
+        actual = mock.Mock(VersionBind="1.24.10")
+        mediciones = {"motores": {"pymupdf": {"mb_s": 100.0}, "pypdf2": {"mb_s": 1.0}}}
+        with mock.patch.object(motor_pdf, "fitz", actual), \
+                mock.patch.object(motor_pdf, "MOTOR_POR_DEFECTO", ""), \
+                mock.patch.object(motor_pdf, "leer_mediciones", return_value=mediciones):
+            self.assertEqual(motor_pdf.version_pymupdf(), (1, 24, 10))
+            self.assertEqual(motor_pdf.motor_por_defecto(), "pymupdf")
+
+
+if __name__ == "__main__":
+    unittest.main()